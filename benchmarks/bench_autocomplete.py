@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Benchmark size of the Bokeh document of the input form for client- and server-side autocompletion.
+
+Usage: python benchmarks/bench_autocomplete.py
+"""
+import json
+
+from bokeh.document import Document
+
+from common import use_synthetic_vocabulary, Timer  # pylint: disable=import-error
+from digitizer import config
+from digitizer.forms import IsothermSingleComponentForm
+
+SIZES = [1000, 10000, 50000]
+
+
+def get_document_size(form):
+    """Return size of serialized Bokeh document in bytes."""
+    doc = Document()
+    doc.add_root(form.layout.get_root(doc))
+    return len(json.dumps(doc.to_json()))
+
+
+def main():
+    """Run benchmark."""
+    print(f'{"materials":>10} {"mode":>7} {"document [kB]":>14} {"form [ms]":>10} {"completion [us]":>16}')
+    for size in SIZES:
+        use_synthetic_vocabulary(n_materials=size)
+        for mode in ['client', 'server']:
+            config.AUTOCOMPLETE_MODE = mode
+            with Timer() as timer:
+                form = IsothermSingleComponentForm(tabs=None)
+            doc_size = get_document_size(form)
+
+            with Timer() as completion:
+                for i in range(1000):
+                    form.inp_adsorbent.value_input = f'Material {i}'
+            print(f'{size:>10} {mode:>7} {doc_size / 1e3:>14.1f} {timer.elapsed * 1e3:>10.1f} '
+                  f'{completion.elapsed * 1e3:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
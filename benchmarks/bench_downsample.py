@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Benchmark plotting large isotherms: all points vs. level-of-detail downsampling.
+
+Usage: python benchmarks/bench_downsample.py [--points 100000]
+"""
+import argparse
+
+import numpy as np
+from bokeh import events
+from bokeh.document import Document
+
+from digitizer.check import IsothermPlot, MAX_PLOT_POINTS
+from digitizer.columns import IsothermColumns
+from digitizer.submission import Isotherm
+from common import Timer, get_message_size  # pylint: disable=wrong-import-order
+
+METADATA = {
+    'articleSource': 'Figure 1',
+    'DOI': '10.1000/1',
+    'adsorbent': {'name': 'Zeolite 5A'},
+    'temperature': 298,
+    'pressureUnits': 'bar',
+    'adsorptionUnits': 'mmol/g',
+}
+
+
+def get_isotherm(n_points, n_species=2):
+    """Synthetic isotherm with adsorption and desorption branch and measurement noise."""
+    half = n_points // 2
+    pressure = np.concatenate([np.linspace(0.01, 100, half), np.linspace(100, 0.01, n_points - half)])
+    noise = np.random.default_rng(0).normal(0, 0.01, (n_points, n_species))
+    adsorption = np.column_stack([(i + 1) * pressure / (1 + pressure) for i in range(n_species)]) + noise
+    adsorbates = [{'InChIKey': f'KEY{i}', 'name': f'Gas {i}'} for i in range(n_species)]
+    columns = IsothermColumns(pressure, [a['InChIKey'] for a in adsorbates], np.full_like(adsorption, 1 / n_species),
+                              adsorption)
+    return Isotherm(dict(METADATA, adsorbates=adsorbates), columns=columns)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--points', type=int, default=100000)
+    args = parser.parse_args()
+    isotherm = get_isotherm(args.points)
+
+    print(f'{args.points} points, 2 species')
+    print(f'{"plot":>12} {"step":>10} {"time [ms]":>10} {"sent [kB]":>10} {"points":>8}')
+    for name, max_points in [('all points', args.points), ('downsampled', MAX_PLOT_POINTS)]:
+        plot = IsothermPlot(max_points=max_points)
+        doc = Document()
+        doc.add_root(plot.layout)
+        sizes = []
+        doc.on_change(lambda event: sizes.append(get_message_size(event)))  # pylint: disable=cell-var-from-loop
+
+        linear = plot.figures['linear']
+        steps = [
+            ('check', lambda: plot.update(isotherm)),  # pylint: disable=cell-var-from-loop
+            ('zoom', lambda: plot.on_ranges_update(  # pylint: disable=cell-var-from-loop
+                events.RangesUpdate(linear, x0=10, x1=12, y0=0, y1=3))),  # pylint: disable=cell-var-from-loop
+            ('log scale', lambda: plot.set_scale('log')),  # pylint: disable=cell-var-from-loop
+            ('reset', lambda: plot.on_reset(events.Reset(linear))),  # pylint: disable=cell-var-from-loop
+        ]
+        for step, function in steps:
+            sizes.clear()
+            with Timer() as timer:
+                function()
+            points = sum(len(source.data['pressure']) for source in plot.sources)
+            print(f'{name:>12} {step:>10} {timer.elapsed * 1e3:>10.1f} {sum(sizes) / 1e3:>10.1f} {points:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Benchmark memory held by figure images: bytes per FigureImage vs. content-addressed blob store.
+
+Usage: python benchmarks/bench_figure_memory.py [--figure-mb 4] [--sessions 5] [--curves 8]
+"""
+import argparse
+import gc
+import tempfile
+import tracemalloc
+from unittest import mock
+
+import numpy as np
+
+from digitizer import parse, storage
+from common import Timer  # pylint: disable=wrong-import-order
+
+
+class LegacyFigureImage:  # pylint: disable=too-few-public-methods
+    """Previous FigureImage, holding the data."""
+    def __init__(self, data=None, filename=None):
+        self.data = data
+        self.filename = filename
+
+
+def upload(figure):
+    """Return bytes as decoded from an upload (a new object for every upload)."""
+    return bytes(bytearray(figure))
+
+
+def measure(figure_class, uploads):
+    """Create figure images from uploads; return (memory held [bytes], time [s])."""
+    gc.collect()
+    tracemalloc.start()
+    with Timer() as timer:
+        figures = [figure_class(data=upload(figure), filename='figure.png') for figure in uploads]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(figures) == len(uploads)
+    return current, timer.elapsed
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--figure-mb', type=float, default=4)
+    parser.add_argument('--sessions', type=int, default=5)
+    parser.add_argument('--curves', type=int, default=8)
+    parser.add_argument('--budget-mb', type=float, default=64)
+    args = parser.parse_args()
+
+    size = int(args.figure_mb * 1e6)
+    shared = np.random.default_rng(0).bytes(size)
+    scenarios = [
+        (f'{args.sessions} sessions x {args.curves} curves of one figure', [shared] * (args.sessions * args.curves)),
+        (f'{args.sessions * args.curves} different figures', [
+            np.random.default_rng(i + 1).bytes(size) for i in range(args.sessions * args.curves)
+        ]),
+    ]
+
+    print(f'{args.figure_mb} MB figures, memory budget of blob store {args.budget_mb} MB')
+    print(f'{"scenario":>36} {"method":>11} {"memory [MB]":>12} {"time [s]":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario, uploads in scenarios:
+            for name, figure_class in [('bytes', LegacyFigureImage), ('blob store', parse.FigureImage)]:
+                store = storage.BlobStore(directory, int(args.budget_mb * 1e6))
+                with mock.patch.object(parse, 'get_blob_store', lambda store=store: store):
+                    memory, elapsed = measure(figure_class, uploads)
+                print(f'{scenario:>36} {name:>11} {memory / 1e6:>12.1f} {elapsed:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Benchmark rows of the submission stack: identicon rendered in the callback vs. cached and rendered in the background.
+
+The previous rows also assigned the cells of their GridSpec one by one.
+A stack of isotherms is built twice (e.g. after reloading the page), each time by a new Submissions instance.
+Reported are the time spent in the callback (i.e. on the event loop) and the time until all identicons are shown.
+
+Usage: python benchmarks/bench_identicons.py [--isotherms 300]
+"""
+import argparse
+import time
+from concurrent.futures import wait
+from unittest import mock
+
+import panel as pn
+import panel.widgets as pw
+
+from digitizer import submission
+from bench_submissions import get_isotherms  # pylint: disable=wrong-import-order
+from common import Timer  # pylint: disable=wrong-import-order
+
+
+def legacy_row(isotherm):
+    """Previous implementation: assign cells one by one and render the identicon in the callback."""
+    row = pn.GridSpec(height=submission.ROW_HEIGHT)
+    row[0, 0:17] = pn.pane.HTML(isotherm.name)
+    row[0, 17] = pn.pane.PNG(None)
+    row[0, 18] = pn.pane.PNG(object=submission._render_identicon(isotherm.digest))  # pylint: disable=protected-access
+    row[0, 19] = pw.Button(name='📂', button_type='primary')
+    row[0, 20] = pw.Button(name='❌', button_type='primary')
+    return row
+
+
+def build_stack(isotherms):
+    """Build stack of submissions; return (time in callback [s], time until all identicons are rendered [s])."""
+    start = time.perf_counter()
+    with Timer() as timer:
+        submissions = submission.Submissions()
+        submissions.extend(isotherms)
+    wait(submission.precompute_identicons(isotherm.digest for isotherm in isotherms))
+    return timer.elapsed, time.perf_counter() - start
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--isotherms', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f'stack of {args.isotherms} isotherms')
+    print(f'{"method":>10} {"build":>6} {"callback [s]":>13} {"all shown [s]":>14}')
+    for name in ['legacy', 'cached']:
+        isotherms = get_isotherms(args.isotherms, 100)
+        for isotherm in isotherms:
+            isotherm.update(custom=name)  # digests not rendered before
+        for build in ['first', 'again']:
+            copies = [submission.Isotherm(isotherm.metadata, columns=isotherm.columns) for isotherm in isotherms]
+            if name == 'legacy':
+                with mock.patch.object(submission.Isotherm, 'row', property(legacy_row)), \
+                        mock.patch.object(submission, 'precompute_identicons', lambda strings: []):
+                    callback, shown = build_stack(copies)
+            else:
+                callback, shown = build_stack(copies)
+            print(f'{name:>10} {build:>6} {callback:>13.3f} {shown:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Benchmark cold import time of digitizer modules against a stored baseline.
+
+Each module is imported in a fresh interpreter; the minimum over several repetitions is reported. The baseline is
+machine specific: update it on the machine that runs --check. That light modules do not pull in heavy dependencies
+is checked by tests/test_import.py.
+
+Usage:
+    python benchmarks/bench_import.py            # report (--repetitions 5)
+    python benchmarks/bench_import.py --check    # exit with status 1 if slower than baseline
+    python benchmarks/bench_import.py --update   # store new baseline (machine specific!)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'import_baseline.json')
+MODULES = ['digitizer', 'digitizer.config', 'digitizer.vocabulary', 'digitizer.parse', 'digitizer.forms']
+REPETITIONS = 5
+TOLERANCE = 1.5  # allowed slowdown factor
+SLACK = 0.02  # allowed absolute slowdown [s]
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def get_import_time(module, repetitions=REPETITIONS):
+    """Return minimum import time of module in a fresh interpreter [s]."""
+    times = []
+    for _ in range(repetitions):
+        output = subprocess.run([sys.executable, '-c', SCRIPT.format(module=module)],
+                                check=True,
+                                capture_output=True,
+                                text=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='fail if slower than baseline')
+    parser.add_argument('--update', action='store_true', help='store results as new baseline')
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS)
+    args = parser.parse_args()
+
+    try:
+        with open(BASELINE_FILE, encoding='utf8') as handle:
+            baseline = json.load(handle)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    regressions = []
+    print(f'{"module":>22} {"import [ms]":>12} {"baseline [ms]":>14}')
+    for module in MODULES:
+        results[module] = get_import_time(module, args.repetitions)
+        reference = baseline.get(module)
+        print(f'{module:>22} {results[module] * 1e3:>12.1f} {reference * 1e3 if reference else float("nan"):>14.1f}')
+        if reference and results[module] > reference * TOLERANCE + SLACK:
+            regressions.append(module)
+
+    if args.update:
+        with open(BASELINE_FILE, 'w', encoding='utf8') as handle:
+            json.dump({module: round(time, 4) for module, time in results.items()}, handle, indent=4)
+            handle.write('\n')
+        print(f'Wrote {BASELINE_FILE}')
+
+    if args.check and regressions:
+        print(f'Import time regression for: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Benchmark serializing large isotherms: json.dumps on every access vs. cached serializations.
+
+An isotherm is serialized several times, e.g. for downloads and for building the submission archive.
+
+Usage: python benchmarks/bench_json.py [--points 100000] [--species 3] [--accesses 4]
+"""
+import argparse
+import json
+
+import numpy as np
+
+from digitizer.columns import IsothermColumns
+from digitizer.serialize import get_orjson
+from digitizer.submission import Isotherm
+from bench_submissions import METADATA  # pylint: disable=wrong-import-order
+from common import Timer  # pylint: disable=wrong-import-order
+
+
+def get_isotherm(n_points, n_species):
+    """Synthetic multi-component isotherm."""
+    rng = np.random.default_rng(0)
+    pressure = np.sort(rng.uniform(0.01, 100, n_points))
+    composition = rng.dirichlet(np.ones(n_species), n_points)
+    adsorption = composition * (pressure / (1 + pressure))[:, None]
+    inchikeys = [f'{i:014d}-UHFFFAOYSA-N' for i in range(n_species)]
+    columns = IsothermColumns(pressure, inchikeys, composition, adsorption)
+    return Isotherm(dict(METADATA, adsorbates=[{'InChIKey': key, 'name': key} for key in inchikeys]), columns=columns)
+
+
+def legacy_json_str(isotherm):
+    """Previous implementation: serialize on every access."""
+    return json.dumps(isotherm.json, ensure_ascii=False, sort_keys=True, indent=4)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--points', type=int, default=100000)
+    parser.add_argument('--species', type=int, default=3)
+    parser.add_argument('--accesses', type=int, default=4)
+    args = parser.parse_args()
+
+    isotherm = get_isotherm(args.points, args.species)
+    isotherm.json  # pylint: disable=pointless-statement
+    print(f'{args.points} points, {args.species} species, {args.accesses} accesses '
+          f'(orjson {"installed" if get_orjson() else "not installed"})')
+    print(f'{"method":>16} {"first [s]":>10} {"total [s]":>10} {"size [MB]":>10}')
+
+    def compact_stdlib():
+        return json.dumps(isotherm.json, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+    methods = [
+        ('legacy', lambda: legacy_json_str(isotherm)),
+        ('cached pretty', lambda: isotherm.get_json_str(pretty=True)),
+        ('cached compact', lambda: isotherm.get_json_str(pretty=False)),
+        ('compact stdlib', compact_stdlib),
+    ]
+    for name, serialize in methods:
+        with Timer() as total:
+            with Timer() as first:
+                text = serialize()
+            for _ in range(args.accesses - 1):
+                serialize()
+        print(f'{name:>16} {first.elapsed:>10.3f} {total.elapsed:>10.3f} {len(text) / 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
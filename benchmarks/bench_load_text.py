@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Benchmark rendering imported isotherm data as text of the data field, and parsing it back.
+
+Compares the previous rendering (string concatenation per measurement) with format_table, with and without orjson,
+and checks that the text round-trips through parse_isotherm_data.
+
+Usage: python benchmarks/bench_load_text.py [--points 100000] [--species 3]
+"""
+import argparse
+from unittest import mock
+
+import numpy as np
+
+from digitizer.columns import IsothermColumns
+from digitizer import load_json
+from digitizer.parse import parse_isotherm_data
+from bench_json import get_isotherm  # pylint: disable=wrong-import-order
+from common import Timer  # pylint: disable=wrong-import-order
+
+
+def legacy_text(columns, form_type):
+    """Previous implementation: concatenate one line per measurement."""
+    if form_type == 'single-component':
+        lines = '#pressure,adsorption\n'
+        for pressure, adsorption in zip(columns.pressure.tolist(), columns.adsorption[:, 0].tolist()):
+            lines += str(pressure) + ',' + str(adsorption) + '\n'
+        return lines
+    lines = '#pressure,composition1,adsorption1,...,total_adsorption(opt)\n'
+    table = [columns.pressure]
+    for i in range(len(columns.inchikeys)):
+        table += [columns.composition[:, i], columns.adsorption[:, i]]
+    if columns.total_adsorption is not None:
+        table.append(columns.total_adsorption)
+    for row in zip(*(column.tolist() for column in table)):
+        lines += ','.join(map(str, row)) + '\n'
+    return lines
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--points', type=int, default=100000)
+    parser.add_argument('--species', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{args.points} points')
+    print(f'{"form":>17} {"method":>8} {"render [s]":>11} {"parse [s]":>10} {"round trip":>11}')
+    for form_type, n_species in [('single-component', 1), ('multi-component', args.species)]:
+        isotherm = get_isotherm(args.points, n_species)
+        columns = isotherm.columns.sorted()
+        header = '#pressure,adsorption\n' if form_type == 'single-component' else \
+            '#pressure,composition1,adsorption1,...,total_adsorption(opt)\n'
+        orjson = load_json.get_orjson()
+
+        for method in ['legacy', 'str', 'orjson']:
+            module = None if method == 'str' else orjson
+            with Timer() as render, mock.patch.object(load_json, 'get_orjson', return_value=module):
+                if method == 'legacy':
+                    text = legacy_text(columns, form_type)
+                else:
+                    text = load_json.format_table(columns.to_table(form_type), header)
+
+            with Timer() as parse:
+                isotherm_data = parse_isotherm_data(text, isotherm.metadata['adsorbates'], form_type)
+            exact = np.array_equal(
+                IsothermColumns.from_json(isotherm_data).to_table(form_type), columns.to_table(form_type))
+            print(f'{form_type:>17} {method:>8} {render.elapsed:>11.3f} {parse.elapsed:>10.3f} '
+                  f'{"exact" if exact else "differs":>11}')
+
+
+if __name__ == '__main__':
+    main()
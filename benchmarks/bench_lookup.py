@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Benchmark vocabulary lookups: hash indexes vs. linear scan.
+
+Usage: python benchmarks/bench_lookup.py
+"""
+import functools
+import random
+import timeit
+
+from digitizer.vocabulary import QuantityIndex
+
+SIZES = [1000, 10000, 100000]
+N_LOOKUPS = 1000
+
+
+def linear_find_by_name(name, json):
+    """Linear scan (previous implementation of config.find_by_name)."""
+    for q_json in json:
+        if name in [q_json['name']] + q_json['synonyms']:
+            return q_json
+    raise ValueError(f'JSON for {name} not found.')
+
+
+def linear_find_by_key(value, key, json):
+    """Linear scan (previous implementation of config.find_by_key)."""
+    for q_json in json:
+        if value == q_json[key]:
+            return q_json
+    raise ValueError(f'JSON for {value} not found.')
+
+
+def get_materials(size):
+    """Synthetic list of materials."""
+    return [{
+        'hashkey': f'NIST-MATDB-{i:032x}',
+        'name': f'Material {i}',
+        'synonyms': [f'MAT-{i}', f'mat{i}'],
+    } for i in range(size)]
+
+
+def find_all(find, values, *args):
+    """Look up every value with find(value, *args)."""
+    return [find(value, *args) for value in values]
+
+
+def main():
+    """Run benchmark."""
+    print(f'{"entries":>8} {"lookup":>8} {"linear [us]":>12} {"index [us]":>11} {"build index [ms]":>17}')
+    for size in SIZES:
+        materials = get_materials(size)
+        names = [random.choice(materials)['synonyms'][0] for _ in range(N_LOOKUPS)]
+        keys = [random.choice(materials)['hashkey'] for _ in range(N_LOOKUPS)]
+        build = timeit.timeit(functools.partial(QuantityIndex, materials), number=1)
+        index = QuantityIndex(materials)
+
+        n_linear = max(1, N_LOOKUPS * 1000 // size)
+        linear_by_name = functools.partial(find_all, linear_find_by_name, names[:n_linear], materials)
+        linear_by_key = functools.partial(find_all, linear_find_by_key, keys[:n_linear], 'hashkey', materials)
+        for lookup, linear, indexed in [
+            ('name', linear_by_name, functools.partial(find_all, index.find_by_name, names)),
+            ('hashkey', linear_by_key, functools.partial(find_all, index.find_by_key, keys, 'hashkey')),
+        ]:
+            t_linear = timeit.timeit(linear, number=1) / n_linear * 1e6
+            t_index = timeit.timeit(indexed, number=1) / N_LOOKUPS * 1e6
+            print(f'{size:>8} {lookup:>8} {t_linear:>12.2f} {t_index:>11.3f} {build * 1e3:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
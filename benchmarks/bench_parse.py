@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Benchmark parsing of the isotherm data field: NumPy tokenizer vs. pandas python engine.
+
+Usage: python benchmarks/bench_parse.py [--max-rows 1000000]
+"""
+import argparse
+from io import StringIO
+import re
+
+import numpy as np
+import pandas as pd
+
+from digitizer.parse import parse_isotherm_data
+from common import Timer  # pylint: disable=wrong-import-order
+
+SIZES = [10000, 100000, 1000000]
+ADSORBATES = [{'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N', 'name': 'Methane'}]
+
+
+def legacy_parse_isotherm_data(measurements, adsorbates):
+    """Previous implementation of parse.parse_isotherm_data (single-component)."""
+    for delimiter in ['\t', ';', '|', ',']:
+        measurements = measurements.replace(delimiter, ' ')
+    measurements = re.sub(' +', ' ', measurements)
+    measurements = pd.read_table(StringIO(measurements), sep=',| ', comment='#', header=None, engine='python')
+    measurements = measurements.to_numpy(dtype=float)
+    return [{
+        'pressure': pressure[0],
+        'species_data': [{
+            'InChIKey': adsorbates[0]['InChIKey'],
+            'composition': 1.0,
+            'adsorption': pressure[1],
+        }],
+        'total_adsorption': pressure[1]
+    } for pressure in measurements]
+
+
+def get_data(size, delimiter='\t'):
+    """Synthetic WebPlotDigitizer export."""
+    pressure = np.linspace(0.01, 100, size)
+    adsorption = 10 * pressure / (1 + pressure)
+    return '\n'.join(f'{p:.6g}{delimiter}{a:.6g}' for p, a in zip(pressure, adsorption)) + '\n'
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--max-rows', type=int, default=max(SIZES))
+    args = parser.parse_args()
+
+    print(f'{"rows":>8} {"pandas [s]":>11} {"numpy [s]":>10} {"speedup":>8}')
+    for size in [size for size in SIZES if size <= args.max_rows]:
+        data = get_data(size)
+        with Timer() as legacy:
+            expected = legacy_parse_isotherm_data(data, ADSORBATES)
+        with Timer() as vectorized:
+            parsed = parse_isotherm_data(data, ADSORBATES)
+        assert parsed == expected
+        speedup = legacy.elapsed / vectorized.elapsed
+        print(f'{size:>8} {legacy.elapsed:>11.3f} {vectorized.elapsed:>10.3f} {speedup:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Benchmark bytes sent to the browser per update of the Check view: rebuilding vs. updating the plot.
+
+Usage: python benchmarks/bench_plot_updates.py
+"""
+import numpy as np
+import bokeh.models as bmd
+from bokeh.document import Document
+from bokeh.plotting import figure
+import panel as pn
+
+from digitizer.check import IsothermCheckView, TOOLS
+from digitizer.columns import IsothermColumns
+from digitizer.submission import Isotherm
+from common import get_message_size  # pylint: disable=wrong-import-order
+
+N_POINTS = 1000
+METADATA = {
+    'articleSource': 'Figure 1',
+    'DOI': '10.1000/1',
+    'adsorbent': {
+        'name': 'Zeolite 5A'
+    },
+    'temperature': 298,
+    'pressureUnits': 'bar',
+    'adsorptionUnits': 'mmol/g',
+}
+
+
+def legacy_get_bokeh_plot(isotherm, pressure_scale='linear'):
+    """Previous implementation of check.get_bokeh_plot (new figure on every update)."""
+    metadata, columns = isotherm.metadata, isotherm.columns
+    p = figure(tools=TOOLS, x_axis_type=pressure_scale, title=metadata['articleSource'])  # pylint: disable=invalid-name
+    names = {adsorbate['InChIKey']: adsorbate['name'] for adsorbate in metadata['adsorbates']}
+    for i, inchikey in enumerate(columns.inchikeys):
+        data = bmd.ColumnDataSource(
+            data=dict(index=range(len(columns)), pressure=columns.pressure, adsorption=columns.adsorption[:, i]))
+        label = names[inchikey]
+        p.line('pressure', 'adsorption', source=data, legend_label=label)  # pylint: disable=too-many-function-args
+        p.circle('pressure', 'adsorption', source=data, legend_label=label)  # pylint: disable=too-many-function-args
+    p.xaxis.axis_label = 'Pressure [{}]'.format(metadata['pressureUnits'])
+    p.yaxis.axis_label = 'Adsorption [{}]'.format(metadata['adsorptionUnits'])
+    p.tools.pop()
+    p.tools.append(bmd.HoverTool(tooltips=[(p.xaxis.axis_label, '@pressure'), (p.yaxis.axis_label, '@adsorption')]))
+    return p
+
+
+class LegacyCheckView:  # pylint: disable=too-few-public-methods
+    """Previous behaviour of IsothermCheckView: plot replaced on every update."""
+    def __init__(self):
+        self.row = pn.Row(figure(tools=TOOLS), pn.pane.HTML(''))
+        self.isotherm = None
+
+    def show(self, isotherm, pressure_scale='linear'):
+        """Replace the plot by a new one of isotherm."""
+        self.isotherm = isotherm
+        self.row[0] = legacy_get_bokeh_plot(isotherm, pressure_scale)
+        self.row[1] = pn.pane.HTML('')
+
+
+class CheckView:  # pylint: disable=too-few-public-methods
+    """Current IsothermCheckView."""
+    def __init__(self):
+        self.view = IsothermCheckView()
+        self.row = self.view.row
+        self.isotherm = None
+
+    def show(self, isotherm, pressure_scale='linear'):
+        """Update the plot in place to show isotherm."""
+        if isotherm is not self.isotherm:
+            self.isotherm = self.view.isotherm = isotherm
+        self.view.plot.set_scale(pressure_scale)
+
+
+def get_isotherm(n_species, edit=False):
+    """Synthetic isotherm."""
+    pressure = np.linspace(0.01, 100, N_POINTS)
+    adsorption = np.column_stack([(i + 1) * pressure / (1 + pressure) for i in range(n_species)])
+    if edit:
+        adsorption[N_POINTS // 2, 0] *= 1.1
+    adsorbates = [{'InChIKey': f'KEY{i}', 'name': f'Gas {i}'} for i in range(n_species)]
+    columns = IsothermColumns(pressure, [a['InChIKey'] for a in adsorbates], np.full_like(adsorption, 1 / n_species),
+                              adsorption)
+    return Isotherm(dict(METADATA, adsorbates=adsorbates), columns=columns)
+
+
+def main():
+    """Run benchmark."""
+    first, edited, binary = get_isotherm(1), get_isotherm(1, edit=True), get_isotherm(2)
+    steps = [('check', first, 'linear'), ('re-check (1 value edited)', edited, 'linear'), ('log scale', edited, 'log'),
+             ('linear scale', edited, 'linear'), ('check binary', binary, 'linear')]
+
+    results = {}
+    for name, view_class in [('rebuild', LegacyCheckView), ('update', CheckView)]:
+        view = view_class()
+        doc = Document()
+        doc.add_root(view.row.get_root(doc))
+        sizes = []
+        doc.on_change(lambda event: sizes.append(get_message_size(event)))  # pylint: disable=cell-var-from-loop
+        results[name] = []
+        for _, isotherm, scale in steps:
+            sizes.clear()
+            view.show(isotherm, scale)
+            results[name].append(sum(sizes))
+
+    print(f'{"update":>28} {"rebuild [kB]":>13} {"update [kB]":>12}')
+    for (step, _, _), rebuild, update in zip(steps, results['rebuild'], results['update']):
+        print(f'{step:>28} {rebuild / 1e3:>13.1f} {update / 1e3:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
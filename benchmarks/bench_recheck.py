@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Benchmark re-checking an isotherm after a small edit, with and without the per-session stage cache.
+
+Usage: python benchmarks/bench_recheck.py
+"""
+import numpy as np
+
+from common import use_synthetic_vocabulary, Timer  # pylint: disable=import-error
+from digitizer.cache import LRUCache
+from digitizer.forms import IsothermSingleComponentForm
+from digitizer.parse import prepare_isotherm_data
+
+SIZES = [1000, 100000, 1000000]
+
+
+def main():
+    """Run benchmark."""
+    use_synthetic_vocabulary()
+    form = IsothermSingleComponentForm(tabs=None)
+    form.on_click_populate(None)
+    form.inp_adsorbent.value = 'Material 1'
+    form.inp_adsorbates[0].inp_name.value = 'Gas 1'
+    form.inp_pressure_units.value = form.inp_pressure_units.options[-1]
+
+    print(f'{"rows":>8} {"no cache [ms]":>14} {"first [ms]":>11} {"re-check [ms]":>14}')
+    for size in SIZES:
+        pressure = np.linspace(0.01, 100, size)
+        form.inp_isotherm_data.value = '\n'.join(f'{p:.6g},{p / (1 + p):.6g}' for p in pressure)
+        cache = LRUCache(max_size=256e6)
+
+        with Timer() as uncached:
+            prepare_isotherm_data(form)
+        with Timer() as first:
+            prepare_isotherm_data(form, cache=cache)
+        form.inp_comment.value = f'edited {size}'
+        with Timer() as recheck:
+            prepare_isotherm_data(form, cache=cache)
+        print(f'{size:>8} {uncached.elapsed * 1e3:>14.1f} {first.elapsed * 1e3:>11.1f} {recheck.elapsed * 1e3:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Measure memory per Panel session (both input forms and check view, rendered into a Bokeh document).
+
+Usage: python benchmarks/bench_session_memory.py
+"""
+import gc
+import tracemalloc
+
+from bokeh.document import Document
+import panel as pn
+
+from common import use_synthetic_vocabulary  # pylint: disable=import-error
+from digitizer import config
+from digitizer.adsorbates import AdsorbateWithControls
+from digitizer.check import IsothermCheckView
+from digitizer.forms import IsothermSingleComponentForm, IsothermMultiComponentForm
+
+N_SESSIONS = 10
+N_ADSORBATE_ROWS = 10
+
+
+def create_session():
+    """Create layout of digitizer/main.py in a new document."""
+    tabs = pn.Tabs()
+    single = IsothermSingleComponentForm(tabs=tabs)
+    multi = IsothermMultiComponentForm(tabs=tabs)
+    check = IsothermCheckView(observed_forms=[single, multi])
+    tabs.extend([('Single-component', single.layout), ('Multi-component', multi.layout), ('Check', check.layout)])
+    for _ in range(N_ADSORBATE_ROWS - 1):
+        multi.inp_adsorbates.append(AdsorbateWithControls(parent=multi.inp_adsorbates))
+
+    doc = Document()
+    doc.add_root(tabs.get_root(doc))
+    return doc
+
+
+def measure(n_sessions=N_SESSIONS):
+    """Return memory per session in bytes."""
+    create_session()  # warm up caches
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [create_session() for _ in range(n_sessions)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / n_sessions
+
+
+def main():
+    """Run benchmark."""
+    use_synthetic_vocabulary(n_materials=20000, n_gases=5000)
+    print(f'Sessions with {N_ADSORBATE_ROWS} adsorbate rows in the multi-component form')
+    print(f'{"autocomplete mode":>18} {"memory per session [MB]":>24}')
+    for mode in ['client', 'server']:
+        config.AUTOCOMPLETE_MODE = mode
+        print(f'{mode:>18} {measure() / 1e6:>24.2f}')
+
+
+if __name__ == '__main__':
+    main()
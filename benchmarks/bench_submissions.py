@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Benchmark building a deduplicated submission stack: hashing the JSON string vs. cached content digest.
+
+Usage: python benchmarks/bench_submissions.py [--isotherms 50] [--points 10000]
+"""
+import argparse
+
+import numpy as np
+
+from digitizer.columns import IsothermColumns
+from digitizer.submission import Isotherm
+from common import Timer  # pylint: disable=wrong-import-order
+
+METADATA = {
+    'articleSource': 'Figure 1',
+    'DOI': '10.1000/1',
+    'adsorbent': {'name': 'Zeolite 5A'},
+    'adsorbates': [{'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N', 'name': 'Methane'}],
+    'temperature': 298,
+    'pressureUnits': 'bar',
+    'adsorptionUnits': 'mmol/g',
+}
+
+
+def get_isotherms(n_isotherms, n_points):
+    """Synthetic isotherms differing in temperature."""
+    pressure = np.linspace(0.01, 100, n_points)
+    adsorption = (pressure / (1 + pressure))[:, None]
+    columns = IsothermColumns(pressure, [METADATA['adsorbates'][0]['InChIKey']], np.ones_like(adsorption), adsorption)
+    return [Isotherm(dict(METADATA, temperature=200 + i), columns=columns) for i in range(n_isotherms)]
+
+
+def legacy_append(stack, isotherm):
+    """Previous dedupe: compare hash of the JSON string with every isotherm in the stack."""
+    key = hash(str(isotherm.json))
+    if any(hash(str(other.json)) == key for other in stack):
+        return
+    stack.insert(0, isotherm)
+
+
+def digest_append(stack, isotherm):
+    """Dedupe via digest index."""
+    if isotherm.digest in stack:
+        return
+    stack[isotherm.digest] = isotherm
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--isotherms', type=int, default=50)
+    parser.add_argument('--points', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f'{args.isotherms} isotherms with {args.points} points, each appended twice')
+    print(f'{"method":>8} {"time [s]":>9}')
+    for name, append, stack in [('legacy', legacy_append, []), ('digest', digest_append, {})]:
+        isotherms = get_isotherms(args.isotherms, args.points)
+        for isotherm in isotherms:
+            isotherm._digest = None  # pylint: disable=protected-access  # include computing the digest
+        with Timer() as timer:
+            for isotherm in isotherms + isotherms:
+                append(stack, isotherm)
+        assert len(stack) == args.isotherms
+        print(f'{name:>8} {timer.elapsed:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
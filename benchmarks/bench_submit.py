@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Benchmark submitting to a slow file system: blocking write in the callback vs. atomic write in the background.
+
+The file system is simulated by limiting write bandwidth and delaying fsync. The event loop is simulated by a thread
+that ticks every 5 ms; its longest stall is the time all sessions of the process are blocked.
+
+Usage: python benchmarks/bench_submit.py [--isotherms 10] [--bandwidth-mb 20] [--fsync-ms 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock
+
+from digitizer import submission
+from digitizer.archive import write_zip
+from bench_zip import get_isotherm  # pylint: disable=wrong-import-order
+
+TICK = 0.005  # seconds
+
+
+class SlowWriter:  # pylint: disable=too-few-public-methods
+    """File wrapper limiting write bandwidth."""
+    def __init__(self, handle, bandwidth):
+        self.handle = handle
+        self.bandwidth = bandwidth
+
+    def write(self, data):
+        """Write data, taking as long as the bandwidth allows."""
+        time.sleep(len(data) / self.bandwidth)
+        return self.handle.write(data)
+
+
+def legacy_submit(submissions, file_path, bandwidth):
+    """Previous implementation: build zip file in memory and write it in the callback."""
+    memfile = BytesIO()
+    write_zip(memfile, submissions.get_zip_entries())
+    with open(file_path, 'wb') as handle:
+        SlowWriter(handle, bandwidth).write(memfile.getvalue())
+
+
+def measure(submit):
+    """Run submit on the simulated event loop; return (time until written, longest stall of the event loop)."""
+    start = last_tick = time.perf_counter()
+    future = submit()  # the callback blocks the event loop
+    longest_stall = time.perf_counter() - last_tick
+    last_tick = time.perf_counter()
+    while future is not None and not future.done():
+        time.sleep(TICK)
+        now = time.perf_counter()
+        longest_stall = max(longest_stall, now - last_tick - TICK)
+        last_tick = now
+    if future is not None:
+        future.result()
+    return time.perf_counter() - start, longest_stall
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--isotherms', type=int, default=10)
+    parser.add_argument('--points', type=int, default=10000)
+    parser.add_argument('--bandwidth-mb', type=float, default=20)
+    parser.add_argument('--fsync-ms', type=float, default=200)
+    args = parser.parse_args()
+    bandwidth = args.bandwidth_mb * 1e6
+
+    real_fsync = os.fsync
+
+    def slow_fsync(descriptor):
+        time.sleep(args.fsync_ms / 1e3)
+        real_fsync(descriptor)
+
+    def slow_write_zip(handle, entries, progress=None):
+        return write_zip(SlowWriter(handle, bandwidth), entries, progress)
+
+    print(f'{args.isotherms} isotherms, {args.bandwidth_mb} MB/s, fsync {args.fsync_ms} ms')
+    print(f'{"method":>10} {"written [s]":>12} {"MB/s":>6} {"event loop stall [s]":>21}')
+    with tempfile.TemporaryDirectory() as directory, mock.patch('os.fsync', slow_fsync), \
+            mock.patch.object(submission, 'write_zip', slow_write_zip), \
+            mock.patch.object(submission, 'SUBMISSION_FOLDER', directory):
+        for name in ['legacy', 'background']:
+            submissions = submission.Submissions()
+            for i in range(args.isotherms):
+                submissions.append(get_isotherm(i, args.points))
+            submissions.get_zip_entries()  # compress in advance: measure writing only
+
+            if name == 'legacy':
+                path = os.path.join(directory, 'legacy.zip')
+                elapsed, stall = measure(lambda: legacy_submit(submissions, path, bandwidth))  # pylint: disable=W0640
+            else:
+                elapsed, stall = measure(lambda: submissions.on_click_submit(None))  # pylint: disable=W0640
+                path = max((os.path.join(directory, f) for f in os.listdir(directory)), key=os.path.getmtime)
+            size = os.path.getsize(path)
+            print(f'{name:>10} {elapsed:>12.2f} {size / 1e6 / elapsed:>6.1f} {stall:>21.3f}')
+
+
+if __name__ == '__main__':
+    main()
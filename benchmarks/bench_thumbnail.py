@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Benchmark showing the figure in the check tab: full-resolution upload vs. downscaled preview.
+
+Measures the bytes sent to the browser and the time spent in the callback (i.e. on the event loop).
+The figure is checked several times, as when correcting the isotherm data. Bokeh sends unchanged images only once,
+but the full-resolution image is encoded again on every check.
+
+Usage: python benchmarks/bench_thumbnail.py [--megapixels 12] [--checks 5] [--format PNG]
+"""
+import argparse
+import io
+import math
+import threading
+
+import panel as pn
+from bokeh.document import Document
+from PIL import Image, ImageDraw
+
+from digitizer.check import IsothermCheckView
+from digitizer.parse import FigureImage
+from common import Timer, get_message_size  # pylint: disable=wrong-import-order
+
+
+def get_figure(megapixels, image_format):
+    """Return snapshot of a plot with axes, grid and curves (PNG or JPEG)."""
+    width = int(math.sqrt(megapixels * 1e6 * 4 / 3))
+    height = width * 3 // 4
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    for i in range(1, 20):
+        draw.line([(i * width // 20, 0), (i * width // 20, height)], fill=(220, 220, 220), width=2)
+        draw.line([(0, i * height // 20), (width, i * height // 20)], fill=(220, 220, 220), width=2)
+    for curve in range(5):
+        points = [(x, height - height * (1 - math.exp(-x / width * (curve + 1) * 3)) * 0.9) for x in range(0, width, 4)]
+        draw.line(points, fill=(40 * curve, 100, 200 - 40 * curve), width=6)
+        for x, y in points[::50]:  # pylint: disable=invalid-name
+            draw.ellipse([x - 12, y - 12, x + 12, y + 12], outline='black', width=3)
+    # sensor noise and compression artifacts of a screenshot or scan
+    image = Image.blend(image, Image.effect_noise((width, height), 64).convert('RGB'), 0.05)
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue()
+
+
+class LegacyFigureImage:  # pylint: disable=too-few-public-methods
+    """Previous FigureImage, displayed at full resolution."""
+    def __init__(self, data):
+        self.data = data
+
+    def _repr_png_(self):
+        return self.data
+
+
+def measure(pane, show, data, checks):
+    """Check figure repeatedly; return (bytes sent in total, time in callback per check [s])."""
+    doc = Document()
+    doc.add_root(pane.get_root(doc))
+    sizes = []
+    doc.on_change(lambda event: sizes.append(get_message_size(event)))
+    elapsed = 0
+    for _ in range(checks):
+        figure = FigureImage(data, 'figure.png')  # every check creates a new figure image
+        with Timer() as timer:
+            shown = show(figure)
+        elapsed += timer.elapsed
+        if shown is not None:
+            shown.wait()
+    return sum(sizes), elapsed / checks
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--megapixels', type=float, default=12)
+    parser.add_argument('--checks', type=int, default=5)
+    parser.add_argument('--format', default='PNG', choices=['PNG', 'JPEG'])
+    args = parser.parse_args()
+
+    data = get_figure(args.megapixels, args.format)
+    print(f'{args.megapixels} MP {args.format} figure ({len(data) / 1e6:.1f} MB), {args.checks} checks')
+    print(f'{"method":>10} {"sent [kB]":>10} {"callback [ms]":>14}')
+
+    legacy_pane = pn.pane.PNG(None, width=400)
+
+    def show_legacy(figure):
+        legacy_pane.object = LegacyFigureImage(figure.data)
+
+    view = IsothermCheckView()
+
+    def show_preview(figure):
+        view.show_figure(figure)
+        shown = threading.Event()  # set after the preview is shown (callbacks run in the order they were added)
+        figure.request_thumbnail().add_done_callback(lambda future: shown.set())
+        return shown
+
+    for name, pane, show in [('legacy', legacy_pane, show_legacy), ('preview', view.figure_pane, show_preview)]:
+        size, elapsed = measure(pane, show, data, args.checks)
+        print(f'{name:>10} {size / 1e3:>10.1f} {elapsed * 1e3:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Benchmark peak memory of parsing a large isotherm data file: whole text vs. chunked stream.
+
+Usage: python benchmarks/bench_upload_memory.py [--rows 2000000]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from digitizer.parse import parse_isotherm_columns, parse_isotherm_file
+from common import Timer  # pylint: disable=wrong-import-order
+
+ADSORBATES = [{'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N', 'name': 'Methane'}]
+
+
+def write_data_file(path, rows):
+    """Write synthetic CSV file of isotherm data."""
+    pressure = np.linspace(0.01, 100, rows)
+    np.savetxt(path, np.column_stack([pressure, 10 * pressure / (1 + pressure)]), fmt='%.6g', delimiter=',')
+
+
+def parse_text(path):
+    """Read whole file and parse it as text (as for the isotherm data field)."""
+    with open(path, 'rb') as handle:
+        return parse_isotherm_columns(handle.read().decode('utf8'), ADSORBATES)
+
+
+def parse_stream(path):
+    """Parse file in chunks."""
+    with open(path, 'r', encoding='utf8') as handle:
+        return parse_isotherm_file(handle, ADSORBATES)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--rows', type=int, default=2000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'isotherm.csv')
+        write_data_file(path, args.rows)
+        size = os.path.getsize(path)
+        print(f'{args.rows} rows, {size / 1e6:.1f} MB file, {args.rows * 4 * 8 / 1e6:.1f} MB of output columns')
+
+        print(f'{"method":>8} {"peak [MB]":>10} {"time [s]":>9}')
+        for name, parse in [('text', parse_text), ('stream', parse_stream)]:
+            tracemalloc.start()
+            with Timer() as timer:
+                columns = parse(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert len(columns) == args.rows
+            del columns
+            print(f'{name:>8} {peak / 1e6:>10.1f} {timer.elapsed:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
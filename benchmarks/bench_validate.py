@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Benchmark consistency checks of parsed multi-component isotherm data.
+
+Usage: python benchmarks/bench_validate.py
+"""
+import numpy as np
+
+from common import Timer  # pylint: disable=import-error
+from digitizer.columns import IsothermColumns
+from digitizer.validate import validate_columns
+
+SIZES = [100000, 1000000, 10000000]
+INCHIKEYS = ['VNWKTOKETHGBQD-UHFFFAOYSA-N', 'CURLTUGMZLYLDI-UHFFFAOYSA-N']
+ERROR_FRACTION = 0.01
+
+
+def get_columns(size):
+    """Synthetic binary isotherm with a fraction of negative pressures."""
+    rng = np.random.default_rng(0)
+    pressure = np.linspace(0, 100, size)
+    pressure[rng.random(size) < ERROR_FRACTION] *= -1
+    composition = np.full((size, 2), 0.5)
+    adsorption = np.column_stack([pressure, pressure]) / (1 + np.abs(pressure))[:, np.newaxis]
+    return IsothermColumns(pressure, INCHIKEYS, composition, adsorption, adsorption.sum(axis=1))
+
+
+def main():
+    """Run benchmark."""
+    print(f'{"rows":>9} {"errors":>7} {"validate [ms]":>14}')
+    for size in SIZES:
+        columns = get_columns(size)
+        with Timer() as timer:
+            errors = validate_columns(columns, np.arange(size) + 1, composition_type='Mole Fraction')
+        print(f'{size:>9} {len(errors):>7} {timer.elapsed * 1e3:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Benchmark building the submission archive: zipfile on every download vs. cached precompressed entries.
+
+Usage: python benchmarks/bench_zip.py [--isotherms 20] [--points 10000]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+import zipfile
+from io import BytesIO
+
+import numpy as np
+
+from digitizer.columns import IsothermColumns
+from digitizer.parse import FigureImage
+from digitizer.submission import Isotherm, Submissions
+from common import Timer  # pylint: disable=wrong-import-order
+
+METADATA = {
+    'articleSource': 'Figure 1',
+    'DOI': '10.1000/1',
+    'adsorbent': {'name': 'Zeolite 5A'},
+    'adsorbates': [{'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N', 'name': 'Methane'}],
+    'temperature': 298,
+    'pressureUnits': 'bar',
+    'adsorptionUnits': 'mmol/g',
+}
+FIGURE_SIZE = 500000  # bytes
+
+
+def get_isotherm(i, n_points):
+    """Synthetic isotherm with figure image."""
+    pressure = np.linspace(0.01, 100, n_points) * (1 + i / 100)
+    adsorption = (pressure / (1 + pressure))[:, None]
+    columns = IsothermColumns(pressure, [METADATA['adsorbates'][0]['InChIKey']], np.ones_like(adsorption), adsorption)
+    image = FigureImage(np.random.default_rng(i).bytes(FIGURE_SIZE), 'figure.png')
+    return Isotherm(dict(METADATA, temperature=200 + i), figure_image=image, columns=columns)
+
+
+def legacy_submit(submissions, path):
+    """Previous implementation: compress everything into memory, then copy the buffer to the file."""
+    memfile = BytesIO()
+    with zipfile.ZipFile(memfile, mode='w', compression=zipfile.ZIP_DEFLATED) as zhandle:
+        for i, isotherm in enumerate(submissions):
+            filename = f'isotherm{i}_{isotherm.figure_image.filename}'
+            isotherm.update(associated_content=[filename])
+            zhandle.writestr(filename, isotherm.figure_image.data)
+            zhandle.writestr(f'isotherm{i}.json', isotherm.json_str)
+    memfile.seek(0)
+    with open(path, 'wb') as handle:
+        handle.write(memfile.getvalue())
+
+
+def submit(submissions, path):
+    """Stream cached entries to the file."""
+    with open(path, 'wb') as handle:
+        submissions.write_zip_file(handle)
+
+
+def legacy_download(submissions):
+    """Previous download: write the archive to a BytesIO buffer and read it (as panel's FileDownload does)."""
+    memfile = BytesIO()
+    submissions.write_zip_file(memfile)
+    memfile.seek(0)
+    return memfile.read()
+
+
+def download(submissions):
+    """Read the archive assembled from cached entries."""
+    return submissions.get_zip_file().read()
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--isotherms', type=int, default=20)
+    parser.add_argument('--points', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f'{args.isotherms} isotherms with {args.points} points and {FIGURE_SIZE / 1e6:.1f} MB figure each')
+    print(f'{"method":>8} {"build":>8} {"time [s]":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'submission.zip')
+        for name, function in [('legacy', legacy_submit), ('cached', submit)]:
+            submissions = Submissions()
+            for i in range(args.isotherms):
+                submissions.append(get_isotherm(i, args.points))
+            for build in ['first', 'again', 'append']:
+                if build == 'append':
+                    submissions.append(get_isotherm(args.isotherms, args.points))
+                with Timer() as timer:
+                    function(submissions, path)
+                print(f'{name:>8} {build:>8} {timer.elapsed:>9.3f}')
+
+            tracemalloc.start()
+            function(submissions, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'{name:>8} peak memory of building again: {peak / 1e6:.1f} MB')
+
+        submissions.get_zip_entries()
+        for name, function in [('legacy', legacy_download), ('cached', download)]:
+            tracemalloc.start()
+            size = len(function(submissions))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'{name:>8} peak memory of download: {peak / 1e6:.1f} MB for {size / 1e6:.1f} MB archive')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Benchmark compressing submission archives with many large figures: DEFLATE everything vs. storage policy.
+
+Figures are random bytes, which DEFLATE cannot shrink, like PNG and JPEG data.
+
+Usage: python benchmarks/bench_zip_compression.py [--figures 30] [--figure-mb 3] [--points 20000]
+"""
+import argparse
+import json
+import os
+import zipfile
+
+import numpy as np
+
+from digitizer.archive import compress_entry, compress_entries
+from digitizer.workers import get_executor
+from common import Timer  # pylint: disable=wrong-import-order
+
+
+def get_files(n_figures, figure_size, n_points):
+    """Return list of (path in archive, function returning content) tuples."""
+    pressure = np.linspace(0.01, 100, n_points)
+    isotherm_data = [{
+        'pressure': p,
+        'species_data': [{'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N', 'composition': 1.0, 'adsorption': p / (1 + p)}]
+    } for p in pressure.tolist()]
+    json_data = json.dumps(isotherm_data, indent=4).encode('utf8')
+    files = []
+    for i in range(n_figures):
+        figure = np.random.default_rng(i).bytes(figure_size)
+        files += [(f'isotherm{i}_figure.png', lambda figure=figure: figure), (f'isotherm{i}.json', lambda: json_data)]
+    return files
+
+
+def deflate_all(files):
+    """Previous policy: DEFLATE every file, one after the other."""
+    return [compress_entry(arcname, get_data(), compress_type=zipfile.ZIP_DEFLATED) for arcname, get_data in files]
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--figures', type=int, default=30)
+    parser.add_argument('--figure-mb', type=float, default=3)
+    parser.add_argument('--points', type=int, default=20000)
+    args = parser.parse_args()
+
+    files = get_files(args.figures, int(args.figure_mb * 1e6), args.points)
+    size = sum(len(get_data()) for _, get_data in files)
+    print(f'{args.figures} figures of {args.figure_mb} MB and JSON files, {size / 1e6:.0f} MB in total, '
+          f'{os.cpu_count()} CPUs')
+    print(f'{"method":>16} {"time [s]":>9} {"archive [MB]":>13}')
+    methods = [
+        ('deflate all', deflate_all),
+        ('policy, 1 thread', compress_entries),
+        ('policy, parallel', lambda files: compress_entries(files, executor=get_executor())),
+    ]
+    for name, compress in methods:
+        with Timer() as timer:
+            entries = compress(files)
+        archive_size = sum(len(entry.data) for entry in entries)
+        print(f'{name:>16} {timer.elapsed:>9.2f} {archive_size / 1e6:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
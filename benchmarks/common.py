@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Shared helpers for benchmarks."""
+import time
+
+from digitizer import config
+from digitizer.vocabulary import Vocabulary, EndpointData, BIBLIOGRAPHY_PATH
+
+
+def get_synthetic_vocabulary(n_materials=10000, n_gases=1000, n_synonyms=2):
+    """Return vocabulary with synthetic materials and gases."""
+    data = {
+        '/materials.json': [{
+            'hashkey': f'NIST-MATDB-{i:032x}',
+            'name': f'Material {i}',
+            'synonyms': [f'MAT-{i}-{j}' for j in range(n_synonyms)],
+        } for i in range(n_materials)],
+        '/gases.json': [{
+            'InChIKey': f'{i:014d}-UHFFFAOYSA-N',
+            'name': f'Gas {i}',
+            'synonyms': [f'G{i}-{j}' for j in range(n_synonyms)],
+        } for i in range(n_gases)],
+        BIBLIOGRAPHY_PATH: [{
+            'DOI': f'10.1000/{i}'
+        } for i in range(n_materials)],
+    }
+    for path in config.QUANTITY_API_MAPPING.values():
+        data.setdefault(path, [{'name': f'{path} {i}'} for i in range(5)])
+
+    endpoints = {path: EndpointData(data=json_data, etag=None, last_modified=None) for path, json_data in data.items()}
+    return Vocabulary(endpoints, config.QUANTITY_API_MAPPING)
+
+
+def use_synthetic_vocabulary(**kwargs):
+    """Replace vocabulary of the digitizer by a synthetic one."""
+    config.VOCABULARY.set(get_synthetic_vocabulary(**kwargs))
+
+
+def get_message_size(event):
+    """Return size of PATCH-DOC message for event in bytes.
+
+    Like the Bokeh server, the message is created as soon as the event occurs.
+    """
+    from bokeh.protocol import Protocol  # pylint: disable=import-outside-toplevel
+
+    message = Protocol().create('PATCH-DOC', [event])
+    return len(message.header_json) + len(message.metadata_json) + len(message.content_json) + sum(
+        len(buffer) for _, buffer in message.buffers)
+
+
+class Timer:  # pylint: disable=too-few-public-methods
+    """Context manager measuring wall time."""
+    def __init__(self):
+        self.start = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.elapsed = None
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed = time.perf_counter() - self.start
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Isotherm digitizer for NIST Adsorption Database"""
+import functools
 import os
-from bokeh import __version__ as bk_ver
 
 
 class ValidationError(ValueError):
@@ -10,8 +10,13 @@ class ValidationError(ValueError):
 
 MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
 
-# TODO: Remove after official bokeh/panel release  # pylint: disable=fixme
-if bk_ver.startswith('2.3'):
-    restrict_kwargs = {'restrict': False}
-else:
-    restrict_kwargs = {}
+
+@functools.lru_cache(maxsize=1)
+def get_restrict_kwargs():
+    """Return keyword arguments for AutocompleteInput depending on the bokeh version (imports bokeh on first call)."""
+    from bokeh import __version__ as bk_ver  # pylint: disable=import-outside-toplevel
+
+    # TODO: Remove after official bokeh/panel release  # pylint: disable=fixme
+    if bk_ver.startswith('2.3'):
+        return {'restrict': False}
+    return {}
@@ -3,8 +3,7 @@
 import collections
 import panel as pn
 import panel.widgets as pw
-from .config import QUANTITIES
-from . import restrict_kwargs
+from .autocomplete import get_autocomplete_input
 
 
 class Adsorbate():  # pylint: disable=too-few-public-methods
@@ -12,12 +11,10 @@ class Adsorbate():  # pylint: disable=too-few-public-methods
     def __init__(self):
         """Initialize single adsorbent row.
         """
-        self.inp_name = pw.AutocompleteInput(name='Adsorbate Gas/Fluid',
-                                             placeholder='Methane',
-                                             options=QUANTITIES['adsorbates']['names'],
-                                             case_sensitive=False,
-                                             css_classes=['required'],
-                                             **restrict_kwargs)
+        self.inp_name = get_autocomplete_input('adsorbates',
+                                               name='Adsorbate Gas/Fluid',
+                                               placeholder='Methane',
+                                               css_classes=['required'])
         self.row = pn.Row(self.inp_name)
 
     @property
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Zip archives assembled from precompressed entries.
+
+Entries are compressed once (compress_entry, or compress_entries in parallel), can be cached, and are written to any
+number of archives (write_zip). Already compressed media (e.g. PNG and JPEG figures) are stored without compression.
+Archives are streamed to a binary file-like object, which need not be seekable, or assembled in memory
+(get_zip_bytes).
+ZIP64 is not supported (archives are limited to 4 GB and 65535 entries).
+"""
+import collections
+import os
+import struct
+import threading
+import time
+import types
+import zipfile
+import zlib
+
+ZipEntry = collections.namedtuple('ZipEntry', ['arcname', 'data', 'crc', 'size', 'compress_type', 'date_time'])
+ZipEntry.__doc__ = """Compressed file of a zip archive, with the CRC-32 and size of the uncompressed data."""
+
+ZIP_VERSION = 20  # version 2.0 of the format: deflate
+CREATE_VERSION = 3 << 8 | ZIP_VERSION  # created on Unix (for the file attributes)
+UTF8_FLAG = 0x800  # file names are encoded as UTF-8
+FILE_ATTRIBUTES = 0o100644 << 16  # regular file, rw-r--r--
+ZIP_LIMIT = 0xFFFFFFFF
+WRITE_CHUNK_SIZE = 1 << 20  # bytes written at once (progress is reported per chunk)
+# file types that DEFLATE barely shrinks
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip', '.gz')
+
+
+def get_compress_type(arcname):
+    """Return compression type for a file: ZIP_STORED for already compressed media, else ZIP_DEFLATED."""
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def compress_entry(arcname, data, compress_type=None, level=zlib.Z_DEFAULT_COMPRESSION):
+    """Compress file for a zip archive.
+
+    :param arcname: path of the file in the archive
+    :param data: file content (bytes)
+    :param compress_type: zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED (defaults to get_compress_type(arcname))
+    :param level: zlib compression level (ZIP_DEFLATED only)
+    :returns: ZipEntry
+    """
+    if compress_type is None:
+        compress_type = get_compress_type(arcname)
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+    elif compress_type == zipfile.ZIP_STORED:
+        compressed = bytes(data)
+    else:
+        raise ValueError(f'Unsupported compression type {compress_type}')
+    return ZipEntry(arcname=arcname,
+                    data=compressed,
+                    crc=zlib.crc32(data),
+                    size=len(data),
+                    compress_type=compress_type,
+                    date_time=time.localtime()[:6])
+
+
+def compress_entries(files, level=zlib.Z_DEFAULT_COMPRESSION, executor=None):
+    """Compress files for a zip archive, in parallel on executor (zlib releases the GIL).
+
+    The calling thread compresses files too, and helper tasks that start after all files were taken return at once.
+    So this may be called from a thread of executor, even if all of its threads are busy.
+
+    :param files: list of (path in the archive, function returning the file content) tuples
+    :param level: zlib compression level for files that are deflated
+    :param executor: concurrent.futures.Executor sharing the work (defaults to compressing in the calling thread)
+    :returns: list of ZipEntry, in the order of files
+    """
+    entries = [None] * len(files)
+    indices = iter(range(len(files)))
+    lock = threading.Lock()
+
+    def compress_remaining():
+        while True:
+            with lock:
+                i = next(indices, None)
+            if i is None:
+                return
+            arcname, get_data = files[i]
+            entries[i] = compress_entry(arcname, get_data(), level=level)
+
+    helpers = [executor.submit(compress_remaining) for _ in files[1:]] if executor is not None else []
+    try:
+        compress_remaining()
+    finally:
+        for helper in helpers:
+            helper.cancel()
+    for helper in helpers:
+        if not helper.cancelled():
+            helper.result()
+    return entries
+
+
+def _dos_date_time(date_time):
+    """Return (DOS time, DOS date) of (year, month, day, hour, minute, second)."""
+    year, month, day, hour, minute, second = date_time
+    return hour << 11 | minute << 5 | second // 2, max(year - 1980, 0) << 9 | month << 5 | day
+
+
+def _header_fields(entry, name):
+    """Return fields shared by local file header and central directory record (version to file name length)."""
+    dos_time, dos_date = _dos_date_time(entry.date_time)
+    return (ZIP_VERSION, UTF8_FLAG, entry.compress_type, dos_time, dos_date, entry.crc, len(entry.data), entry.size,
+            len(name))
+
+
+def _local_header(entry, name):
+    """Return local file header of entry (without extra field)."""
+    return struct.pack('<IHHHHHIIIHH', 0x04034b50, *_header_fields(entry, name), 0) + name
+
+
+def _central_directory_record(entry, name, offset):
+    """Return central directory record of entry whose local file header starts at offset."""
+    # extra field, comment, disk number, internal attributes: empty
+    return struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, CREATE_VERSION, *_header_fields(entry, name), 0, 0, 0, 0,
+                       FILE_ATTRIBUTES, offset) + name
+
+
+def write_zip(handle, entries, progress=None):
+    """Write zip archive of precompressed entries.
+
+    :param handle: binary file-like object (only write is used)
+    :param entries: list of ZipEntry
+    :param progress: function called with (bytes of file data written, total bytes of file data) (optional)
+    :returns: number of bytes written
+    """
+    total = sum(len(entry.data) for entry in entries)
+    written = 0
+    offset = 0
+    central_directory = []
+    for entry in entries:
+        name = entry.arcname.encode('utf8')
+        if max(offset, len(entry.data), entry.size) > ZIP_LIMIT:
+            raise ValueError('Zip archive exceeds 4 GB')
+        header = _local_header(entry, name)
+        handle.write(header)
+        data = memoryview(entry.data)
+        for start in range(0, len(data), WRITE_CHUNK_SIZE):
+            chunk = data[start:start + WRITE_CHUNK_SIZE]
+            handle.write(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written, total)
+        central_directory.append(_central_directory_record(entry, name, offset))
+        offset += len(header) + len(entry.data)
+
+    if len(central_directory) > 0xFFFF:
+        raise ValueError('Zip archive exceeds 65535 files')
+    directory = b''.join(central_directory)
+    if offset + len(directory) > ZIP_LIMIT:
+        raise ValueError('Zip archive exceeds 4 GB')
+    handle.write(directory)
+    handle.write(
+        struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(central_directory), len(central_directory), len(directory),
+                    offset, 0))
+    return offset + len(directory) + 22
+
+
+def get_zip_bytes(entries):
+    """Return zip archive of precompressed entries as bytes (see write_zip).
+
+    The chunks written are views of the entry data, which are joined once: besides the entries, only the returned
+    archive holds the data.
+
+    :param entries: list of ZipEntry
+    """
+    chunks = []
+    write_zip(types.SimpleNamespace(write=chunks.append), entries)
+    return b''.join(chunks)
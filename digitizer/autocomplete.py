@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Inputs offering vocabulary names (autocompletes and selects).
+
+In 'server' mode, autocomplete inputs only send the top matches for the prefix typed by the user to the browser,
+instead of the full list of names and synonyms (which can be large, e.g. for materials).
+
+Inputs that hold full option lists follow the vocabulary: when it is refreshed in the background, their options are
+updated in all live sessions.
+"""
+import functools
+import weakref
+
+import panel as pn
+import panel.widgets as pw
+
+from . import config, get_restrict_kwargs
+
+# Bokeh's AutocompleteInput only filters its completions on key up, i.e. completions arriving from the server would
+# only be shown after the next key stroke. Re-run the filter once new completions arrive.
+REFRESH_MENU_JS = """
+function find_view(view) {
+    if (view.model === cb_obj)
+        return view
+    for (const child of view.child_views || []) {
+        const found = find_view(child)
+        if (found != null)
+            return found
+    }
+    return null
+}
+for (const root of Object.values(Bokeh.index)) {
+    const view = find_view(root)
+    if (view != null) {
+        if (document.activeElement === view.input_el)
+            view._keyup({keyCode: null})
+        break
+    }
+}
+"""
+
+
+# widgets whose options follow the vocabulary: widget -> (quantity, key, weak reference to document or None)
+_FOLLOWERS = weakref.WeakKeyDictionary()
+
+
+def follow_vocabulary(widget, quantity, key):
+    """Update options of widget whenever the vocabulary is replaced.
+
+    :param widget: panel widget with options
+    :param quantity: quantity, e.g. 'adsorbents'
+    :param key: key of the options in config.QUANTITIES[quantity], e.g. 'names' or 'select_options'
+    """
+    doc = pn.state.curdoc
+    _FOLLOWERS[widget] = (quantity, key, weakref.ref(doc) if doc else None)
+
+
+def _update_options(updates):
+    """Set options of widgets.
+
+    :param updates: list of (widget, options) tuples
+    """
+    for widget, options in updates:
+        widget.options = options
+
+
+def _on_vocabulary_change(vocabulary):
+    """Update options of all following widgets in their respective documents.
+
+    Called from the thread that replaced the vocabulary.
+    """
+    updates_by_doc = {}
+    for widget, (quantity, key, doc_ref) in list(_FOLLOWERS.items()):
+        options = vocabulary.quantities[quantity][key]
+        if widget.options is options:
+            continue
+        doc = doc_ref() if doc_ref else None
+        if doc_ref and doc is None:
+            continue  # session has ended
+        updates_by_doc.setdefault(doc, []).append((widget, options))
+
+    for doc, updates in updates_by_doc.items():
+        if doc is None:
+            _update_options(updates)
+        else:
+            # the only thread-safe method of bokeh documents
+            doc.add_next_tick_callback(functools.partial(_update_options, updates))
+
+
+config.VOCABULARY.subscribe(_on_vocabulary_change)
+
+
+def get_select_input(quantity, **kwargs):
+    """Return select input for names of a quantity (preceded by a 'Select' prompt).
+
+    :param quantity: quantity to select, e.g. 'isotherm_type'
+    :param kwargs: passed on to panel.widgets.Select
+    """
+    widget = pw.Select(options=config.QUANTITIES[quantity]['select_options'], **kwargs)
+    follow_vocabulary(widget, quantity, 'select_options')
+    return widget
+
+
+def get_autocomplete_input(quantity, mode=None, max_options=None, **kwargs):
+    """Return autocomplete input for names of a quantity.
+
+    :param quantity: quantity to complete, e.g. 'adsorbents'
+    :param mode: 'server' or 'client' (defaults to config.AUTOCOMPLETE_MODE)
+    :param max_options: maximum number of completions sent in server mode (defaults to config.AUTOCOMPLETE_MAX_OPTIONS)
+    :param kwargs: passed on to panel.widgets.AutocompleteInput
+    """
+    mode = mode or config.AUTOCOMPLETE_MODE
+    max_options = max_options or config.AUTOCOMPLETE_MAX_OPTIONS
+    names = config.QUANTITIES[quantity]['names']
+    kwargs = dict(get_restrict_kwargs(), case_sensitive=False, **kwargs)
+
+    if mode == 'client' or len(names) <= max_options:
+        widget = pw.AutocompleteInput(options=names, **kwargs)
+        follow_vocabulary(widget, quantity, 'names')
+        return widget
+    if mode != 'server':
+        raise ValueError(f'Unknown autocomplete mode {mode}')
+
+    widget = pw.AutocompleteInput(options=[], **kwargs)
+
+    def on_change_value_input(event):
+        """Send completions for typed prefix."""
+        prefix = event.new or ''
+        if len(prefix) < widget.min_characters:
+            options = []
+        else:
+            options = config.complete_name(prefix, quantity, max_options)
+        if widget.value and widget.value not in options:
+            # avoid resetting the current value (see panel.widgets.AutocompleteInput._process_param_change)
+            options.append(widget.value)
+        widget.options = options
+
+    widget.param.watch(on_change_value_input, 'value_input')
+    widget.jscallback(options=REFRESH_MENU_JS)
+    return widget
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Size-bounded least-recently-used cache."""
+import collections
+import sys
+import threading
+
+
+def get_size(value):
+    """Return approximate size of value in bytes.
+
+    Uses the `nbytes` attribute if present (numpy arrays, IsothermColumns), else sys.getsizeof.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    return sys.getsizeof(value)
+
+
+class LRUCache:  # pylint: disable=too-many-instance-attributes
+    """Least-recently-used cache bounded by the total size of its values.
+
+    Hits and misses are counted separately for each stage (an arbitrary label passed to :meth:`get`).
+
+    :param max_size: maximum total size of the cached values (in units of sizeof)
+    :param sizeof: function returning the size of a value (defaults to get_size)
+    :param on_evict: function called with key and value of evicted values (with the lock held: it must not use the
+        cache)
+    """
+    def __init__(self, max_size, sizeof=get_size, on_evict=None):
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.size = 0
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self._entries = collections.OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, stage=None):
+        """Return cached value for key, computing (and storing) it on a miss.
+
+        Exceptions raised by compute are propagated and nothing is stored.
+
+        :param key: hashable key
+        :param compute: function without arguments returning the value
+        :param stage: label for hit rate statistics
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits[stage] += 1
+                return entry[0]
+            self.misses[stage] += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store value, evicting least recently used values as needed.
+
+        Values larger than max_size are not stored (but passed to on_evict).
+        """
+        size = self.sizeof(value)
+        if size > self.max_size:
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                if self.on_evict is not None:
+                    self.on_evict(evicted_key, evicted_value)
+
+    def clear(self):
+        """Remove all values (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def hit_rate(self, stage=None):
+        """Return fraction of lookups of stage that were hits (None if there were no lookups)."""
+        total = self.hits[stage] + self.misses[stage]
+        return self.hits[stage] / total if total else None
+
+    def report(self):
+        """Return one-line summary of hit rates and size."""
+        stages = sorted(set(self.hits) | set(self.misses), key=str)
+        rates = ', '.join(f'{stage}: {self.hits[stage]}/{self.hits[stage] + self.misses[stage]} hits '
+                          f'({self.hit_rate(stage):.0%})' for stage in stages)
+        return f'{rates}; {len(self)} entries, {self.size / 1e6:.1f} of {self.max_size / 1e6:.0f} MB'
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
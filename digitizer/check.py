@@ -1,64 +1,423 @@
 # -*- coding: utf-8 -*-
 """Isotherm plotting."""
 from io import StringIO
+import functools
 from traitlets import HasTraits, observe, Instance
 import bokeh.models as bmd
+from bokeh import events
+from bokeh.core.properties import value
+from bokeh.layouts import column as bokeh_column
+from bokeh.palettes import Category10_10
 from bokeh.plotting import figure
 import panel as pn
 
 from .submission import Submissions, Isotherm
 from .footer import footer
+from .downsample import select_points
+from .thumbnail import PREVIEW_WIDTH
 
 TOOLS = ['pan', 'wheel_zoom', 'box_zoom', 'reset', 'save']
 
+PRESSURE_SCALES = ['linear', 'log']
+COLOR = '#1f77b4'
+PATCH_FRACTION = 0.25  # patch sources if at most this fraction of values changed, else replace them
+MAX_PLOT_POINTS = 2000  # points per species and level of detail; larger isotherms are downsampled
+OVERLAY_MAX_POINTS = 500  # points per species and isotherm in the overlay of the submission stack
+ALL_ISOTHERMS = 'All isotherms'
 
-def get_bokeh_plot(isotherm_dict, pressure_scale='linear'):
-    """Plot isotherm using bokeh.
 
-    :returns: bokeh Figure instance
+def update_source(source, data):
+    """Update ColumnDataSource, sending only what changed to the browser.
+
+    Appended rows are streamed, a few changed values are patched; otherwise, the data is replaced.
+
+    :param source: ColumnDataSource instance
+    :param data: dict mapping column names to 1d numpy arrays of equal length
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    # copies: patching modifies the arrays of the source in place
+    data = {key: np.array(column, dtype=float) for key, column in data.items()}
+    old = source.data
+    length = len(next(iter(data.values())))
+    old_length = len(next(iter(old.values()), []))
+    if set(old) != set(data) or not 0 < old_length <= length:
+        source.data = data
+        return
+
+    changed = np.zeros(old_length, dtype=bool)
+    for key, column in data.items():
+        old_column = np.asarray(old[key])
+        changed |= ~((old_column == column[:old_length]) | (np.isnan(old_column) & np.isnan(column[:old_length])))
+    indices = np.flatnonzero(changed)
+
+    if len(indices) > PATCH_FRACTION * old_length:
+        source.data = data
+        return
+    if len(indices):
+        source.patch({key: list(zip(indices.tolist(), column[indices].tolist())) for key, column in data.items()})
+    if length > old_length:
+        source.stream({key: column[old_length:] for key, column in data.items()})
+
+
+def get_data_range(values, log=False, padding=0.1):
+    """Return (start, end) of an axis range showing all values, padded like bokeh's DataRange1d.
+
+    :param values: array of values; NaN (and, on a log axis, non-positive values) are ignored
+    :param log: whether the axis is logarithmic
+    :param padding: fraction of the span of the values added in total (half on each side)
+    :returns: (start, end), or (None, None) if there are no values
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values) & (values > 0)] if log else values[np.isfinite(values)]
+    if values.size == 0:
+        return None, None
+    low, high = (np.log10(values.min()), np.log10(values.max())) if log else (values.min(), values.max())
+    half_span = (high - low) * (1 + padding) / 2 if high > low else 1.0  # 1.0: half of DataRange1d.default_span
+    start, end = (low + high) / 2 - half_span, (low + high) / 2 + half_span
+    return (float(10**start), float(10**end)) if log else (float(start), float(end))
+
+
+class IsothermPlot:  # pylint: disable=too-many-instance-attributes
+    """Bokeh plot of an isotherm, created once and updated in place.
+
+    The figures for linear and logarithmic pressure scale share the data sources (one per species); changing the
+    scale only toggles their visibility.
+
+    Species with more than max_points points are downsampled; zooming or panning selects more points in the visible
+    range.
+
+    :param max_points: maximum number of points per species and level of detail
+    """
+    def __init__(self, max_points=MAX_PLOT_POINTS):
+        self.max_points = max_points
+        self.columns = None
+        self.scale = 'linear'
+        self.viewport = None  # visible (x0, x1, y0, y1), None for the whole isotherm
+        self._identity = None  # distinguishes re-checks of the isotherm shown from other isotherms
+        self.sources = []
+        self.legend_items = {scale: [] for scale in PRESSURE_SCALES}
+        self.figures = {scale: self._get_figure(scale) for scale in PRESSURE_SCALES}
+        self.figures['log'].visible = False
+        self._add_species(1)
+        self.layout = bokeh_column(*self.figures.values())
+
+    def _get_figure(self, pressure_scale):
+        """Create empty figure."""
+        p = figure(tools=TOOLS, x_axis_type=pressure_scale)  # pylint: disable=invalid-name
+        p.tools.pop()
+        p.tools.append(bmd.HoverTool())
+        p.add_layout(bmd.Legend())
+        p.on_event(events.RangesUpdate, self.on_ranges_update)
+        p.on_event(events.Reset, self.on_reset)
+        return p
+
+    def _add_species(self, count):
+        """Add data sources and glyphs for more species.
+
+        Renderers and legend items are assigned at once: each assignment sends all of them to the browser.
+        """
+        sources = [bmd.ColumnDataSource(data=dict(pressure=[], adsorption=[])) for _ in range(count)]
+        self.sources += sources
+        for scale, p in self.figures.items():  # pylint: disable=invalid-name
+            renderers = []
+            for source in sources:
+                line = bmd.GlyphRenderer(data_source=source,
+                                         glyph=bmd.Line(x='pressure', y='adsorption', line_color=COLOR))
+                circle = bmd.GlyphRenderer(data_source=source,
+                                           glyph=bmd.Circle(x='pressure',
+                                                            y='adsorption',
+                                                            fill_color=COLOR,
+                                                            line_color=COLOR))
+                renderers += [line, circle]
+                self.legend_items[scale].append(bmd.LegendItem(renderers=[line, circle]))
+            p.renderers = p.renderers + renderers
+            p.legend.items = list(self.legend_items[scale])
+
+    def update(self, isotherm):  # pylint: disable=too-many-locals
+        """Show isotherm.
+
+        The zoom is kept when the isotherm shown is checked again (same source, adsorbent, temperature and species),
+        and reset for other isotherms.
+
+        :param isotherm: Isotherm instance
+        """
+        metadata = isotherm.metadata
+        columns = self.columns = isotherm.columns
+        title = f'{metadata["articleSource"]}, {metadata["adsorbent"]["name"]}, {metadata["temperature"]} K'
+        identity = (metadata.get('DOI'), title, columns.inchikeys)
+        if identity != self._identity:
+            self._identity = identity
+            self.viewport = None
+            self._reset_ranges()
+        if len(self.sources) < len(columns.inchikeys):
+            # adding glyphs resends all sources to the browser: empty them first, rather than sending old data
+            for source in self.sources:
+                source.data = dict(pressure=[], adsorption=[])
+            self._add_species(len(columns.inchikeys) - len(self.sources))
+
+        self._update_sources()
+        names = {adsorbate['InChIKey']: adsorbate['name'] for adsorbate in metadata['adsorbates']}
+        for i in range(len(self.sources)):
+            visible = i < len(columns.inchikeys)
+            for items in self.legend_items.values():
+                item = items[i]
+                if visible:
+                    item.label = value(names.get(columns.inchikeys[i], columns.inchikeys[i]))
+                item.visible = visible
+                for renderer in item.renderers:
+                    renderer.visible = visible
+
+        x_label = 'Pressure [{}]'.format(metadata['pressureUnits'])
+        y_label = 'Adsorption [{}]'.format(metadata['adsorptionUnits'])
+        for p in self.figures.values():  # pylint: disable=invalid-name
+            p.title.text = title
+            p.xaxis.axis_label = x_label
+            p.yaxis.axis_label = y_label
+            p.select_one(bmd.HoverTool).tooltips = [(x_label, '@pressure'), (y_label, '@adsorption')]
+
+    def _reset_ranges(self):
+        """Set the ranges of both figures to show the whole isotherm.
+
+        Once zoomed in the browser, the ranges no longer follow the data; they are set to the data bounds instead.
+        Ranges that were never shown (start None) keep following the data.
+        """
+        y_range = get_data_range(self.columns.adsorption)
+        for scale, p in self.figures.items():  # pylint: disable=invalid-name
+            x_range = get_data_range(self.columns.pressure, log=scale == 'log')
+            for fig_range, (start, end) in [(p.x_range, x_range), (p.y_range, y_range)]:
+                if fig_range.start is not None:
+                    fig_range.update(start=start, end=end)
+
+    def set_scale(self, pressure_scale):
+        """Show figure with given pressure scale.
+
+        :param pressure_scale: 'linear' or 'log'
+        """
+        self.scale = pressure_scale
+        for scale, p in self.figures.items():  # pylint: disable=invalid-name
+            p.visible = scale == pressure_scale
+        self._update_sources()
+
+    def _update_sources(self):
+        """Send the points of the current isotherm to be displayed at the current scale and viewport."""
+        if self.columns is None:
+            return
+        pressure, adsorption = self.columns.pressure, self.columns.adsorption
+        for i, source in enumerate(self.sources):
+            if i < adsorption.shape[1]:
+                indices = select_points(pressure, adsorption[:, i], self.max_points, self.viewport, self.scale)
+                update_source(source, dict(pressure=pressure[indices], adsorption=adsorption[indices, i]))
+            elif len(source.data['pressure']):
+                source.data = dict(pressure=[], adsorption=[])
+
+    def on_ranges_update(self, event):
+        """Refine downsampled isotherms after zooming or panning."""
+        viewport = (event.x0, event.x1, event.y0, event.y1)
+        self.viewport = None if None in viewport else viewport
+        if self.columns is not None and len(self.columns) > self.max_points:
+            self._update_sources()
+
+    def on_reset(self, event):  # pylint: disable=unused-argument
+        """Show whole isotherm at the overview level of detail."""
+        self.viewport = None
+        if self.columns is not None and len(self.columns) > self.max_points:
+            self._update_sources()
+
+
+class SubmissionsOverlay:  # pylint: disable=too-many-instance-attributes
+    """Plot of all isotherms in the submission stack.
+
+    All curves are drawn by one multi_line glyph (one row per isotherm and species) and all points by one scatter glyph
+    (one row per point), colored by isotherm key. Appended isotherms are streamed to the sources; removed or hidden
+    isotherms have their rows emptied by a patch. Rows of removed isotherms are dropped once they make up half of the
+    rows.
+
+    :param submissions: Submissions instance to observe
     """
-    title = f'{isotherm_dict["articleSource"]}, {isotherm_dict["adsorbent"]["name"]}, {isotherm_dict["temperature"]} K'
-    p = figure(tools=TOOLS, x_axis_type=pressure_scale, title=title)  # pylint: disable=invalid-name
+    def __init__(self, submissions):
+        self.submissions = submissions
+        self.lines = bmd.ColumnDataSource(data=dict(xs=[], ys=[], key=[], name=[], adsorbate=[]))
+        self.points = bmd.ColumnDataSource(data=self._get_points_data([], [], []))
+        self.colors = bmd.CategoricalColorMapper(factors=[], palette=[])
+        self.entries = {}  # key -> dict(isotherm, lines=range of rows, points=range of rows, data=(lines, points))
+        self.hidden = set()
+        self._n_removed = 0  # emptied rows of removed isotherms
+        self._n_appended = 0
+
+        self.figure = figure(tools=TOOLS, title='Submission stack')
+        self.figure.tools.pop()
+        self.figure.xaxis.axis_label = 'Pressure'
+        self.figure.yaxis.axis_label = 'Adsorption'
+        self.line_view = bmd.CDSView(source=self.lines)
+        self.point_view = bmd.CDSView(source=self.points)
+        color = dict(field='key', transform=self.colors)
+        line_renderer = self.figure.multi_line('xs', 'ys', source=self.lines, view=self.line_view, line_color=color)
+        self.figure.scatter('x', 'y', source=self.points, view=self.point_view, color=color)
+        self.figure.add_tools(
+            bmd.HoverTool(renderers=[line_renderer],
+                          tooltips=[('Isotherm', '@name'), ('Adsorbate', '@adsorbate'), ('Pressure', '$x'),
+                                    ('Adsorption', '$y')]))
+
+        self.inp_filter = pn.widgets.Select(name='Show', options={ALL_ISOTHERMS: ''})
+        self.inp_filter.param.watch(self.on_change_filter, 'value')
+        self.inp_visible = pn.widgets.CheckBoxGroup(options={}, inline=False)
+        self.inp_visible.param.watch(self.on_change_visible, 'value')
+
+        submissions.observe(self._observe_append, names=['data'], type='append')
+        submissions.observe(self._observe_remove, names=['data'], type='remove')
+        for isotherm in reversed(submissions.data):
+            self.append(isotherm)
+
+    @staticmethod
+    def _get_points_data(x, y, key):  # pylint: disable=invalid-name
+        """Return data of the points source."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        return dict(x=np.asarray(x, dtype=float), y=np.asarray(y, dtype=float), key=list(key))
+
+    @staticmethod
+    def _get_data(isotherm, key):
+        """Return (lines data, points data) of an isotherm."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
 
-    pressures = [point['pressure'] for point in isotherm_dict['isotherm_data']]
+        columns = isotherm.columns
+        names = {adsorbate['InChIKey']: adsorbate['name'] for adsorbate in isotherm.metadata['adsorbates']}
+        lines = dict(xs=[], ys=[], key=[], name=[], adsorbate=[])
+        for i, inchikey in enumerate(columns.inchikeys):
+            indices = select_points(columns.pressure, columns.adsorption[:, i], OVERLAY_MAX_POINTS)
+            lines['xs'].append(columns.pressure[indices])
+            lines['ys'].append(columns.adsorption[indices, i])
+            lines['key'].append(key)
+            lines['name'].append(isotherm.name)
+            lines['adsorbate'].append(names.get(inchikey, inchikey))
 
-    for i in range(len(isotherm_dict['adsorbates'])):
-        adsorbate = isotherm_dict['adsorbates'][i]
-        adsorption = [point['species_data'][i]['adsorption'] for point in isotherm_dict['isotherm_data']]
+        n_points = sum(len(xs) for xs in lines['xs'])
+        x = np.concatenate(lines['xs']) if lines['xs'] else []  # pylint: disable=invalid-name
+        y = np.concatenate(lines['ys']) if lines['ys'] else []  # pylint: disable=invalid-name
+        return lines, SubmissionsOverlay._get_points_data(x, y, [key] * n_points)
 
-        data = bmd.ColumnDataSource(data=dict(index=range(len(pressures)), pressure=pressures, adsorption=adsorption))
+    def append(self, isotherm):
+        """Add isotherm to the plot (streamed to the browser)."""
+        key = str(self._n_appended)
+        self.colors.factors = self.colors.factors + [key]
+        self.colors.palette = self.colors.palette + [Category10_10[self._n_appended % len(Category10_10)]]
+        self._n_appended += 1
+        lines, points = self._get_data(isotherm, key)
+        n_lines, n_points = len(self.lines.data['xs']), len(self.points.data['x'])
+        self.entries[key] = dict(isotherm=isotherm,
+                                 lines=range(n_lines, n_lines + len(lines['xs'])),
+                                 points=range(n_points, n_points + len(points['x'])),
+                                 data=(lines, points))
+        if lines['xs']:
+            self.lines.stream(lines)
+        if len(points['x']):
+            self.points.stream(points)
+        self._update_widgets()
 
-        p.line(  # pylint: disable=too-many-function-args
-            'pressure',
-            'adsorption',
-            source=data,
-            legend_label=adsorbate['name'])
-        p.circle(  # pylint: disable=too-many-function-args
-            'pressure',
-            'adsorption',
-            source=data,
-            legend_label=adsorbate['name'])
+    def remove(self, isotherm):
+        """Remove isotherm from the plot."""
+        key = next(key for key, entry in self.entries.items() if entry['isotherm'] is isotherm)
+        entry = self.entries.pop(key)
+        self.hidden.discard(key)
+        self._n_removed += len(entry['lines'])
+        if self._n_removed > len(self.lines.data['xs']) / 2:
+            self._rebuild()
+        else:
+            self._set_empty(entry)
+        self._update_widgets()
+
+    def _rebuild(self):
+        """Replace data of the sources, dropping rows of removed isotherms."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        lines = {column: [] for column in self.lines.data}
+        points = {column: [] for column in self.points.data}
+        n_lines = n_points = 0
+        for entry in self.entries.values():
+            entry_lines, entry_points = entry['data']
+            entry['lines'] = range(n_lines, n_lines + len(entry_lines['xs']))
+            entry['points'] = range(n_points, n_points + len(entry_points['x']))
+            n_lines, n_points = entry['lines'].stop, entry['points'].stop
+            for column, values in entry_lines.items():
+                lines[column] += values
+            for column, values in entry_points.items():
+                points[column].append(values)
+        self.lines.data = lines
+        self.points.data = self._get_points_data(
+            *[np.concatenate(points[column]) if points[column] else [] for column in ['x', 'y', 'key']])
+        self._n_removed = 0
+        for key in self.hidden:
+            self._set_empty(self.entries[key])
+
+    def _set_empty(self, entry):
+        """Empty rows of an isotherm."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
 
-    # update labels
-    p.xaxis.axis_label = 'Pressure [{}]'.format(isotherm_dict['pressureUnits'])
-    p.yaxis.axis_label = 'Adsorption [{}]'.format(isotherm_dict['adsorptionUnits'])
+        rows = entry['lines']
+        if rows:
+            self.lines.patch({column: [(row, np.array([])) for row in rows] for column in ['xs', 'ys']})
+        rows = entry['points']
+        if rows:
+            self.points.patch(
+                {column: [(slice(rows.start, rows.stop), np.full(len(rows), np.nan))]
+                 for column in ['x', 'y']})
 
-    tooltips = [(p.xaxis.axis_label, '@pressure'), (p.yaxis.axis_label, '@adsorption')]
-    hover = bmd.HoverTool(tooltips=tooltips)
-    p.tools.pop()
-    p.tools.append(hover)
+    def _set_rows(self, entry):
+        """Restore rows of a hidden isotherm."""
+        lines, points = entry['data']
+        if entry['lines']:
+            self.lines.patch({column: list(zip(entry['lines'], lines[column])) for column in ['xs', 'ys']})
+        rows = entry['points']
+        if rows:
+            self.points.patch({column: [(slice(rows.start, rows.stop), points[column])] for column in ['x', 'y']})
 
-    return p
+    def _update_widgets(self):
+        """Update options of the filter and toggle widgets."""
+        options = {}
+        for key, entry in self.entries.items():
+            label = entry['isotherm'].name
+            while label in options:
+                label += ' *'
+            options[label] = key
+        self.inp_visible.options = options
+        self.inp_visible.value = [key for key in options.values() if key not in self.hidden]
+        self.inp_filter.options = dict({ALL_ISOTHERMS: ''}, **options)
+        if self.inp_filter.value not in self.entries:
+            self.inp_filter.value = ''
 
+    def _observe_append(self, change):
+        self.append(change['new'])
 
-def _get_figure_pane(figure_image):
-    """Get Figure pane for display."""
-    if figure_image:
-        return figure_image.pane
-    return pn.pane.HTML('')
+    def _observe_remove(self, change):
+        self.remove(change['new'])
 
+    def on_change_filter(self, event):
+        """Show only the selected isotherm (or all isotherms)."""
+        key = event.new
+        filters = [bmd.GroupFilter(column_name='key', group=key)] if key else []
+        self.line_view.filters = filters
+        self.point_view.filters = list(filters)
 
-class IsothermCheckView(HasTraits):
+    def on_change_visible(self, event):
+        """Hide or show isotherms."""
+        visible = set(event.new)
+        for key, entry in self.entries.items():
+            if key in visible and key in self.hidden:
+                self.hidden.remove(key)
+                self._set_rows(entry)
+            elif key not in visible and key not in self.hidden:
+                self.hidden.add(key)
+                self._set_empty(entry)
+
+    @property
+    def layout(self):
+        """Return layout."""
+        return pn.Row(pn.pane.Bokeh(self.figure), pn.Column(self.inp_filter, self.inp_visible))
+
+
+class IsothermCheckView(HasTraits):  # pylint: disable=too-many-instance-attributes
     """Consistency checks for digitized isotherms.
     """
     isotherm = Instance(Isotherm)
@@ -71,10 +430,12 @@ class IsothermCheckView(HasTraits):
         """
         super().__init__()
 
+        self.plot = IsothermPlot()
+        self.figure_pane = pn.pane.PNG(None, width=PREVIEW_WIDTH)
+        self._figure_digest = None  # digest of the figure shown (or being rendered) in figure_pane
+        self.row = pn.Row(pn.pane.Bokeh(self.plot.layout), self.figure_pane)
         if isotherm:
             self.isotherm = isotherm
-        else:
-            self.row = pn.Row(figure(tools=TOOLS), _get_figure_pane(None))
 
         self.btn_download = pn.widgets.FileDownload(filename='data.json',
                                                     button_type='primary',
@@ -104,12 +465,35 @@ class IsothermCheckView(HasTraits):
 
         self.submissions = Submissions()
         self.submissions.observe(on_load_update, names=['loaded_isotherm'])
+        self.overlay = SubmissionsOverlay(self.submissions)
 
     @observe('isotherm')
     def _observe_isotherm(self, change):
         isotherm = change['new']
-        self.row[0] = get_bokeh_plot(isotherm.json)
-        self.row[1] = _get_figure_pane(isotherm.figure_image)
+        self.plot.update(isotherm)
+        self.show_figure(isotherm.figure_image)
+
+    def show_figure(self, figure_image):
+        """Show downscaled preview of figure image (rendered in the background).
+
+        :param figure_image: FigureImage instance or None
+        """
+        digest = figure_image.digest if figure_image else None
+        if digest == self._figure_digest:
+            return  # figure shown already
+        self._figure_digest = digest
+        if digest is None:
+            self.figure_pane.object = None
+            return
+        future = figure_image.request_thumbnail()
+        if not future.done():
+            self.figure_pane.object = None  # do not show the previous figure in the meantime
+        future.add_done_callback(functools.partial(self._on_thumbnail, digest))
+
+    def _on_thumbnail(self, digest, future):
+        """Show rendered preview, unless another figure was checked in the meantime."""
+        if digest == self._figure_digest and future.exception() is None:
+            self.figure_pane.object = future.result()
 
     def on_click_download(self):
         """Download JSON file."""
@@ -121,10 +505,10 @@ class IsothermCheckView(HasTraits):
 
     def on_click_set_scale(self, event):  # pylint: disable=unused-argument
         """Set pressure scale."""
-        self.row[0] = get_bokeh_plot(self.isotherm.json, pressure_scale=self.inp_pressure_scale.value)
+        self.plot.set_scale(self.inp_pressure_scale.value)
 
     @property
     def layout(self):
         """Return layout."""
         return pn.Column(self.row, self.inp_pressure_scale, pn.Row(self.btn_download, self.btn_add),
-                         self.submissions.layout, footer)
+                         self.submissions.layout, self.overlay.layout, footer)
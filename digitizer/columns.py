@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Columnar representation of isotherm data.
+
+The nested 'isotherm_data' list of the ISDB JSON format::
+
+    [{'pressure': p, 'species_data': [{'InChIKey': k, 'composition': c, 'adsorption': a}, ...],
+      'total_adsorption': t}, ...]
+
+is stored as one pressure array plus composition and adsorption arrays of shape (points, species).
+The nested form is produced only on export (IsothermColumns.to_json).
+"""
+import gc
+import math
+
+import numpy as np
+
+HASH_BLOCK_SIZE = 65536  # elements of non-contiguous arrays copied at a time when hashing
+
+
+def _readonly(array):
+    """Return float array that cannot be modified in place (columns are shared between views).
+
+    Read-only float arrays (and views of them) are used as they are; other arrays are copied.
+    """
+    if isinstance(array, np.ndarray) and array.dtype == float and not array.flags.writeable:
+        return array
+    array = np.array(array, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+class IsothermColumns:
+    """Isotherm data as arrays.
+
+    :param pressure: pressures, shape (points,)
+    :param inchikeys: InChIKeys of the species, in column order
+    :param composition: compositions, shape (points, species)
+    :param adsorption: adsorptions, shape (points, species)
+    :param total_adsorption: total adsorptions, shape (points,) or None.
+        NaN entries (and NaN species data) are omitted from the JSON.
+
+    The arrays are stored read-only. Read-only float arrays are used without copying, e.g. views of a parsed table.
+    """
+    __slots__ = ('pressure', 'inchikeys', 'composition', 'adsorption', 'total_adsorption')
+
+    def __init__(self, pressure, inchikeys, composition, adsorption, total_adsorption=None):  # pylint: disable=R0913
+        self.pressure = _readonly(pressure)
+        self.inchikeys = tuple(inchikeys)
+        shape = (len(self.pressure), len(self.inchikeys))
+        self.composition = _readonly(composition).reshape(shape)
+        self.adsorption = _readonly(adsorption).reshape(shape)
+        self.total_adsorption = None if total_adsorption is None else _readonly(total_adsorption).reshape(shape[:1])
+
+    @classmethod
+    def from_table(cls, table, inchikeys, form_type='single-component'):
+        """Create columns from table of the isotherm data field.
+
+        :param table: float array with columns as described in parse.get_n_columns
+        :param inchikeys: InChIKeys of the adsorbates
+        :param form_type: 'single-component' or 'multi-component'
+        """
+        if form_type == 'single-component':
+            adsorption = table[:, 1]
+            return cls(table[:, 0], inchikeys[:1], np.ones_like(adsorption), adsorption, adsorption)
+
+        n_species = len(inchikeys)
+        total_adsorption = table[:, -1] if table.shape[1] == 2 + 2 * n_species else None
+        return cls(table[:, 0], inchikeys, table[:, 1:1 + 2 * n_species:2], table[:, 2:2 + 2 * n_species:2],
+                   total_adsorption)
+
+    def to_table(self, form_type='single-component'):
+        """Return table of the isotherm data field (inverse of IsothermColumns.from_table).
+
+        :param form_type: 'single-component' (pressure, adsorption of the first species) or 'multi-component'
+            (pressure, composition and adsorption of every species, total adsorption if present)
+        :returns: float array of shape (points, columns)
+        """
+        if form_type == 'single-component':
+            return np.column_stack([self.pressure, self.adsorption[:, 0]])
+
+        n_species = len(self.inchikeys)
+        has_total = self.total_adsorption is not None
+        table = np.empty((len(self), 1 + 2 * n_species + has_total))
+        table[:, 0] = self.pressure
+        table[:, 1:1 + 2 * n_species:2] = self.composition
+        table[:, 2:2 + 2 * n_species:2] = self.adsorption
+        if has_total:
+            table[:, -1] = self.total_adsorption
+        return table
+
+    @classmethod
+    def from_json(cls, isotherm_data):
+        """Create columns from 'isotherm_data' list of ISDB JSON.
+
+        Species are ordered by first appearance; species (or fields of species) missing from a measurement are
+        stored as NaN.
+
+        :param isotherm_data: list of measurement dictionaries
+        :raises ValueError: if a value is not numeric
+        """
+        inchikeys = {}
+        for measurement in isotherm_data:
+            for species in measurement['species_data']:
+                inchikeys.setdefault(species['InChIKey'], len(inchikeys))
+
+        shape = (len(isotherm_data), len(inchikeys))
+        composition = np.full(shape, np.nan)
+        adsorption = np.full(shape, np.nan)
+        total_adsorption = np.full(shape[:1], np.nan)
+        pressure = np.empty(shape[:1])
+        for i, measurement in enumerate(isotherm_data):
+            try:
+                for species in measurement['species_data']:
+                    j = inchikeys[species['InChIKey']]
+                    composition[i, j] = species.get('composition', np.nan)
+                    adsorption[i, j] = species.get('adsorption', np.nan)
+                total_adsorption[i] = measurement.get('total_adsorption', np.nan)
+                pressure[i] = measurement['pressure']
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f'Measurement {i + 1} of the isotherm data is not numeric: {exc}') from exc
+
+        has_total = not np.isnan(total_adsorption).all()
+        return cls(pressure, inchikeys, composition, adsorption, total_adsorption if has_total else None)
+
+    def to_json(self):
+        """Return 'isotherm_data' list of ISDB JSON."""
+        # the nested dictionaries contain no reference cycles; pausing the cyclic garbage collector avoids repeated
+        # collections while millions of containers are allocated
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._to_json()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _to_json(self):
+        """Build measurement dictionaries."""
+        inchikeys = self.inchikeys
+        total_adsorption = self.total_adsorption
+        if total_adsorption is None:
+            total_adsorption = np.full(self.pressure.shape, np.nan)
+        rows = zip(self.pressure.tolist(), self.composition.tolist(), self.adsorption.tolist(),
+                   total_adsorption.tolist())
+
+        def species_data(composition, adsorption):
+            # species that are missing from a measurement (both values NaN) are skipped, single NaN fields are
+            # removed below
+            return [{
+                'InChIKey': inchikey,
+                'composition': c,
+                'adsorption': a
+            } for inchikey, c, a in zip(inchikeys, composition, adsorption) if not (math.isnan(c) and math.isnan(a))]
+
+        measurements = [{
+            'pressure': pressure,
+            'species_data': species_data(composition, adsorption),
+            'total_adsorption': total
+        } for pressure, composition, adsorption, total in rows]
+
+        if np.isnan(self.composition).any() or np.isnan(self.adsorption).any():
+            for measurement in measurements:
+                for species in measurement['species_data']:
+                    for field in ('composition', 'adsorption'):
+                        if math.isnan(species[field]):
+                            del species[field]
+
+        if self.total_adsorption is None or np.isnan(self.total_adsorption).any():
+            for measurement in measurements:
+                if math.isnan(measurement['total_adsorption']):
+                    del measurement['total_adsorption']
+        return measurements
+
+    def sorted(self):
+        """Return columns with species sorted by InChIKey."""
+        order = np.argsort(self.inchikeys, kind='stable')
+        return IsothermColumns(self.pressure, [self.inchikeys[i] for i in order], self.composition[:, order],
+                               self.adsorption[:, order], self.total_adsorption)
+
+    @property
+    def nbytes(self):
+        """Total size of the arrays in bytes."""
+        arrays = [self.pressure, self.composition, self.adsorption, self.total_adsorption]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def update_hash(self, hasher):
+        """Feed the isotherm data to a hashlib hash object (without copying the arrays).
+
+        :param hasher: hash object, e.g. hashlib.sha256()
+        """
+        hasher.update('\n'.join(self.inchikeys).encode('utf8') + b'\0')
+        hasher.update(np.array(self.adsorption.shape, dtype='<i8').tobytes())
+        arrays = [self.pressure, self.composition, self.adsorption]
+        if self.total_adsorption is not None:
+            arrays.append(self.total_adsorption)
+        for array in arrays:
+            if array.flags.c_contiguous:
+                hasher.update(np.ascontiguousarray(array, dtype='<f8').data)
+                continue
+            # e.g. views of a parsed table: copy blocks of rows
+            rows = HASH_BLOCK_SIZE // max(array[:1].size, 1)
+            for start in range(0, len(array), rows):
+                hasher.update(np.ascontiguousarray(array[start:start + rows], dtype='<f8').data)
+
+    def __len__(self):
+        return len(self.pressure)
+
+    def _key(self):
+        total = b'' if self.total_adsorption is None else self.total_adsorption.tobytes()
+        return (self.inchikeys, self.pressure.tobytes(), self.composition.tobytes(), self.adsorption.tobytes(), total)
+
+    def __eq__(self, other):
+        if not isinstance(other, IsothermColumns):
+            return NotImplemented
+        return self._key() == other._key()  # pylint: disable=protected-access
+
+    def __hash__(self):
+        return hash(self._key())
@@ -2,14 +2,13 @@
 """
 Configuration, including options fetched from ISDB API.
 """
+import functools
 import os
-import requests
-import requests_cache
+import tempfile
 from . import MODULE_DIR
+from .vocabulary import VocabularyLoader, LazyMapping
 
-requests_cache.install_cache('matdb_cache')
-
-BASE_URL = 'https://adsorption.nist.gov/isodb/api'
+BASE_URL = os.getenv('DIGITIZER_API_URL', 'https://adsorption.nist.gov/isodb/api')
 BIBLIO_API_URL = BASE_URL + '/biblio'
 
 QUANTITY_API_MAPPING = {
@@ -22,52 +21,113 @@ QUANTITY_API_MAPPING = {
     'concentration_units': '/concentration-unit-lookup.json',
     'composition_type': '/composition-type-lookup.json',
 }
-QUANTITIES = {}
-for quantity, url in QUANTITY_API_MAPPING.items():
-    print(f'Fetching {url}...')
-    json_data = requests.get(BASE_URL + url).json()
-
-    names = []
-    for m in json_data:
-        names.append(m['name'])
-        try:
-            names += m['synonyms']
-        except KeyError:
-            pass
-    QUANTITIES[quantity] = {
-        'json': json_data,
-        'names': names,
-    }
-
-QUANTITIES['isotherm_type']['names'].append('Not specified')
-
-BIBLIOGRAPHY = requests.get(BASE_URL + '/biblios.json').json()
-DOIs = {entry['DOI'] for entry in BIBLIOGRAPHY}
-
-
-def find_by_name(name, json):
-    """Find JSON corresponding to quantity name."""
-    for q_json in json:
-        try:
-            candidates = [q_json['name']] + q_json['synonyms']
-        except AttributeError:
-            candidates = [q_json['name']]
-        if name in candidates:
-            return q_json
-
-    raise ValueError(f'JSON for {name} not found.')
-
-
-def find_by_key(value, key, json):
-    """Find JSON corresponding to quantity key."""
-    for q_json in json:
-        try:
-            if value == q_json[key]:
-                return q_json
-        except AttributeError:
-            continue
-
-    raise ValueError(f'JSON for {value} not found.')
+# offline vocabulary snapshot (set to empty string in order to always fetch from the API)
+VOCABULARY_SNAPSHOT = os.getenv('DIGITIZER_VOCABULARY_SNAPSHOT',
+                                os.path.join(MODULE_DIR, os.pardir, 'vocabulary.json.gz'))
+# interval for refreshing vocabularies in the background [s] (set to 0 to disable)
+VOCABULARY_TTL = float(os.getenv('DIGITIZER_VOCABULARY_TTL', '3600'))
+
+# HTTP cache for requests to the ISDB API ('memory', 'sqlite' or 'filesystem')
+HTTP_CACHE_BACKEND = os.getenv('DIGITIZER_HTTP_CACHE', 'sqlite')
+HTTP_CACHE_PATH = os.getenv('DIGITIZER_HTTP_CACHE_PATH', os.path.join(MODULE_DIR, os.pardir, 'matdb_cache'))
+HTTP_CACHE_EXPIRY = 24 * 3600  # seconds
+HTTP_CACHE_URLS_EXPIRY = {
+    '*/biblios.json': 3600,
+    '*/materials.json': 6 * 3600,
+    '*/gases.json': 6 * 3600,
+    '*-lookup.json': 7 * 24 * 3600,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_api_session():
+    """Return (cached) HTTP session for the ISDB API."""
+    from .http_cache import get_session  # pylint: disable=import-outside-toplevel
+    return get_session(HTTP_CACHE_BACKEND,
+                       cache_path=HTTP_CACHE_PATH,
+                       expire_after=HTTP_CACHE_EXPIRY,
+                       urls_expire_after=HTTP_CACHE_URLS_EXPIRY)
+
+
+VOCABULARY = VocabularyLoader(BASE_URL,
+                              QUANTITY_API_MAPPING,
+                              session_factory=get_api_session,
+                              snapshot_path=VOCABULARY_SNAPSHOT,
+                              refresh_interval=VOCABULARY_TTL or None)
+
+# per-session cache of vocabulary lookups and parsed isotherm data [bytes]
+STAGE_CACHE_SIZE = int(float(os.getenv('DIGITIZER_STAGE_CACHE_MB', '64')) * 1e6)
+
+# per-session cache of compressed files of the submission zip archive [bytes]
+ZIP_CACHE_SIZE = int(float(os.getenv('DIGITIZER_ZIP_CACHE_MB', '64')) * 1e6)
+# zlib level for JSON files of the submission zip archive (figures are stored without compression)
+ZIP_COMPRESSION_LEVEL = int(os.getenv('DIGITIZER_ZIP_COMPRESSION_LEVEL', '6'))
+
+# print diagnostics, e.g. hit rates of the stage cache after each check
+DEBUG = os.getenv('DIGITIZER_DEBUG', '') not in ('', '0')
+
+# threads per process for work outside of the event loop (e.g. writing submissions)
+BACKGROUND_WORKERS = int(os.getenv('DIGITIZER_BACKGROUND_WORKERS', '4'))
+
+# content-addressed store of figure images, shared by all sessions (and processes) [bytes]
+BLOB_DIRECTORY = os.getenv('DIGITIZER_BLOB_DIRECTORY', os.path.join(tempfile.gettempdir(), 'digitizer-blobs'))
+BLOB_CACHE_SIZE = int(float(os.getenv('DIGITIZER_BLOB_CACHE_MB', '256')) * 1e6)
+# blob files that were not used for this long are deleted [s]
+BLOB_MAX_AGE = float(os.getenv('DIGITIZER_BLOB_MAX_AGE_HOURS', '24')) * 3600
+# downscaled previews of figure images, shared by all sessions of the process [bytes]
+THUMBNAIL_CACHE_SIZE = int(float(os.getenv('DIGITIZER_THUMBNAIL_CACHE_MB', '32')) * 1e6)
+
+# 'server': autocomplete inputs receive only the top matches for the typed prefix from the server
+# 'client': autocomplete inputs receive the full list of names
+AUTOCOMPLETE_MODE = os.getenv('DIGITIZER_AUTOCOMPLETE_MODE', 'server')
+AUTOCOMPLETE_MAX_OPTIONS = int(os.getenv('DIGITIZER_AUTOCOMPLETE_MAX_OPTIONS', '50'))
+
+# loaded on first access
+QUANTITIES = LazyMapping(lambda: VOCABULARY.get().quantities)
+
+
+def __getattr__(name):
+    """Resolve BIBLIOGRAPHY, DOIs and FIGURE_EXAMPLE on first access."""
+    if name == 'FIGURE_EXAMPLE':
+        with open(os.path.join(MODULE_DIR, 'static', FIGURE_FILENAME_EXAMPLE), 'rb') as handle:
+            return handle.read()
+    if name == 'BIBLIOGRAPHY':
+        return VOCABULARY.get().bibliography
+    if name == 'DOIs':
+        # normalized, see vocabulary.normalize_doi
+        return VOCABULARY.get().dois
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def complete_name(prefix, quantity, limit):
+    """Return up to `limit` names or synonyms of a quantity starting with prefix (case-insensitive).
+
+    :param prefix: prefix typed by the user
+    :param quantity: quantity to search, e.g. 'adsorbents'
+    :param limit: maximum number of completions
+    """
+    return VOCABULARY.get().prefix_indexes[quantity].complete(prefix, limit)
+
+
+def find_by_name(name, quantity):
+    """Find JSON corresponding to quantity name.
+
+    :param name: name or synonym (matched case-insensitively if there is no exact match)
+    :param quantity: quantity to search, e.g. 'adsorbents'
+    :raises ValueError: if not found
+    """
+    return VOCABULARY.get().indexes[quantity].find_by_name(name)
+
+
+def find_by_key(value, key, quantity):
+    """Find JSON corresponding to quantity key.
+
+    :param value: value of key, e.g. an InChIKey
+    :param key: key to search, e.g. 'InChIKey'
+    :param quantity: quantity to search, e.g. 'adsorbates'
+    :raises ValueError: if not found
+    """
+    return VOCABULARY.get().indexes[quantity].find_by_key(value, key)
 
 SINGLE_COMPONENT_EXAMPLE = \
 """#pressure,adsorption
@@ -93,9 +153,7 @@ MULTI_COMPONENT_EXAMPLE = \
 66.2941,1,0.300474,0.300474
 72.9855,1,0.340276,0.340276"""
 
-FIGURE_FILENAME_EXAMPLE = 'Figure_S5a.png'
-with open(os.path.join(MODULE_DIR, 'static', FIGURE_FILENAME_EXAMPLE), 'rb') as handle:
-    FIGURE_EXAMPLE = handle.read()
+FIGURE_FILENAME_EXAMPLE = 'Figure_S5a.png'  # FIGURE_EXAMPLE is read on first access
 
 SUBMISSION_FOLDER = os.getenv('DIGITIZER_SUBMISSION_FOLDER', os.path.join(MODULE_DIR, os.pardir, 'submissions'))
 STATIC_DIR = os.path.join(MODULE_DIR, 'static')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Level-of-detail downsampling of isotherms for plotting.
+
+Points are selected with the Largest-Triangle-Three-Buckets algorithm (Steinarsson 2013), which keeps the visual
+shape of a curve. Selected points are measured points, so hover tooltips show exact values.
+"""
+import numpy as np
+
+
+def lttb(x, y, n_out):  # pylint: disable=invalid-name
+    """Return indices of n_out points of the curve (x, y) selected by Largest-Triangle-Three-Buckets.
+
+    Points are bucketed by index (not by x), so curves with adsorption and desorption branches are supported.
+
+    :param x: 1d array of finite x values
+    :param y: 1d array of finite y values
+    :param n_out: number of points to select
+    :returns: sorted array of indices, including the first and the last point
+    """
+    n_in = len(x)
+    if n_out >= n_in or n_out < 3:
+        return np.arange(n_in)
+
+    # n_out - 2 buckets between the first and the last point, followed by the last point as a bucket of its own
+    edges = np.append(np.linspace(1, n_in - 1, n_out - 1).astype(int), n_in)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x, edges[:-1]) / counts
+    mean_y = np.add.reduceat(y, edges[:-1]) / counts
+
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n_in - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # twice the area of triangles (previous point, candidate, average of next bucket)
+        areas = np.abs((x[previous] - mean_x[i + 1]) * (y[start:stop] - y[previous]) -
+                       (x[previous] - x[start:stop]) * (mean_y[i + 1] - y[previous]))
+        previous = indices[i + 1] = start + int(areas.argmax())
+    return indices
+
+
+def select_points(x, y, max_points, viewport=None, x_scale='linear'):  # pylint: disable=invalid-name
+    """Return indices of the points of an isotherm to plot.
+
+    Isotherms with up to max_points points are plotted in full. Otherwise, max_points points are selected across the
+    whole isotherm (so the plot keeps its extent), plus up to max_points points within the viewport. The first and
+    last points as well as the points of minimum and maximum x and y are always kept.
+
+    :param x: 1d array of pressures
+    :param y: 1d array of adsorption values
+    :param max_points: maximum number of points per level of detail
+    :param viewport: visible (x0, x1, y0, y1) in data coordinates (optional)
+    :param x_scale: 'linear' or 'log' (points are selected as displayed)
+    :returns: sorted array of indices
+    """
+    if len(x) <= max_points:
+        return np.arange(len(x))
+
+    if x_scale == 'log':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.log10(x)  # pylint: disable=invalid-name
+    candidates = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    x, y = x[candidates], y[candidates]  # pylint: disable=invalid-name
+    if not len(candidates):
+        return candidates
+
+    selected = [lttb(x, y, max_points), [x.argmin(), x.argmax(), y.argmin(), y.argmax()]]
+    if viewport is not None:
+        x0, x1, y0, y1 = viewport  # pylint: disable=invalid-name
+        if x_scale == 'log':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x0, x1 = np.log10(x0), np.log10(x1)  # pylint: disable=invalid-name
+        inside = np.flatnonzero((x >= min(x0, x1)) & (x <= max(x0, x1)) & (y >= min(y0, y1)) & (y <= max(y0, y1)))
+        if 0 < len(inside) < len(x):
+            # include neighbours outside the viewport, so lines continue to its edges
+            inside = np.unique(np.clip(np.concatenate([inside - 1, inside, inside + 1]), 0, len(x) - 1))
+            x_inside, y_inside = x[inside], y[inside]
+            selected += [
+                inside[lttb(x_inside, y_inside, max_points)],
+                inside[[x_inside.argmin(), x_inside.argmax(), y_inside.argmin(), y_inside.argmax()]]
+            ]
+    return candidates[np.unique(np.concatenate(selected))]
@@ -5,14 +5,19 @@ from traitlets import HasTraits, Instance
 import panel as pn
 import panel.widgets as pw
 
-from . import ValidationError, config, restrict_kwargs
-from .config import QUANTITIES, BIBLIO_API_URL
+from . import ValidationError, config
+from .config import BIBLIO_API_URL
 from .adsorbates import Adsorbates
-from .parse import prepare_isotherm_dict, FigureImage
+from .cache import LRUCache
+from .autocomplete import get_autocomplete_input, get_select_input
+from .parse import prepare_isotherm_data, FigureImage
+from .vocabulary import normalize_doi
 from .load_json import load_isotherm_json, load_isotherm_dict
 from .footer import footer
 from .submission import Isotherm
 
+ISOTHERM_FILE_EXTENSIONS = '.csv,.tsv,.dat,.txt'
+
 
 class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instance-attributes
     """HTML form for uploading new isotherms."""
@@ -26,36 +31,29 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
         """
         super().__init__()
         self.tabs = tabs
+        self.stage_cache = LRUCache(config.STAGE_CACHE_SIZE)  # results of lookups and parsing, see on_click_check
 
         # isotherm metadata
         self.inp_doi = pw.TextInput(name='Article DOI', placeholder='10.1021/jacs.9b01891')
         self.inp_doi.param.watch(self.on_change_doi, 'value')
         self.inp_temperature = pw.TextInput(name='Temperature [K]', placeholder='303')
-        self.inp_adsorbent = pw.AutocompleteInput(name='Adsorbent Material',
-                                                  options=QUANTITIES['adsorbents']['names'],
-                                                  placeholder='Zeolite 5A',
-                                                  case_sensitive=False,
-                                                  **restrict_kwargs)
-        self.inp_isotherm_type = pw.Select(name='Isotherm type',
-                                           options=['Select'] + QUANTITIES['isotherm_type']['names'])
-        self.inp_measurement_type = pw.Select(name='Measurement type',
-                                              options=['Select'] + QUANTITIES['measurement_type']['names'])
+        self.inp_adsorbent = get_autocomplete_input('adsorbents', name='Adsorbent Material', placeholder='Zeolite 5A')
+        self.inp_isotherm_type = get_select_input('isotherm_type', name='Isotherm type')
+        self.inp_measurement_type = get_select_input('measurement_type', name='Measurement type')
         self.inp_pressure_scale = pw.Checkbox(name='Logarithmic pressure scale')
         self.inp_isotherm_data = pw.TextAreaInput(name='Isotherm Data',
                                                   height=200,
                                                   placeholder=config.SINGLE_COMPONENT_EXAMPLE)
+        self.inp_isotherm_file = pw.FileInput(name='Isotherm data file', accept=ISOTHERM_FILE_EXTENSIONS)
         self.inp_figure_image = pw.FileInput(name='Figure snapshot')
 
         # units metadata
-        self.inp_pressure_units = pw.Select(name='Pressure units',
-                                            options=['Select'] + QUANTITIES['pressure_units']['names'])
+        self.inp_pressure_units = get_select_input('pressure_units', name='Pressure units')
         self.inp_pressure_units.param.watch(self.on_change_pressure_units, 'value')
         self.inp_saturation_pressure = pw.TextInput(name='Saturation pressure [bar]', disabled=True)
-        self.inp_adsorption_units = pw.AutocompleteInput(name='Adsorption Units',
-                                                         options=QUANTITIES['adsorption_units']['names'],
-                                                         placeholder='mmol/g',
-                                                         case_sensitive=False,
-                                                         **restrict_kwargs)
+        self.inp_adsorption_units = get_autocomplete_input('adsorption_units',
+                                                           name='Adsorption Units',
+                                                           placeholder='mmol/g')
 
         # digitizer info
         self.inp_source_type = pw.TextInput(name='Source description', placeholder='Figure 1a')
@@ -100,6 +98,7 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
                 <b><a href='https://apps.automeris.io/wpd/' target="_blank">WebPlotDigitizer</a></b>
                 for data extraction."""),
             self.inp_isotherm_data,
+            pn.Row(pn.pane.HTML("""Or upload data file (CSV, TSV, DAT)"""), self.inp_isotherm_file),
             self.inp_tabular,
             pn.Row(self.btn_plot, self.btn_prefill, self.inp_json),
             self.out_info,
@@ -111,7 +110,8 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
 
         :param isotherm:  Isotherm instance
         """
-        load_isotherm_dict(form=self, isotherm_dict=isotherm.json)
+        load_isotherm_dict(form=self, isotherm_dict=dict(isotherm.metadata), columns=isotherm.columns)
+        self.inp_isotherm_file.value = None
 
         figure_image = isotherm.figure_image
         self.inp_figure_image.value = figure_image.data
@@ -123,6 +123,7 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
         This function observes the inp_json field.
         """
         load_isotherm_json(form=self, json_string=event.new)
+        self.inp_isotherm_file.value = None
 
     @property
     def required_inputs(self):
@@ -135,7 +136,7 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
     def on_change_doi(self, event):
         """Warn, if DOI already known."""
         doi = event.new
-        if doi in config.DOIs:
+        if doi and normalize_doi(doi) in config.DOIs:
             self.log(f'{doi} already present in database (see {BIBLIO_API_URL}/{doi}.json ).', level='warning')
 
     def on_change_pressure_units(self, event):
@@ -153,6 +154,7 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
             load_isotherm_json(form=self, json_string=json_string)
             self.inp_figure_image.value = None
             self.inp_figure_image.filename = None
+            self.inp_isotherm_file.value = None
         else:
             # Note: this could be replaced by loading a sample isotherm JSON (but makes it harder to edit defaults)
             # with open(DEFAULT_ISOTHERM_FILE) as handle:
@@ -169,14 +171,21 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
             self.inp_pressure_units.value = 'bar'
             self.inp_figure_image.value = config.FIGURE_EXAMPLE
             self.inp_figure_image.filename = config.FIGURE_FILENAME_EXAMPLE
+            self.inp_isotherm_file.value = None
 
     def on_click_check(self, event):  # pylint: disable=unused-argument
-        """Check isotherm."""
+        """Check isotherm.
+
+        Prints the hit rates of the stage cache if config.DEBUG is set.
+        """
         try:
-            data = prepare_isotherm_dict(self)
+            data, columns = prepare_isotherm_data(self, cache=self.stage_cache)
         except (ValidationError, ValueError) as exc:
             self.log(str(exc), level='error')
             raise
+        finally:
+            if config.DEBUG:
+                print(f'Stage cache: {self.stage_cache.report()}')
 
         figure_image = FigureImage(data=self.inp_figure_image.value,
                                    filename=self.inp_figure_image.filename) if self.inp_figure_image.value else None
@@ -184,7 +193,7 @@ class IsothermSingleComponentForm(HasTraits):  # pylint:disable=too-many-instanc
         self.btn_plot.button_type = 'primary'
         self.log('')
 
-        self.isotherm = Isotherm(data, figure_image)
+        self.isotherm = Isotherm(data, figure_image, columns=columns)
         self.tabs.active = 2
 
     def log(self, msg, level='info'):
@@ -218,15 +227,12 @@ class IsothermMultiComponentForm(IsothermSingleComponentForm):  # pylint:disable
         """
 
         # new fields
-        self.inp_composition_type = pw.Select(name='Composition type',
-                                              options=['Select'] + QUANTITIES['composition_type']['names'])
+        self.inp_composition_type = get_select_input('composition_type', name='Composition type')
         self.inp_composition_type.param.watch(self.on_change_composition_type, 'value')
-        self.inp_concentration_units = pw.AutocompleteInput(name='Concentration Units',
-                                                            options=QUANTITIES['concentration_units']['names'],
-                                                            placeholder='Molarity (mol/l)',
-                                                            case_sensitive=False,
-                                                            disabled=True,
-                                                            **restrict_kwargs)
+        self.inp_concentration_units = get_autocomplete_input('concentration_units',
+                                                              name='Concentration Units',
+                                                              placeholder='Molarity (mol/l)',
+                                                              disabled=True)
 
         super().__init__(tabs)
 
@@ -260,6 +266,7 @@ class IsothermMultiComponentForm(IsothermSingleComponentForm):  # pylint:disable
                 <b><a href='https://apps.automeris.io/wpd/' target="_blank">WebPlotDigitizer</a></b>
                 for data extraction."""),
             self.inp_isotherm_data,
+            pn.Row(pn.pane.HTML("""Or upload data file (CSV, TSV, DAT)"""), self.inp_isotherm_file),
             self.inp_tabular,
             pn.Row(self.btn_plot, self.btn_prefill, self.inp_json),
             self.out_info,
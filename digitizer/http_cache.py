@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""HTTP session with response cache for the ISDB API client.
+
+The cache is scoped to this session (other uses of `requests` in the process are not affected) and supports
+several backends:
+
+ * 'memory': per process
+ * 'sqlite': single file shared by all processes, in write-ahead-logging mode (readers do not block writers)
+ * 'filesystem': one file per response in a directory shared by all processes, replaced atomically
+"""
+import os
+
+import requests_cache
+from requests_cache.backends.filesystem import FileDict
+
+from .storage import write_atomic
+
+BACKENDS = ('memory', 'sqlite', 'filesystem')
+SQLITE_BUSY_TIMEOUT = 30000  # milliseconds to wait for a lock held by another process
+
+
+class AtomicFileDict(FileDict):
+    """Responses of the filesystem backend, written atomically.
+
+    FileDict writes files in place; a process reading a response while another one writes it would see a truncated
+    file (i.e. a miss) and fetch it again.
+    """
+    def __setitem__(self, key, value):
+        content = self.serialize(value)
+        if isinstance(content, str):
+            content = content.encode('utf8')
+        with self._try_io(key):
+            write_atomic(self._key2path(key), lambda handle: handle.write(content), sync=False)
+
+
+class AtomicFileCache(requests_cache.FileCache):
+    """Filesystem backend whose response files are replaced atomically (see AtomicFileDict)."""
+    def __init__(self, cache_name, decode_content=True, **kwargs):
+        super().__init__(cache_name, decode_content=decode_content, **kwargs)
+        self.responses = AtomicFileDict(cache_name, decode_content=decode_content, lock=self.lock, **kwargs)
+
+
+def get_session(backend, cache_path=None, expire_after=None, urls_expire_after=None):
+    """Return requests session with response cache.
+
+    Stale responses are served if the API cannot be reached.
+
+    :param backend: one of BACKENDS
+    :param cache_path: path of cache without file extension (ignored for the 'memory' backend)
+    :param expire_after: default expiry of cached responses in seconds (None: never expire)
+    :param urls_expire_after: dict mapping URL glob patterns to expiry in seconds, e.g. {'*/materials.json': 3600}
+    :returns: requests_cache.CachedSession instance
+    """
+    if backend == 'memory':
+        cache = requests_cache.BaseCache()
+    elif backend == 'sqlite':
+        cache = requests_cache.SQLiteCache(cache_path + '.sqlite', wal=True, busy_timeout=SQLITE_BUSY_TIMEOUT)
+    elif backend == 'filesystem':
+        os.makedirs(cache_path, exist_ok=True)
+        cache = AtomicFileCache(cache_path)
+    else:
+        raise ValueError(f'Unknown HTTP cache backend {backend}, choose from {BACKENDS}')
+
+    return requests_cache.CachedSession(
+        backend=cache,
+        expire_after=-1 if expire_after is None else expire_after,
+        urls_expire_after=urls_expire_after,
+        stale_if_error=True,
+    )
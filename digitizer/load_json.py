@@ -2,8 +2,12 @@
 """Functions to read from existing JSON files"""
 import json
 
-from .config import QUANTITIES, find_by_key
+import numpy as np
+
+from .config import find_by_key
+from .columns import IsothermColumns
 from .adsorbates import AdsorbateWithControls
+from .serialize import get_orjson
 
 CATEGORY_CONV = [('exp', 'Experiment'), ('sim', 'Simulation'), ('mod', 'Modeling'), ('ils', 'Interlaboratory Study'),
                  ('qua', 'Quantum/AB Initio/DFT')]
@@ -19,7 +23,7 @@ def lookup_species_name(species, species_type):
         raise AttributeError('Species type {} not understood'.format(species_type))
     if key_type in species.keys() and species[key_type]:
         # Look up by hash first
-        output = find_by_key(species[key_type], key_type, QUANTITIES[species_type]['json'])
+        output = find_by_key(species[key_type], key_type, species_type)
     elif 'name' in species.keys():
         # Fall back on name
         output = species
@@ -37,12 +41,20 @@ def load_isotherm_json(form, json_string):  # pylint: disable=too-many-branches,
     return load_isotherm_dict(form, json.loads(json_string))
 
 
-def load_isotherm_dict(form, isotherm_dict):  # pylint: disable=too-many-branches,too-many-statements
+def load_isotherm_dict(form, isotherm_dict, columns=None):  # pylint: disable=too-many-branches,too-many-statements
     """Populate form with data from JSON.
 
     :param isotherm_dict: isotherm dictionary
     :param form: IsothermForm instance to fill
+    :param columns: IsothermColumns instance (optional, created from isotherm_dict['isotherm_data'] if not provided)
     """
+    if columns is None:
+        try:
+            columns = IsothermColumns.from_json(isotherm_dict['isotherm_data'])
+        except ValueError as exc:
+            form.log(f'Cannot load isotherm data: {exc}', level='error')
+            return
+
     # Pre-process some fields
     try:
         isotherm_dict['isotherm_type'] = isotherm_dict['isotherm_type'].capitalize()
@@ -121,34 +133,45 @@ def load_isotherm_dict(form, isotherm_dict):  # pylint: disable=too-many-branche
             except KeyError:
                 pass
         # Convert the JSON isotherm data to columns and fill in adsorbates
-        form.inp_isotherm_data.value = read_multicomponent_columns(form, isotherm_dict)
+        form.inp_isotherm_data.value = read_multicomponent_columns(form, isotherm_dict, columns)
     else:
         # Convert the JSON isotherm data to columns and fill in adsorbate
-        form.inp_isotherm_data.value = read_singlecomponent_columns(form, isotherm_dict)
+        form.inp_isotherm_data.value = read_singlecomponent_columns(form, isotherm_dict, columns)
 
 
-def read_singlecomponent_columns(form, input_data):
-    """Convert the JSON-structured isotherm data to columns"""
-    isotherm_block = input_data['isotherm_data']
+def format_table(table, header=''):
+    """Return text of the isotherm data field for a table of floats.
+
+    Values are written as the shortest text that parses to the same float: by orjson if installed (e.g. 1e-5), else as
+    by str (e.g. 1e-05) with a single str.format call for the whole table. Tables with NaN or inf always use str.
+
+    :param table: float array of shape (rows, columns)
+    :param header: first line(s) of the text, including the newline
+    """
+    if not len(table):  # pylint: disable=use-implicit-booleaness-not-len
+        return header
+    orjson = get_orjson()
+    if orjson is not None and np.isfinite(table).all():
+        # [[1.0,2.0],[3.0,4.0]] -> 1.0,2.0\n3.0,4.0
+        option = orjson.OPT_SERIALIZE_NUMPY  # pylint: disable=no-member
+        rows = orjson.dumps(np.ascontiguousarray(table, dtype=float), option=option)  # pylint: disable=no-member
+        return header + rows[2:-2].replace(b'],[', b'\n').decode('ascii') + '\n'
+    row_format = ','.join(['{}'] * table.shape[1])
+    return header + ('\n'.join([row_format] * len(table)) + '\n').format(*table.ravel().tolist())
+
+
+def read_singlecomponent_columns(form, input_data, columns):
+    """Convert the isotherm data to columns"""
     # Fill in adsorbate by InChIKey
     form.inp_adsorbates.data[0].inp_name.value = lookup_species_name(input_data['adsorbates'][0], 'adsorbates')
-    # Extract data from each measurement
-    lines = '#pressure,adsorption\n'
-    for measurement in isotherm_block:
-        line = str(measurement['pressure']) + ','
-        line += str(measurement['species_data'][0]['adsorption'])
-        lines += line + '\n'
-    return lines
-
-
-def read_multicomponent_columns(form, input_data):
-    """Convert a multicomponent isotherm block to columns"""
-    isotherm_block = input_data['isotherm_data']
-    # Pull the adsorbates from the first measurement to create a list for cross-referencing
-    try:
-        adsorbates = sorted([x['InChIKey'] for x in isotherm_block[0]['species_data']])
-    except KeyError:
-        return ''
+    return format_table(columns.to_table('single-component'), header='#pressure,adsorption\n')
+
+
+def read_multicomponent_columns(form, input_data, columns):
+    """Convert a multicomponent isotherm to columns"""
+    # Sort the adsorbates of the measurements to create a list for cross-referencing
+    columns = columns.sorted()
+    adsorbates = columns.inchikeys
     # Add adsorbates to the form and fill in by InChIKey
     for (i, adsorbate) in enumerate(adsorbates):
         if i > 0:
@@ -159,20 +182,5 @@ def read_multicomponent_columns(form, input_data):
         if adsorbate['InChIKey'] not in adsorbates:
             form.inp_adsorbates.append(AdsorbateWithControls(parent=form.inp_adsorbates))
             form.inp_adsorbates.data[-1].inp_name.value = lookup_species_name(adsorbate, 'adsorbates')
-    # Extract data from each measurement
-    lines = '#pressure,composition1,adsorption1,...,total_adsorption(opt)\n'
-    try:
-        for measurement in isotherm_block:
-            line = str(measurement['pressure']) + ','
-            temp_list = sorted(measurement['species_data'], key=lambda k: k['InChIKey'])
-            for species in temp_list:
-                line += str(species['composition']) + ','
-                line += str(species['adsorption']) + ','
-            line = line.rstrip(',')
-            if 'total_adsorption' in measurement:
-                line += ',' + str(measurement['total_adsorption'])
-            lines += line + '\n'
-    except KeyError:
-        pass
-
-    return lines
+    return format_table(columns.to_table('multi-component'),
+                        header='#pressure,composition1,adsorption1,...,total_adsorption(opt)\n')
@@ -1,21 +1,24 @@
 # -*- coding: utf-8 -*-
 """Prepare JSON output."""
-from io import StringIO
+import hashlib
+import io
+import itertools
 import re
 import datetime
-import pandas as pd
-import panel as pn
 
-from .config import find_by_name, QUANTITIES
+from .config import find_by_name, VOCABULARY
+from .storage import get_blob_store
+from .thumbnail import PREVIEW_WIDTH, get_thumbnail, request_thumbnail
 from . import ValidationError
 
 
-def prepare_isotherm_dict(form):
-    """Validate form contents and prepare JSON.
+def prepare_isotherm_data(form, cache=None):
+    """Validate form contents and prepare isotherm metadata and columns.
 
     :param form: Instance of IsothermForm
+    :param cache: LRUCache for the results of vocabulary lookups and parsing (optional)
     :raises ValidationError: If validation fails.
-    :returns: python dictionary with isotherm data
+    :returns: tuple (python dictionary with isotherm metadata, IsothermColumns instance)
     """
     data = {}
 
@@ -24,6 +27,8 @@ def prepare_isotherm_dict(form):
     msg = ''
 
     for inp in form.required_inputs:
+        if inp is form.inp_isotherm_data and form.inp_isotherm_file.value:
+            continue  # isotherm data uploaded as file
         if not inp.value or inp.value == 'Select':
             msg += 'Please provide ' + inp.name + '\n'
             valid = False
@@ -34,7 +39,7 @@ def prepare_isotherm_dict(form):
     data['DOI'] = form.inp_doi.value
 
     try:
-        adsorbent_json = find_by_name(form.inp_adsorbent.value, QUANTITIES['adsorbents']['json'])
+        adsorbent_json = lookup_name(form.inp_adsorbent.value, 'adsorbents', cache)
     except ValueError:
         adsorbent_json = dict(name=form.inp_adsorbent.value, hashkey=None)
 
@@ -44,12 +49,12 @@ def prepare_isotherm_dict(form):
     except ValueError as error_handler:
         raise ValidationError('Could not convert temperature to int.') from error_handler
 
-    adsorbates_json = [find_by_name(a.inp_name.value, QUANTITIES['adsorbates']['json']) for a in form.inp_adsorbates]
+    adsorbates_json = [lookup_name(a.inp_name.value, 'adsorbates', cache) for a in form.inp_adsorbates]
     data['adsorbates'] = [{key: adsorbate[key] for key in ['name', 'InChIKey']} for adsorbate in adsorbates_json]
     data['isotherm_type'] = form.inp_isotherm_type.value
     data['category'] = form.inp_measurement_type.value
     form_type = 'single-component' if form.__class__.__name__ == 'IsothermSingleComponentForm' else 'multi-component'
-    data['isotherm_data'] = parse_isotherm_data(form.inp_isotherm_data.value, data['adsorbates'], form_type=form_type)
+    columns = parse_form_data(form, data['adsorbates'], form_type, cache)
 
     data['pressureUnits'] = form.inp_pressure_units.value
     if form.inp_saturation_pressure.value:
@@ -82,91 +87,311 @@ def prepare_isotherm_dict(form):
         if data[key] == 'Select':
             data[key] = None
 
-    return data
+    return data, columns
 
 
-def parse_isotherm_data(measurements, adorbates, form_type='single-component'):
-    """Parse text from isotherm data field.
+def lookup_name(name, quantity, cache=None):
+    """Find JSON corresponding to quantity name (see config.find_by_name).
 
-    :param measurements: Data from text field
+    :param name: name or synonym
+    :param quantity: quantity to search, e.g. 'adsorbents'
+    :param cache: LRUCache (optional). Results are cached per vocabulary version.
+    :raises ValueError: if not found
+    """
+    if cache is None:
+        return find_by_name(name, quantity)
+    return cache.get(('lookup', quantity, name, VOCABULARY.version),
+                     lambda: find_by_name(name, quantity),
+                     stage='lookup')
+
+
+def parse_form_data(form, adsorbates, form_type, cache=None):
+    """Parse isotherm data of the form (uploaded file or text field).
+
+    :param form: Instance of IsothermForm
     :param adsorbates: Adsorbates dictionary
     :param form_type: 'single-component' or 'multi-component'
-    :returns: python dictionary with isotherm data
+    :param cache: LRUCache (optional). Results are cached by hash of the data and the adsorbates.
+    :returns: IsothermColumns instance
+    """
+    upload = form.inp_isotherm_file.value
+    composition_type = form.inp_composition_type.value if form_type == 'multi-component' else None
+
+    def parse():
+        if upload:
+            # uploaded file takes precedence over the text field
+            with io.TextIOWrapper(io.BytesIO(upload), encoding='utf-8-sig', errors='replace') as handle:
+                return parse_isotherm_file(handle, adsorbates, form_type, composition_type)
+        return parse_isotherm_columns(form.inp_isotherm_data.value, adsorbates, form_type, composition_type)
+
+    if cache is None:
+        return parse()
+    data = upload or form.inp_isotherm_data.value.encode('utf8')
+    key = ('parse', bool(upload), hashlib.blake2b(data, digest_size=16).digest(),
+           tuple(adsorbate['InChIKey'] for adsorbate in adsorbates), form_type, composition_type)
+    return cache.get(key, parse, stage='parse')
 
+
+DELIMITERS = '\t;|,'
+# delimiters and whitespace other than newlines are mapped to spaces in a single str.translate pass
+SEPARATORS = str.maketrans(
+    dict.fromkeys(DELIMITERS + ''.join(char for char in map(chr, range(0x3001)) if char.isspace() and char != '\n'),
+                  ' '))
+COMMENT = re.compile('#[^\n]*')
+CHUNK_LINES = 65536  # lines per chunk when reading isotherm data files
+MAX_REPORTED_ERRORS = 20  # distinct error messages
+MAX_REPORTED_LINES = 10  # line numbers per error message
+
+
+def read_table(text, first_line=1, n_columns=None, errors=None):  # pylint: disable=too-many-locals
+    """Tokenize table of numbers into float array.
+
+    Columns may be separated by whitespace, tabs, commas, semicolons or pipes; everything after a '#' is a comment.
+    Blank lines are skipped.
+
+    :param text: table as string
+    :param first_line: line number of the first line of the text (used in error messages)
+    :param n_columns: allowed number(s) of columns, as int or tuple (default: number of columns of the first row).
+        All rows must have the same number of columns; if several are allowed, the most common one is expected.
+    :param errors: list for collecting (line number, message) tuples. If provided, invalid rows are skipped instead
+        of raising ValidationError.
+    :raises ValidationError: if rows have different numbers of columns or values are not numeric
+    :returns: tuple (float array of shape (rows, columns), array of line numbers of the rows)
     """
-    for delimiter in ['\t', ';', '|', ',']:
-        measurements = measurements.replace(delimiter, ' ')  # convert all delimiters to spaces
-    measurements = re.sub(' +', ' ', measurements)  # collapse whitespace
-    measurements = pd.read_table(
-        StringIO(measurements),
-        sep=',| ',
-        #sep=' ',
-        # for some reason, leaving only the space delimiter is causing a problem
-        #  when lines have trailing whitespace. Need to check pandas documentation
-        comment='#',
-        header=None,
-        engine='python')
-    measurements = measurements.to_numpy(dtype=float)
-    return [parse_pressure_row(pressure, adorbates, form_type) for pressure in measurements]
-
-
-def parse_pressure_row(pressure, adsorbates, form_type):
-    """Parse single pressure row.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    text = COMMENT.sub('', text).translate(SEPARATORS)
+
+    # locate tokens on the raw bytes: a token starts wherever a non-separator follows a separator
+    buffer = np.frombuffer(text.encode('utf8'), dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord('\n'))
+    in_token = (buffer != ord(' ')) & (buffer != ord('\n'))
+    token_starts = np.flatnonzero(in_token & ~np.concatenate(([False], in_token[:-1])))
+    counts = np.bincount(np.searchsorted(newlines, token_starts), minlength=len(newlines) + 1)
+    del buffer, in_token, token_starts
+
+    rows = np.flatnonzero(counts)
+    counts = counts[rows]
+    line_numbers = rows + first_line
+    allowed = np.atleast_1d(counts[:1] if n_columns is None else n_columns)
+    # all rows must have the same of the allowed numbers of columns (the most common one)
+    frequencies = [np.count_nonzero(counts == count) for count in allowed.tolist()]
+    n_columns = int(allowed[np.argmax(frequencies)]) if len(allowed) else 0
+    row_errors = []
+    tokens = text.split()
+
+    mismatch = counts != n_columns
+    if mismatch.any():
+        expected = ' or '.join(map(str, allowed.tolist()))
+        row_errors += [(line, f'Expected {n_columns} columns as in other rows, found {count}'
+                        if count in allowed else f'Expected {expected} columns, found {count}')
+                       for line, count in zip(line_numbers[mismatch].tolist(), counts[mismatch].tolist())]
+        tokens = list(itertools.compress(tokens, np.repeat(~mismatch, counts).tolist()))
+        line_numbers = line_numbers[~mismatch]
+
+    try:
+        values = np.array(tokens, dtype=float).reshape(len(line_numbers), n_columns)
+    except ValueError:
+        # slow path only for locating non-numeric values
+        values = np.empty((len(line_numbers), n_columns))
+        valid = np.ones(len(line_numbers), dtype=bool)
+        for index, line in enumerate(line_numbers.tolist()):
+            row = tokens[index * n_columns:(index + 1) * n_columns]
+            try:
+                values[index] = np.array(row, dtype=float)
+            except ValueError:
+                token = next(token for token in row if not _is_number(token))
+                row_errors.append((line, f'Could not convert "{token}" to a number'))
+                valid[index] = False
+        values = values[valid]
+        line_numbers = line_numbers[valid]
+
+    if row_errors:
+        row_errors.sort()
+        if errors is None:
+            raise ValidationError(format_errors(row_errors))
+        errors += row_errors
+
+    return values, line_numbers
+
+
+def read_table_file(handle, n_columns=None, errors=None, chunk_lines=CHUNK_LINES):
+    """Read table of numbers from text file in chunks.
+
+    At most one chunk of text (and its tokens and values) is held in memory in addition to the output array, which
+    grows chunk by chunk.
+
+    :param handle: text file handle
+    :param n_columns: allowed number(s) of columns, as int or tuple (default: number of columns of the first row).
+        The rows of later chunks must have the number of columns of the first chunk.
+    :param errors: list for collecting (line number, message) tuples. If provided, invalid rows are skipped instead
+        of raising ValidationError.
+    :param chunk_lines: number of lines per chunk
+    :raises ValidationError: if rows have different numbers of columns or values are not numeric
+    :returns: tuple (float array of shape (rows, columns), array of line numbers of the rows)
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    row_errors = []
+    values = np.empty((0, 0))  # columns of the first chunk
+    line_numbers = np.empty(0, dtype=int)
+    first_line = 1
+    while True:
+        lines = list(itertools.islice(handle, chunk_lines))
+        if not lines:
+            break
+        table, chunk_line_numbers = read_table(''.join(lines), first_line, n_columns, row_errors)
+        if not len(values):  # pylint: disable=use-implicit-booleaness-not-len
+            values = np.empty((0, table.shape[1]))
+        if len(table):
+            n_columns = table.shape[1]
+            # grow the output in place (realloc) instead of collecting chunks to be concatenated
+            n_rows = len(values)
+            values.resize((n_rows + len(table), n_columns), refcheck=False)
+            values[n_rows:] = table
+            line_numbers.resize(n_rows + len(table), refcheck=False)
+            line_numbers[n_rows:] = chunk_line_numbers
+        first_line += len(lines)
+        del lines, table
+
+    if row_errors:
+        if errors is None:
+            raise ValidationError(format_errors(row_errors))
+        errors += row_errors
+
+    return values, line_numbers
+
+
+def _is_number(token):
+    """Return True if token can be converted to float."""
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+def format_errors(errors, max_errors=MAX_REPORTED_ERRORS, max_lines=MAX_REPORTED_LINES):
+    """Format list of errors for display.
+
+    Lines with the same message are grouped.
+
+    :param errors: list of (line number, message) tuples
+    :param max_errors: maximum number of distinct messages to list
+    :param max_lines: maximum number of line numbers to list per message
+    :returns: error message
+    """
+    groups = {}
+    for line, message in sorted(errors, key=lambda error: error[0]):
+        groups.setdefault(message, []).append(line)
+
+    output = []
+    for message, lines in list(groups.items())[:max_errors]:
+        numbers = ', '.join(map(str, lines[:max_lines]))
+        if len(lines) > max_lines:
+            numbers += f' and {len(lines) - max_lines} more'
+        output.append(f'Line{"s" if len(lines) > 1 else ""} {numbers}: {message}')
+    if len(groups) > max_errors:
+        output.append(f'... and {len(groups) - max_errors} more errors')
+    return '\n'.join(output)
+
+
+def get_n_columns(n_adsorbates, form_type='single-component'):
+    """Return allowed numbers of columns of the isotherm data.
 
     This can handle the following formats:
      * pressure,adsorption  (single-component form)
      * pressure,composition1,adsorption1,... (multi-component form)
      * pressure,composition1,adsorption1,...total_adsorption (multi-component form)
-    """
-    n_adsorbates = len(adsorbates)
-    n_rows_no_total = 1 + 2 * n_adsorbates
-    n_rows_total = n_rows_no_total + 1
 
+    :param n_adsorbates: number of adsorbates
+    :param form_type: 'single-component' or 'multi-component'
+    :returns: tuple of allowed numbers of columns
+    """
     if form_type == 'single-component':
-        if len(pressure) != 2:
-            raise ValidationError('Expected 2 columns for pressure point "{}", found {}'. \
-                                  format(str(pressure), len(pressure)), )
-        measurement = {
-            'pressure': pressure[0],
-            'species_data': [{
-                'InChIKey': adsorbates[0]['InChIKey'],
-                'composition': 1.0,
-                'adsorption': pressure[1],
-            }],
-            'total_adsorption': pressure[1]
-        }
-    else:
-        if len(pressure) == n_rows_no_total:
-            has_total_adsorption = False
-        elif len(pressure) == n_rows_total:
-            has_total_adsorption = True
-        else:
-            raise ValidationError('Expected {} or {} columns for pressure point "{}", found {}'. \
-                                  format(n_rows_no_total, n_rows_total, str(pressure), len(pressure)), )
-
-        measurement = {
-            'pressure':
-            pressure[0],
-            'species_data': [{
-                'InChIKey': adsorbates[i]['InChIKey'],
-                'composition': pressure[1 + 2 * i],
-                'adsorption': pressure[2 + 2 * i],
-            } for i in range(n_adsorbates)],
-        }
-        if has_total_adsorption:
-            measurement['total_adsorption'] = pressure[-1]
-        else:
-            pass
-            # TODO  # pylint: disable=fixme
-    return measurement
+        return (2, )
+    return (1 + 2 * n_adsorbates, 2 + 2 * n_adsorbates)
+
+
+def parse_isotherm_columns(measurements, adsorbates, form_type='single-component', composition_type=None):
+    """Parse text from isotherm data field.
+
+    :param measurements: Data from text field
+    :param adsorbates: Adsorbates dictionary
+    :param form_type: 'single-component' or 'multi-component'
+    :param composition_type: composition type of multi-component isotherms (see validate.validate_columns)
+    :raises ValidationError: listing all invalid lines
+    :returns: IsothermColumns instance
+    """
+    n_columns = get_n_columns(len(adsorbates), form_type)
+    errors = []
+    table, line_numbers = read_table(measurements, n_columns=n_columns, errors=errors)
+    return _get_columns(table, line_numbers, errors, adsorbates, form_type, composition_type)
+
+
+def parse_isotherm_file(handle, adsorbates, form_type='single-component', composition_type=None):
+    """Parse isotherm data file (CSV, TSV or whitespace-separated) in chunks.
+
+    :param handle: text file handle
+    :param adsorbates: Adsorbates dictionary
+    :param form_type: 'single-component' or 'multi-component'
+    :param composition_type: composition type of multi-component isotherms (see validate.validate_columns)
+    :raises ValidationError: listing all invalid lines
+    :returns: IsothermColumns instance
+    """
+    n_columns = get_n_columns(len(adsorbates), form_type)
+    errors = []
+    table, line_numbers = read_table_file(handle, n_columns=n_columns, errors=errors)
+    return _get_columns(table, line_numbers, errors, adsorbates, form_type, composition_type)
+
+
+def _get_columns(  # pylint: disable=too-many-arguments
+        table, line_numbers, errors, adsorbates, form_type, composition_type):
+    """Check parsed table and convert to IsothermColumns.
+
+    :raises ValidationError: listing the errors of parsing and all inconsistencies (see validate.validate_columns)
+    """
+    from .columns import IsothermColumns  # pylint: disable=import-outside-toplevel
+    from .validate import validate_columns  # pylint: disable=import-outside-toplevel
+
+    if not len(table) and not errors:  # pylint: disable=use-implicit-booleaness-not-len
+        raise ValidationError('No pressure points found in isotherm data.')
+    table.flags.writeable = False  # the columns are views of the table (see IsothermColumns)
+    columns = IsothermColumns.from_table(table, [adsorbate['InChIKey'] for adsorbate in adsorbates], form_type)
+    errors += validate_columns(columns, line_numbers, composition_type)
+    if errors:
+        raise ValidationError(format_errors(errors))
+    return columns
+
+
+def parse_isotherm_data(measurements, adorbates, form_type='single-component'):
+    """Parse text from isotherm data field.
+
+    :param measurements: Data from text field
+    :param adsorbates: Adsorbates dictionary
+    :param form_type: 'single-component' or 'multi-component'
+    :returns: list of measurement dictionaries ('isotherm_data' of ISDB JSON)
+
+    """
+    return parse_isotherm_columns(measurements, adorbates, form_type).to_json()
 
 
 class FigureImage:  # pylint: disable=too-few-public-methods
-    """Representation of digitized image."""
+    """Representation of digitized image.
+
+    Only the digest of the image is held; the data is kept in the blob store, once per content.
+    """
     def __init__(self, data=None, filename=None):
-        self.data = data
+        self.digest = get_blob_store().put(data) if data else None
         self.filename = filename
 
+    @property
+    def data(self):
+        """Return image data (bytes), or None."""
+        if self.digest is None:
+            return None
+        return get_blob_store().get(self.digest)
+
     def _repr_png_(self):
         """Return png representation.
 
@@ -176,7 +401,15 @@ class FigureImage:  # pylint: disable=too-few-public-methods
             return self.data
         return ''
 
+    def request_thumbnail(self, width=PREVIEW_WIDTH, height=None):
+        """Return downscaled preview without blocking (see thumbnail.request_thumbnail).
+
+        :returns: concurrent.futures.Future of Thumbnail or None
+        """
+        return request_thumbnail(self.digest, width, height)
+
     @property
     def pane(self):
-        """Return PNG pane."""
-        return pn.pane.PNG(object=self, width=400)
+        """Return PNG pane with downscaled preview."""
+        import panel as pn  # pylint: disable=import-outside-toplevel
+        return pn.pane.PNG(object=get_thumbnail(self.digest) if self.digest else None, width=PREVIEW_WIDTH)
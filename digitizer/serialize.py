@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""JSON serialization, with orjson if installed (see the fast-json extra)."""
+import functools
+import json
+
+
+@functools.lru_cache(maxsize=1)
+def get_orjson():
+    """Return orjson module, or None if it is not installed."""
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return orjson
+
+
+def dump_json(data, pretty=True):
+    """Serialize data to JSON string with sorted keys.
+
+    The pretty form (used for downloads and submissions) is always written by the json module: orjson only indents
+    by 2 spaces and formats floats differently, so the files would depend on the installed packages.
+
+    :param data: JSON-serializable data
+    :param pretty: True for indentation by 4 spaces, False for compact JSON (serialized with orjson, if installed)
+    """
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, sort_keys=True, indent=4)
+    orjson = get_orjson()
+    if orjson is not None:
+        return orjson.dumps(  # pylint: disable=no-member
+            data, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf8')  # pylint: disable=no-member
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
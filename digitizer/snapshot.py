@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Offline snapshot of the vocabularies fetched from the ISDB API.
+
+The snapshot is a gzip-compressed JSON file of the form::
+
+    {
+        "format_version": 1,
+        "base_url": "https://adsorption.nist.gov/isodb/api",
+        "created": "2021-11-23T10:00:00+00:00",
+        "endpoints": {
+            "/materials.json": {"etag": "...", "last_modified": "...", "data": [...]},
+            ...
+        }
+    }
+
+ETag and Last-Modified headers are stored for conditional revalidation against the API.
+
+Build or refresh a snapshot from the command line::
+
+    python -m digitizer.snapshot build
+    python -m digitizer.snapshot refresh
+"""
+import argparse
+import datetime
+import gzip
+import json
+import sys
+
+FORMAT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """Snapshot missing, unreadable or in an unsupported format."""
+
+
+def write_snapshot(path, base_url, endpoints):
+    """Write snapshot atomically (see storage.write_atomic).
+
+    :param path: path of snapshot file
+    :param base_url: base URL of the API the endpoints were fetched from
+    :param endpoints: dict mapping API path to EndpointData
+    """
+    snapshot = {
+        'format_version': FORMAT_VERSION,
+        'base_url': base_url,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'endpoints': {path: endpoint._asdict()
+                      for path, endpoint in endpoints.items()},
+    }
+    from .storage import write_atomic  # pylint: disable=import-outside-toplevel
+
+    def write(handle):
+        with gzip.open(handle, 'wt', encoding='utf8') as text:
+            json.dump(snapshot, text, separators=(',', ':'))
+
+    write_atomic(path, write)
+
+
+def read_snapshot(path, base_url=None):
+    """Read snapshot.
+
+    :param path: path of snapshot file
+    :param base_url: if provided, snapshots of other APIs are rejected
+    :raises SnapshotError: if snapshot cannot be used
+    :returns: dict mapping API path to dict with keys 'data', 'etag' and 'last_modified'
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf8') as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError) as exc:
+        raise SnapshotError(f'Unable to read vocabulary snapshot {path}: {exc}') from exc
+
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get('endpoints'), dict):
+        raise SnapshotError(f'{path} is not a vocabulary snapshot')
+    if snapshot.get('format_version') != FORMAT_VERSION:
+        raise SnapshotError(f'Unsupported vocabulary snapshot format {snapshot.get("format_version")} in {path}')
+    if base_url and snapshot.get('base_url') != base_url:
+        raise SnapshotError(f'Vocabulary snapshot {path} was built from {snapshot.get("base_url")}, not {base_url}')
+
+    return snapshot['endpoints']
+
+
+def main(argv=None):
+    """Build or refresh vocabulary snapshot."""
+    from requests import RequestException  # pylint: disable=import-outside-toplevel
+    from . import config  # pylint: disable=import-outside-toplevel
+    from .vocabulary import VocabularyLoader  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(prog='python -m digitizer.snapshot', description=main.__doc__)
+    parser.add_argument('command',
+                        choices=['build', 'refresh'],
+                        help='build: fetch all endpoints; refresh: revalidate existing snapshot')
+    parser.add_argument('-o', '--output', default=config.VOCABULARY_SNAPSHOT, help='path of snapshot file')
+    parser.add_argument('--base-url', default=config.BASE_URL, help='base URL of the ISDB API')
+    args = parser.parse_args(argv)
+
+    if not args.output:
+        parser.error('No snapshot path given (set DIGITIZER_VOCABULARY_SNAPSHOT or use --output)')
+
+    loader = VocabularyLoader(args.base_url, config.QUANTITY_API_MAPPING, snapshot_path=args.output, revalidate=False)
+    if args.command == 'refresh':
+        try:
+            loader.set(loader.load_snapshot())
+        except SnapshotError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    try:
+        if args.command == 'build':
+            loader.set(loader.load())
+            loader.save_snapshot()
+            message = f'Wrote {args.output}'
+        else:
+            updated = loader.refresh(raise_errors=True)
+            message = f'Updated {args.output}' if updated else f'{args.output} is up to date'
+    except (RequestException, OSError, ValueError) as exc:
+        print(f'Unable to {args.command} {args.output}: {exc}', file=sys.stderr)
+        return 1
+    print(message)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
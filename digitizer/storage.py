@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Crash-safe file storage and content-addressed store of binary data."""
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from .cache import LRUCache
+from .config import BLOB_DIRECTORY, BLOB_CACHE_SIZE, BLOB_MAX_AGE
+from .workers import run_in_background
+
+
+def write_atomic(path, write, sync=True):
+    """Write file atomically.
+
+    The content is written to a temporary file in the same directory, which is synced to disk and then renamed.
+    Readers (and the file system after a crash) see either no file or the complete file, never a truncated one.
+
+    :param path: destination path
+    :param write: function writing the content to a binary file handle
+    :param sync: sync file to disk before renaming (without, the file may be lost on crash but never truncated for
+        other readers)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle = tempfile.NamedTemporaryFile(dir=directory,
+                                         prefix='.{}.'.format(os.path.basename(path)),
+                                         suffix='.tmp',
+                                         delete=False)
+    try:
+        with handle:
+            write(handle)
+            if sync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        # temporary files are created with mode 0600; use the mode of files created by open()
+        os.chmod(handle.name, 0o666 & ~_get_umask())
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    if sync:
+        _fsync_directory(directory)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_umask():
+    """Return umask of the process.
+
+    The umask can only be read by setting it; this is done once, since it applies to files created by all threads.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def _fsync_directory(directory):
+    """Sync directory entry of a renamed file to disk (POSIX only)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class BlobStore:
+    """Content-addressed store of binary data, e.g. figure images.
+
+    Blobs are identified by the SHA-256 hex digest of their content, so identical data is stored once. Recently used
+    blobs are kept in memory, within memory_budget; blobs evicted from memory and blobs larger than spill_size are
+    written to directory. Blob files that were not used for max_age are deleted (checked at most every
+    CLEANUP_INTERVAL). Thread-safe, and the directory may be shared by several processes.
+
+    :param directory: directory for blob files (created if needed)
+    :param memory_budget: maximum total size of blobs kept in memory [bytes]
+    :param spill_size: blobs larger than this are written to directory right away [bytes] (defaults to a quarter of
+        memory_budget)
+    :param max_age: blob files that were not used for this long are deleted [s]
+    """
+    CLEANUP_INTERVAL = 3600  # [s]
+
+    def __init__(self, directory, memory_budget, spill_size=None, max_age=BLOB_MAX_AGE):
+        self.directory = directory
+        self.spill_size = memory_budget // 4 if spill_size is None else spill_size
+        self.max_age = max_age
+        self.cache = LRUCache(memory_budget, sizeof=len, on_evict=self._on_evict)
+        self._evicted = {}  # digest -> data of blobs evicted from memory that are being written to directory
+        self._lock = threading.Lock()
+        self._last_cleanup = None
+
+    def path(self, digest):
+        """Return path of blob file."""
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data):
+        """Store data.
+
+        :param data: bytes
+        :returns: digest (handle for BlobStore.get)
+        """
+        data = bytes(data)
+        digest = hashlib.sha256(data).hexdigest()
+        if len(data) > self.spill_size:
+            self._write(digest, data)
+        else:
+            self.cache.put(digest, data)
+            self._write_evicted()
+        if self._last_cleanup is None or time.time() - self._last_cleanup > min(self.CLEANUP_INTERVAL, self.max_age):
+            self._last_cleanup = time.time()
+            run_in_background(self.cleanup)
+        return digest
+
+    def get(self, digest):
+        """Return data of blob.
+
+        :param digest: digest returned by BlobStore.put
+        """
+        with self._lock:
+            data = self._evicted.get(digest)
+        if data is not None:
+            return data
+        data = self.cache.get(digest, functools.partial(self._read, digest), stage='blob')
+        self._write_evicted()
+        return data
+
+    def cleanup(self):
+        """Delete blob files that were not used for max_age.
+
+        :returns: number of deleted files
+        """
+        deleted = 0
+        oldest = time.time() - self.max_age
+        for dirpath, _dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.stat(path).st_mtime < oldest:
+                        os.unlink(path)
+                        deleted += 1
+                except FileNotFoundError:
+                    pass  # deleted by another process
+        return deleted
+
+    def _on_evict(self, digest, data):
+        """Keep blob evicted from memory until it is written to directory (called with the lock of the cache)."""
+        with self._lock:
+            self._evicted[digest] = data
+
+    def _write_evicted(self):
+        """Write blobs evicted from memory to directory."""
+        with self._lock:
+            evicted = list(self._evicted.items())
+        for digest, data in evicted:
+            try:
+                self._write(digest, data)
+            finally:
+                with self._lock:
+                    self._evicted.pop(digest, None)
+
+    def _write(self, digest, data):
+        """Write blob file, or mark an existing one as used."""
+        path = self.path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, lambda handle: handle.write(data), sync=False)
+
+    def _read(self, digest):
+        path = self.path(digest)
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        os.utime(path)
+        return data
+
+
+@functools.lru_cache(maxsize=1)
+def get_blob_store():
+    """Return blob store shared by all sessions of the process (created on first use)."""
+    return BlobStore(BLOB_DIRECTORY, BLOB_CACHE_SIZE)
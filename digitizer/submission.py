@@ -1,42 +1,96 @@
 # -*- coding: utf-8 -*-
 """Store stack of submissions"""
 from io import BytesIO
+import functools
+import json
+import threading
 import uuid
 import os
-import zipfile
-from traitlets import HasTraits, Instance
-import pydenticon
+from traitlets import HasTraits, Instance, Bunch
 
 import panel as pn
 import panel.widgets as pw
 
-from .config import SUBMISSION_FOLDER
+from .config import SUBMISSION_FOLDER, ZIP_CACHE_SIZE, ZIP_COMPRESSION_LEVEL
+from .archive import compress_entry, compress_entries, get_zip_bytes, write_zip
+from .cache import LRUCache
+from .serialize import dump_json
+from .storage import write_atomic
+from .workers import get_executor, get_in_background, run_in_background
+from .columns import IsothermColumns
 
 ROW_HEIGHT = 35  # pixel
-PYDENTICON_GENERATOR = pydenticon.Generator(5, 5)
+IDENTICON_CACHE_SIZE = 4096  # identicons per process (a few hundred bytes each)
+# metadata derived from the position of the isotherm in the submission stack, which is not part of Isotherm.digest
+UNHASHED_KEYS = ('associated_content',)
 
 
-class Isotherm(HasTraits):
-    """Represents single isotherm."""
-    def __init__(self, json, figure_image=None, name=None):
+class Isotherm(HasTraits):  # pylint: disable=too-many-instance-attributes
+    """Represents single isotherm.
+
+    The isotherm data is held as IsothermColumns; the nested JSON is only built when Isotherm.json is accessed.
+    Isotherms are compared by content (see Isotherm.digest).
+
+    :param metadata: isotherm dictionary. If it contains 'isotherm_data', the columns are created from it.
+    :param figure_image: FigureImage instance (optional)
+    :param name: name to display (optional)
+    :param columns: IsothermColumns instance (optional)
+    """
+    def __init__(self, metadata, figure_image=None, name=None, columns=None):
         super().__init__()
         self.parent = None
-        self.json = json
+        self.metadata = dict(metadata)
+        isotherm_data = self.metadata.pop('isotherm_data', [])
+        self.columns = columns if columns is not None else IsothermColumns.from_json(isotherm_data)
+        self._json = None
+        self._json_strs = {}  # pretty -> (version, JSON string)
+        self._version = 0  # incremented on every mutation
+        self._digest = None  # (version, digest)
         self.figure_image = figure_image
-        self.name = name or '{} ({})'.format(json['articleSource'], json['DOI'])
+        self.name = name or '{} ({})'.format(self.metadata['articleSource'], self.metadata['DOI'])
 
-        self.btn_remove = pw.Button(name='❌', button_type='primary')
-        self.btn_remove.on_click(self.on_click_remove)
+        # row of the submission stack and its widgets, created on first access of Isotherm.row
+        self._row = None
+        self.btn_remove = None
+        self.btn_load = None
+        self.figure_pane = None
+        self.identicon_pane = None
 
-        self.btn_load = pw.Button(name='📂', button_type='primary')
-        self.btn_load.on_click(self.on_click_load)
+    @property
+    def row(self):
+        """Return row for the submission stack (created on first access).
 
-        row = pn.GridSpec(height=ROW_HEIGHT)
-        row[0, 0:17] = pn.pane.HTML(self.name)
-        row[0, 18] = pn.pane.PNG(object=get_identicon(str(hash(self))))
-        row[0, 19] = self.btn_load
-        row[0, 20] = self.btn_remove
-        self.row = row
+        Identicon and figure preview are rendered in the background and shown when ready.
+        """
+        if self._row is None:
+            self.btn_remove = pw.Button(name='❌', button_type='primary')
+            self.btn_remove.on_click(self.on_click_remove)
+
+            self.btn_load = pw.Button(name='📂', button_type='primary')
+            self.btn_load.on_click(self.on_click_load)
+
+            self.figure_pane = pn.pane.PNG(None)
+            self.identicon_pane = pn.pane.PNG(None)
+            # cells (y0, x0, y1, x1) are assigned at once: every item assignment copies the GridSpec
+            self._row = pn.GridSpec(height=ROW_HEIGHT,
+                                    objects={
+                                        (0, 0, 1, 17): pn.pane.HTML(self.name),
+                                        (0, 17, 1, 18): self.figure_pane,
+                                        (0, 18, 1, 19): self.identicon_pane,
+                                        (0, 19, 1, 20): self.btn_load,
+                                        (0, 20, 1, 21): self.btn_remove,
+                                    })
+            request_identicon(self.digest).add_done_callback(functools.partial(self._on_rendered, self.identicon_pane))
+            if self.figure_image is not None and self.figure_image.digest:
+                self.figure_image.request_thumbnail(ROW_HEIGHT, ROW_HEIGHT).add_done_callback(
+                    functools.partial(self._on_rendered, self.figure_pane))
+        return self._row
+
+    @staticmethod
+    def _on_rendered(pane, future):
+        """Show rendered image in pane."""
+        if future.exception() is None:
+            pane.object = future.result()
 
     def on_click_remove(self, event):  # pylint: disable=unused-argument
         """Remove this adsorbent from the list."""
@@ -46,17 +100,77 @@ class Isotherm(HasTraits):
         """Load data from this isotherm."""
         self.parent.loaded_isotherm = self
 
+    @property
+    def json(self):
+        """Return isotherm dictionary (ISDB JSON).
+
+        Built on first access. Do not modify the dictionary in place - use Isotherm.update instead.
+        """
+        if self._json is None:
+            self._json = dict(self.metadata, isotherm_data=self.columns.to_json())
+        return self._json
+
+    def update(self, **metadata):
+        """Update isotherm metadata.
+
+        :param metadata: keys and values to set
+        """
+        old_digest = self._digest
+        self.metadata.update(metadata)
+        self._version += 1
+        self._json = None
+        if old_digest is not None and old_digest[0] == self._version - 1 and not set(metadata) - set(UNHASHED_KEYS):
+            self._digest = (self._version, old_digest[1])
+            return
+        if self.parent is not None and old_digest is not None:
+            self.parent.update_index(self, old_digest[1])
+
     @property
     def json_str(self):
-        """Return json bytes string of data."""
-        import json  # pylint: disable=import-outside-toplevel
-        return json.dumps(self.json, ensure_ascii=False, sort_keys=True, indent=4)
+        """Return JSON string of the isotherm, indented by 4 spaces (see Isotherm.get_json_str)."""
+        return self.get_json_str(pretty=True)
+
+    def get_json_str(self, pretty=True):
+        """Return JSON string of the isotherm with sorted keys.
+
+        Serialized on first access and cached until the isotherm is modified.
+
+        :param pretty: True for JSON indented by 4 spaces (as in the submission), False for compact JSON
+        """
+        cached = self._json_strs.get(pretty)
+        if cached is None or cached[0] != self._version:
+            cached = self._json_strs[pretty] = (self._version, dump_json(self.json, pretty))
+        return cached[1]
+
+    @property
+    def digest(self):
+        """Return SHA-256 hex digest of metadata (except UNHASHED_KEYS), isotherm data and figure image.
+
+        Computed from a canonical serialization (JSON with sorted keys, raw arrays) on first access and cached until
+        the isotherm is modified.
+        """
+        if self._digest is None or self._digest[0] != self._version:
+            import hashlib  # pylint: disable=import-outside-toplevel
+            metadata = {key: value for key, value in self.metadata.items() if key not in UNHASHED_KEYS}
+            hasher = hashlib.sha256(
+                json.dumps(metadata, sort_keys=True, ensure_ascii=False, separators=(',', ':'),
+                           default=str).encode('utf8') + b'\0')
+            self.columns.update_hash(hasher)
+            if self.figure_image is not None and self.figure_image.digest:
+                hasher.update(self.figure_image.digest.encode('ascii'))
+            self._digest = (self._version, hasher.hexdigest())
+        return self._digest[1]
+
+    def __eq__(self, other):
+        if not isinstance(other, Isotherm):
+            return NotImplemented
+        return self.digest == other.digest
 
     def __hash__(self):
-        return hash(str(self.json))
+        return hash(self.digest)
 
 
-class Submissions(HasTraits):  # pylint: disable=R0901
+class Submissions(HasTraits):  # pylint: disable=R0901,R0902
     """Stores stack of isotherms for combined submission.
 
     The Submissions.loaded_isotherm trait can be observed in order to react to changes::
@@ -67,6 +181,12 @@ class Submissions(HasTraits):  # pylint: disable=R0901
         s = Submissions()
         s.observed_forms(on_change, names=['loaded_isotherm'])
 
+    Isotherms appended to or removed from the stack are announced as notifications of type 'append' or 'remove'::
+
+        def on_append(change):
+            isotherm = change['new']
+
+        s.observe(on_append, names=['data'], type='append')
 
     """
 
@@ -75,7 +195,12 @@ class Submissions(HasTraits):  # pylint: disable=R0901
     def __init__(self):
         """Initialize empty submission."""
         super().__init__()
-        self.data = []
+        self._isotherms = {}  # id -> isotherm, in order of appending
+        self._digests = {}  # digest -> isotherm
+        self.zip_cache = LRUCache(ZIP_CACHE_SIZE, sizeof=lambda entry: len(entry.data))
+        self._precompress_lock = threading.Lock()
+        self._precompress_files = None  # files for the queued precompression, None if none is queued
+        self._precompress_future = None
 
         self.btn_submit = pw.Button(name='Submit', button_type='primary')
         self.btn_submit.on_click(self.on_click_submit)
@@ -84,7 +209,9 @@ class Submissions(HasTraits):  # pylint: disable=R0901
                                                     button_type='primary',
                                                     callback=self.on_click_download)
         self.btn_download.data = ''  # bug in panel https://github.com/holoviz/panel/issues/1598
-        self._submit_btns = pn.Row(self.btn_download, self.btn_submit)
+        self.progress = pn.indicators.Progress(value=0, max=100, width=200, visible=False)
+        self.status = pn.pane.HTML('')
+        self._submit_btns = pn.Row(self.btn_download, self.btn_submit, self.progress, self.status)
 
         self._column = pn.Column(objects=[a.row for a in self])
 
@@ -93,81 +220,225 @@ class Submissions(HasTraits):  # pylint: disable=R0901
         """Display isotherms."""
         return self._column
 
+    @property
+    def data(self):
+        """List of isotherms, most recently appended first."""
+        return list(reversed(self._isotherms.values()))
+
     def append(self, isotherm):  # pylint: disable=W0221
         """Add isotherm to submission.
 
+        Isotherms with the same content as an isotherm in the stack are not added. The files of the zip archive are
+        compressed in the background (see Submissions.precompress).
         Note: For better usability, we append *on top*.
         """
-        if isotherm in self.data:
+        self._append(isotherm)
+        self.precompress()
+
+    def _append(self, isotherm):
+        """Add isotherm to submission (see Submissions.append), without compressing its files."""
+        if isotherm in self:
             print('Isotherm already added')
             return
 
         isotherm.parent = self
-        self.data.insert(0, isotherm)
+        self._isotherms[id(isotherm)] = isotherm
+        self._digests[isotherm.digest] = isotherm
 
         if len(self) == 1:
             # we now need submit buttons
             self._column.insert(-1, self._submit_btns)
 
         self._column.insert(0, isotherm.row)
+        self._notify('append', isotherm)
+
+    def extend(self, isotherms):
+        """Add isotherms to submission (see Submissions.append).
+
+        The identicons of all isotherms are rendered in the background before their rows are created; their files
+        are compressed in the background afterwards.
+        """
+        isotherms = list(isotherms)
+        precompute_identicons(isotherm.digest for isotherm in isotherms)
+        for isotherm in isotherms:
+            self._append(isotherm)
+        self.precompress()
 
     def remove(self, isotherm):  # pylint: disable=W0221
         """Remove isotherm from list."""
-        self.data.remove(isotherm)
+        isotherm = self._digests.pop(isotherm.digest)
+        del self._isotherms[id(isotherm)]
 
         if len(self) == 0:
             # we should remove submit buttons
             self._column.pop(-1)
         self._column.remove(isotherm.row)
+        self._notify('remove', isotherm)
 
-    def get_zip_file(self):
-        """Create zip file for download."""
-        memfile = BytesIO()
-        with zipfile.ZipFile(memfile, mode='w', compression=zipfile.ZIP_DEFLATED) as zhandle:
+    def update_index(self, isotherm, old_digest):
+        """Update digest of an isotherm in the stack after it was modified."""
+        if self._digests.get(old_digest) is isotherm:
+            del self._digests[old_digest]
+            self._digests[isotherm.digest] = isotherm
+
+    def _notify(self, change_type, isotherm):
+        """Notify observers of isotherms appended to or removed from the stack."""
+        self.notify_change(Bunch(name='data', type=change_type, owner=self, new=isotherm))
+
+    def get_zip_files(self):
+        """Return files of the zip archive as list of (cache key, path in archive, function returning content).
+
+        Sets the associated content of isotherms with figure (not part of the digest, so that the rows and cached
+        files of the isotherms stay valid). Isotherms are numbered in the order they were appended, so that appending
+        keeps the names of the other files.
+        """
+        files = []  # (cache key, path in archive, function returning content)
+        isotherm_counters = {}
 
-            isotherm_counters = {}
+        for isotherm in self._isotherms.values():
+            doi = isotherm.metadata['DOI']
+            directory = doi.replace('/', '')
 
-            for isotherm in self:
-                doi = isotherm.json['DOI']
-                directory = doi.replace('/', '')
+            if doi not in isotherm_counters:
+                isotherm_counters[doi] = 1
 
-                if doi not in isotherm_counters:
-                    isotherm_counters[doi] = 1
+            if isotherm.figure_image:
+                filename = '{d}/{d}.Isotherm{i}_{f}'.format(d=directory,
+                                                            i=isotherm_counters[doi],
+                                                            f=isotherm.figure_image.filename)
+                if isotherm.metadata.get('associated_content') != [filename]:
+                    isotherm.update(associated_content=[filename])
+                files.append(
+                    ((isotherm.digest, filename), filename, lambda isotherm=isotherm: isotherm.figure_image.data))
 
-                if isotherm.figure_image:
-                    filename = '{d}/{d}.Isotherm{i}_{f}'.format(d=directory,
-                                                                i=isotherm_counters[doi],
-                                                                f=isotherm.figure_image.filename)
-                    isotherm.json['associated_content'] = [filename]
-                    zhandle.writestr(filename, isotherm.figure_image.data)
+            filename = '{d}/{d}.Isotherm{i}.json'.format(d=directory, i=isotherm_counters[doi])
+            key = (isotherm.digest, filename, tuple(isotherm.metadata.get('associated_content', ())))
+            files.append((key, filename, lambda isotherm=isotherm: isotherm.json_str.encode('utf8')))
+            isotherm_counters[doi] += 1
 
-                filename = '{d}/{d}.Isotherm{i}.json'.format(d=directory, i=isotherm_counters[doi])
-                zhandle.writestr(filename, isotherm.json_str)
-                isotherm_counters[doi] += 1
+        return files
 
-        memfile.seek(0)
-        return memfile
+    def precompress(self):
+        """Compress the files of the zip archive in the background, so that downloads find them in the cache.
+
+        At most one precompression is queued; it compresses the files of the stack at the time it starts.
+
+        :returns: concurrent.futures.Future of the queued precompression
+        """
+        files = self.get_zip_files()
+        with self._precompress_lock:
+            queued = self._precompress_files is not None
+            self._precompress_files = files
+            if not queued:
+                self._precompress_future = run_in_background(self._precompress)
+            return self._precompress_future
+
+    def _precompress(self):
+        """Compress the files of the queued precompression (runs in the background)."""
+        with self._precompress_lock:
+            files, self._precompress_files = self._precompress_files, None
+        self.get_zip_entries(files)
+
+    def get_zip_entries(self, files=None):
+        """Return compressed files of the zip archive.
+
+        Files are cached by isotherm digest and file name, so only new or modified isotherms are compressed (in
+        parallel, on the background executor). Thread-safe.
+
+        :param files: files as returned by get_zip_files (defaults to the current files)
+        """
+        if files is None:
+            files = self.get_zip_files()
+        missing = [file for file in files if file[0] not in self.zip_cache]
+        compressed = compress_entries([file[1:] for file in missing],
+                                      level=ZIP_COMPRESSION_LEVEL,
+                                      executor=get_executor())
+        compressed = {file[0]: entry for file, entry in zip(missing, compressed)}
+
+        def get_entry(key, filename, get_data):
+            if key in compressed:
+                return compressed[key]
+            return compress_entry(filename, get_data(), level=ZIP_COMPRESSION_LEVEL)  # evicted in the meantime
+
+        return [
+            self.zip_cache.get(key, functools.partial(get_entry, key, filename, get_data), stage='zip')
+            for key, filename, get_data in files
+        ]
+
+    def write_zip_file(self, handle):
+        """Write zip file of the submission.
+
+        :param handle: binary file-like object
+        """
+        write_zip(handle, self.get_zip_entries())
+
+    def get_zip_file(self):
+        """Create zip file for download.
+
+        Panel's FileDownload cannot stream: it reads the whole file and sends it base64-encoded. The archive is
+        assembled with one copy of the cached entries, which BytesIO shares with the reader instead of copying it.
+        """
+        return BytesIO(get_zip_bytes(self.get_zip_entries()))
 
     def on_click_submit(self, event):  # pylint: disable=unused-argument
-        """Submit stack of isotherms."""
+        """Submit stack of isotherms.
+
+        The zip file is compressed and written in the background; the submit button is disabled meanwhile.
+
+        :returns: concurrent.futures.Future of the background task
+        """
         filename = '{}.zip'.format(uuid.uuid4())
         file_path = os.path.join(SUBMISSION_FOLDER, filename)
-        memfile = self.get_zip_file()
-        with open(file_path, 'wb') as handle:  # use `wb` mode
-            handle.write(memfile.getvalue())
+        files = self.get_zip_files()
+
+        self.btn_submit.disabled = True
+        self.progress.value = 0
+        self.progress.visible = True
+        self.status.object = 'Compressing...'
+        return run_in_background(self.write_submission, file_path, files)
 
+    def write_submission(self, file_path, files):
+        """Compress files and write zip file atomically (runs in the background).
+
+        :param file_path: path of the zip file
+        :param files: files as returned by get_zip_files
+        """
+        try:
+            entries = self.get_zip_entries(files)
+            self.status.object = 'Writing...'
+            write_atomic(file_path, lambda handle: write_zip(handle, entries, progress=self._on_write_progress))
+        except Exception as exc:
+            self.status.object = 'Submission failed: {}'.format(exc)
+            raise
+        finally:
+            self.btn_submit.disabled = False
+            self.progress.visible = False
+
+        self.status.object = 'Submitted {}'.format(os.path.basename(file_path))
         print('Find zip file in {}'.format(file_path))
 
+    def _on_write_progress(self, written, total):
+        """Update progress bar (in percent)."""
+        percent = 100 * written // total if total else 100
+        if percent != self.progress.value:
+            self.progress.value = percent
+
     def on_click_download(self):
         """Download zip file."""
         return self.get_zip_file()
 
     def __len__(self):
-        return len(self.data)
+        return len(self._isotherms)
 
     def __getitem__(self, item):
         return self.data[item]
 
+    def __iter__(self):
+        return iter(self.data)
+
+    def __contains__(self, isotherm):
+        return isotherm.digest in self._digests
+
 
 class Identicon:  # pylint: disable=too-few-public-methods
     """Wrapper for identicon for usage in pn.pane.PNG"""
@@ -179,10 +450,47 @@ class Identicon:  # pylint: disable=too-few-public-methods
         return self.image
 
 
+@functools.lru_cache(maxsize=1)
+def get_identicon_generator():
+    """Return identicon generator (created on first use)."""
+    import pydenticon  # pylint: disable=import-outside-toplevel
+    return pydenticon.Generator(5, 5)
+
+
+@functools.lru_cache(maxsize=1)
+def get_identicon_cache():
+    """Return cache of identicons shared by all sessions of the process (created on first use)."""
+    return LRUCache(IDENTICON_CACHE_SIZE, sizeof=lambda identicon: 1)
+
+
+def _render_identicon(string):
+    """Return new identicon for string."""
+    return Identicon(image=get_identicon_generator().generate(string, ROW_HEIGHT, ROW_HEIGHT, output_format='png'))
+
+
 def get_identicon(string):
     """Return unique PNG for given string
 
-    :param string:  String to compute identicon for.
-    :returns: base64-encoded PNG
+    :param string:  String to compute identicon for (e.g. Isotherm.digest).
+    :returns: Identicon
+    """
+    return get_identicon_cache().get(string, lambda: _render_identicon(string), stage='identicon')
+
+
+def request_identicon(string):
+    """Return identicon without blocking (see get_identicon).
+
+    Identicons are rendered on the background executor; concurrent requests for the same string share one rendering.
+
+    :returns: concurrent.futures.Future of Identicon (already done for cached identicons)
+    """
+    return get_in_background(get_identicon_cache(), string, lambda: _render_identicon(string), stage='identicon')
+
+
+def precompute_identicons(strings):
+    """Render identicons of many strings in the background (e.g. before building rows of isotherms loaded in bulk).
+
+    :param strings: iterable of strings
+    :returns: list of concurrent.futures.Future of Identicon
     """
-    return Identicon(image=PYDENTICON_GENERATOR.generate(string, ROW_HEIGHT, ROW_HEIGHT, output_format='png'))
+    return [request_identicon(string) for string in strings]
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Downscaled previews of figure images.
+
+Uploaded figures may have many megapixels but are displayed at a few hundred pixels. Previews are rendered once per
+image content and size on the background executor and cached by the digest of the image (see storage.BlobStore).
+The submission archive keeps the original image.
+"""
+import functools
+import io
+
+from .config import THUMBNAIL_CACHE_SIZE
+from .cache import LRUCache
+from .storage import get_blob_store
+from .workers import get_in_background
+
+PREVIEW_WIDTH = 400  # pixel, preview in the check tab
+
+
+class Thumbnail:  # pylint: disable=too-few-public-methods
+    """Wrapper for preview for usage in pn.pane.PNG"""
+    def __init__(self, image):
+        self.image = image
+
+    def _repr_png_(self):
+        """Return PNG representation"""
+        return self.image
+
+
+def make_thumbnail(data, width, height=None):
+    """Return image downscaled to fit into width x height pixels as PNG.
+
+    :param data: image file content (any format supported by Pillow)
+    :param width: maximum width in pixels
+    :param height: maximum height in pixels (optional)
+    :raises OSError: if data is not an image Pillow can read
+    :returns: PNG (bytes). PNG images that fit already, or that are smaller than their preview, are returned as is.
+    """
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    with Image.open(io.BytesIO(data)) as image:
+        is_png = image.format == 'PNG'
+        if is_png and image.width <= width and (height is None or image.height <= height):
+            return bytes(data)
+        image.draft(None, (width, height or 1))  # JPEG: decode at reduced scale
+        if image.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+            image = image.convert('RGBA')  # palette images would be resized without interpolation
+        image.thumbnail((width, height or image.height))
+        output = io.BytesIO()
+        image.save(output, format='PNG')
+    if is_png and output.tell() >= len(data):
+        return bytes(data)  # e.g. line art with few colors (the browser scales the image)
+    return output.getvalue()
+
+
+@functools.lru_cache(maxsize=1)
+def get_thumbnail_cache():
+    """Return cache of previews shared by all sessions of the process (created on first use)."""
+    return LRUCache(THUMBNAIL_CACHE_SIZE, sizeof=lambda thumbnail: len(thumbnail.image) if thumbnail else 0)
+
+
+def _render(digest, width, height):
+    """Return preview of image in the blob store as Thumbnail (None, if the image cannot be read)."""
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    try:
+        return Thumbnail(make_thumbnail(get_blob_store().get(digest), width, height))
+    except (OSError, Image.DecompressionBombError) as exc:
+        print(f'Could not create preview of figure {digest}: {exc}')
+        return None
+
+
+def get_thumbnail(digest, width=PREVIEW_WIDTH, height=None):
+    """Return preview of figure image, rendering it on a cache miss.
+
+    :param digest: digest of the image in the blob store
+    :param width: maximum width in pixels
+    :param height: maximum height in pixels (optional)
+    :returns: Thumbnail, or None if the image cannot be read
+    """
+    return get_thumbnail_cache().get((digest, width, height), lambda: _render(digest, width, height),
+                                     stage='thumbnail')
+
+
+def request_thumbnail(digest, width=PREVIEW_WIDTH, height=None):
+    """Return preview of figure image without blocking (see get_thumbnail).
+
+    Previews are rendered on the background executor; concurrent requests for the same preview share one rendering.
+
+    :returns: concurrent.futures.Future of Thumbnail or None (already done for cached previews)
+    """
+    return get_in_background(get_thumbnail_cache(), (digest, width, height), lambda: _render(digest, width, height),
+                             stage='thumbnail')
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Consistency checks of parsed isotherm data.
+
+All checks operate on whole columns at once and report every offending line.
+"""
+import numpy as np
+
+# composition types for which the compositions of all species have to sum to one
+FRACTION_COMPOSITION_TYPES = ('Mole Fraction', 'Mass Fraction', 'Volume Fraction', 'molefraction', 'massfraction',
+                              'volumefraction')
+COMPOSITION_TOLERANCE = 0.01  # absolute deviation of sum of compositions from 1
+TOTAL_ADSORPTION_TOLERANCE = 0.02  # relative deviation of total adsorption from sum of species adsorption
+
+
+def validate_columns(columns, line_numbers, composition_type=None):
+    """Check isotherm data for consistency.
+
+    :param columns: IsothermColumns instance
+    :param line_numbers: line numbers of the measurements (for error messages)
+    :param composition_type: composition type of multi-component isotherms (e.g. 'Mole Fraction')
+    :returns: list of (line number, message) tuples, sorted by line number
+    """
+    line_numbers = np.asarray(line_numbers)
+    with np.errstate(invalid='ignore'):  # NaN and inf are reported by the first check
+        checks = _get_checks(columns, composition_type)
+
+    errors = []
+    for mask, message in checks:
+        errors += [(line, message) for line in line_numbers[mask].tolist()]
+    errors.sort(key=lambda error: error[0])
+    return errors
+
+
+def _get_checks(columns, composition_type):
+    """Return list of (mask of invalid measurements, message) tuples."""
+    finite = np.isfinite(columns.pressure) & np.isfinite(columns.composition).all(axis=1) & np.isfinite(
+        columns.adsorption).all(axis=1)
+    if columns.total_adsorption is not None:
+        finite &= np.isfinite(columns.total_adsorption)
+    checks = [
+        (~finite, 'Missing or infinite value (NaN or inf)'),
+        (columns.pressure < 0, 'Negative pressure'),
+    ]
+
+    if len(columns.inchikeys) > 1 and composition_type in FRACTION_COMPOSITION_TYPES:
+        deviation = np.abs(columns.composition.sum(axis=1) - 1)
+        checks.append(
+            (deviation > COMPOSITION_TOLERANCE, f'Compositions do not sum to 1 (tolerance {COMPOSITION_TOLERANCE})'))
+    if columns.total_adsorption is not None:
+        deviation = np.abs(columns.total_adsorption - columns.adsorption.sum(axis=1))
+        checks.append((deviation > TOTAL_ADSORPTION_TOLERANCE * np.abs(columns.total_adsorption),
+                       'Total adsorption differs from sum of adsorption of species '
+                       f'(tolerance {TOTAL_ADSORPTION_TOLERANCE:.0%})'))
+    return checks
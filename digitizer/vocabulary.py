@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""Controlled vocabularies (materials, gases, units, ...) fetched from the ISDB API.
+
+Vocabularies are fetched concurrently and only when first accessed, so that importing the digitizer does not block on
+network I/O. An offline snapshot (see digitizer.snapshot) allows starting without waiting for the API.
+"""
+import bisect
+import collections.abc
+import sys
+import threading
+import types
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .snapshot import read_snapshot, write_snapshot, SnapshotError
+
+BIBLIOGRAPHY_PATH = '/biblios.json'
+REQUEST_TIMEOUT = 60  # seconds
+
+# first option of select widgets
+SELECT_PROMPT = ('Select',)
+
+DOI_PREFIXES = ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:')
+
+# names offered in addition to the ones provided by the API
+EXTRA_NAMES = {
+    'isotherm_type': ['Not specified'],
+}
+
+
+def get_names(json_data):
+    """Return list of names and synonyms of all entries of a quantity."""
+    names = []
+    for entry in json_data:
+        names.append(entry['name'])
+        try:
+            names += entry['synonyms']
+        except KeyError:
+            pass
+    return names
+
+
+class FrozenList(list):
+    """List that cannot be modified.
+
+    Used for option lists that are shared by all widgets of all sessions.
+    Subclasses list, since panel widgets expect options to be lists.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('FrozenList is read-only')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+
+def get_options(names, prefix=()):
+    """Return shared, read-only option list with interned strings.
+
+    :param names: list of names
+    :param prefix: options to prepend, e.g. ('Select',)
+    """
+    return FrozenList(sys.intern(name) for name in list(prefix) + list(names))
+
+
+class QuantityIndex:
+    """Lookup tables for the entries of a quantity, built once per vocabulary load.
+
+    Maps names and synonyms (exact and case-folded) as well as hashkeys/InChIKeys to entries.
+    As for a linear scan, the first matching entry wins.
+    """
+    KEYS = ('hashkey', 'InChIKey')
+
+    def __init__(self, json_data):
+        """Build index.
+
+        :param json_data: JSON list of entries returned by the API
+        """
+        self.json = json_data
+        by_name = {}
+        by_casefold_name = {}
+        by_key = {key: {} for key in self.KEYS}
+        for entry in json_data:
+            for name in [entry['name']] + (entry.get('synonyms') or []):
+                by_name.setdefault(name, entry)
+                by_casefold_name.setdefault(name.casefold(), entry)
+            for key, index in by_key.items():
+                if entry.get(key):
+                    index.setdefault(entry[key], entry)
+
+        self.by_name = types.MappingProxyType(by_name)
+        self.by_casefold_name = types.MappingProxyType(by_casefold_name)
+        self.by_key = types.MappingProxyType({key: types.MappingProxyType(index) for key, index in by_key.items()})
+
+    def find_by_name(self, name):
+        """Find entry by name or synonym (falling back to case-insensitive match).
+
+        :raises ValueError: if no entry is found
+        """
+        try:
+            return self.by_name[name]
+        except KeyError:
+            pass
+        try:
+            return self.by_casefold_name[name.casefold()]
+        except (KeyError, AttributeError):
+            pass
+        raise ValueError(f'JSON for {name} not found.')
+
+    def find_by_key(self, value, key):
+        """Find entry by key, e.g. 'hashkey' or 'InChIKey'.
+
+        :raises ValueError: if no entry is found
+        """
+        try:
+            return self.by_key[key][value]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable value
+            raise ValueError(f'JSON for {value} not found.') from None
+
+        if key not in self.by_key:
+            # not indexed
+            for entry in self.json:
+                if entry.get(key) == value:
+                    return entry
+
+        raise ValueError(f'JSON for {value} not found.')
+
+
+def normalize_doi(doi):
+    """Normalize DOI for comparison.
+
+    DOIs are case-insensitive. Surrounding whitespace as well as 'doi:' and resolver prefixes are removed.
+    """
+    doi = doi.strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):].strip()
+    return doi
+
+
+class PrefixIndex:
+    """Sorted array of names for case-insensitive prefix completion.
+
+    Names are compared in lower case (matching the client-side filtering of bokeh's AutocompleteInput).
+    """
+    def __init__(self, names):
+        """Build index.
+
+        :param names: iterable of names (duplicates are dropped)
+        """
+        pairs = sorted({(name.lower(), name) for name in names})
+        self._keys = [key for key, _ in pairs]
+        self._names = [name for _, name in pairs]
+
+    def __len__(self):
+        return len(self._names)
+
+    def complete(self, prefix, limit):
+        """Return up to `limit` names starting with prefix (in alphabetical order)."""
+        key = prefix.lower()
+        start = bisect.bisect_left(self._keys, key)
+        completions = []
+        for i in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[i].startswith(key):
+                break
+            completions.append(self._names[i])
+        return completions
+
+
+EndpointData = collections.namedtuple('EndpointData', ['data', 'etag', 'last_modified'])
+EndpointData.__doc__ = """JSON returned by an API endpoint, together with validators for conditional requests."""
+
+
+class Vocabulary:  # pylint: disable=too-few-public-methods
+    """Snapshot of all vocabularies provided by the ISDB API.
+
+    Treat instances as immutable: in order to update vocabularies, create a new instance and swap it in.
+    """
+    def __init__(self, endpoints, quantity_paths, previous=None):
+        """Build vocabulary from API responses.
+
+        :param endpoints: dict mapping API path to EndpointData
+        :param quantity_paths: dict mapping quantity (e.g. 'adsorbents') to API path (e.g. '/materials.json')
+        :param previous: previous Vocabulary (optional). Options and indexes of unchanged endpoints are reused.
+        """
+        self.endpoints = endpoints
+        self.quantities = {}
+        self.indexes = {}
+        self.prefix_indexes = {}
+        for quantity, path in quantity_paths.items():
+            json_data = endpoints[path].data
+            if previous and quantity in previous.quantities and previous.quantities[quantity]['json'] is json_data:
+                self.quantities[quantity] = previous.quantities[quantity]
+                self.indexes[quantity] = previous.indexes[quantity]
+                self.prefix_indexes[quantity] = previous.prefix_indexes[quantity]
+                continue
+            names = get_options(get_names(json_data) + EXTRA_NAMES.get(quantity, []))
+            self.quantities[quantity] = {
+                'json': json_data,
+                'names': names,
+                'select_options': get_options(names, prefix=SELECT_PROMPT),
+            }
+            self.indexes[quantity] = QuantityIndex(json_data)
+            self.prefix_indexes[quantity] = PrefixIndex(self.quantities[quantity]['names'])
+        self.bibliography = endpoints[BIBLIOGRAPHY_PATH].data
+        self.dois = frozenset(normalize_doi(entry['DOI']) for entry in self.bibliography)
+
+
+def fetch_endpoint(url, session=None, cached=None):
+    """Fetch JSON from URL.
+
+    :param url: URL to fetch
+    :param session: requests session (optional)
+    :param cached: EndpointData from a previous fetch (optional). If provided, the request is made conditional on
+        the content having changed.
+    :returns: tuple (EndpointData, whether content changed with respect to cached, elapsed time in seconds)
+    """
+    headers = {'Cache-Control': 'no-cache'} if cached else {}
+    if cached and cached.etag:
+        headers['If-None-Match'] = cached.etag
+    if cached and cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+
+    if session is None:
+        import requests  # pylint: disable=import-outside-toplevel
+        session = requests
+
+    start = time.perf_counter()
+    response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if cached and response.status_code == 304:
+        return cached, False, time.perf_counter() - start
+    response.raise_for_status()
+    endpoint = EndpointData(data=response.json(),
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified'))
+    if cached is None or endpoint.data != cached.data:
+        return endpoint, True, time.perf_counter() - start
+    return endpoint._replace(data=cached.data), False, time.perf_counter() - start
+
+
+def fetch_endpoints(base_url, paths, session=None, cached=None, max_workers=None):
+    """Fetch several API endpoints concurrently.
+
+    :param base_url: base URL of the API
+    :param paths: API paths to fetch, e.g. ['/materials.json', ...]
+    :param session: requests session (optional)
+    :param cached: dict mapping API path to EndpointData from a previous fetch (optional)
+    :param max_workers: number of threads (defaults to one per endpoint)
+    :returns: tuple (dict mapping path to EndpointData, set of changed paths, dict mapping path to elapsed time)
+    """
+    paths = list(paths)
+    cached = cached or {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(paths)) as executor:
+        futures = {path: executor.submit(fetch_endpoint, base_url + path, session, cached.get(path)) for path in paths}
+        results = {path: future.result() for path, future in futures.items()}
+
+    endpoints = {path: result[0] for path, result in results.items()}
+    changed = {path for path, result in results.items() if result[1]}
+    timings = {path: result[2] for path, result in results.items()}
+    return endpoints, changed, timings
+
+
+class VocabularyLoader:  # pylint: disable=too-many-instance-attributes
+    """Loads the vocabulary on first access and keeps it up to date.
+
+    If a snapshot path is given, the vocabulary is read from the snapshot (if present) and revalidated against the
+    API in a background thread. Otherwise, it is fetched from the API.
+    If a refresh interval is given, the vocabulary is refreshed periodically in a background thread, swapping in
+    a new vocabulary whenever the API reports changes. Use :meth:`subscribe` to be notified of such changes.
+
+    Thread-safe: concurrent callers of :meth:`get` wait for a single load.
+    """
+    def __init__(  # pylint: disable=too-many-arguments
+            self,
+            base_url,
+            quantity_paths,
+            session_factory=None,
+            snapshot_path=None,
+            revalidate=True,
+            refresh_interval=None,
+            report=print):
+        """Create loader.
+
+        :param base_url: base URL of the API
+        :param quantity_paths: dict mapping quantity (e.g. 'adsorbents') to API path (e.g. '/materials.json')
+        :param session_factory: callable returning the requests session to use (optional)
+        :param snapshot_path: path of offline vocabulary snapshot (optional)
+        :param revalidate: whether to revalidate a snapshot against the API in the background after loading it
+        :param refresh_interval: interval between background refreshes in seconds (optional)
+        :param report: function called with status messages, i.e. timings and errors of loads and refreshes
+        """
+        self.base_url = base_url
+        self.quantity_paths = dict(quantity_paths)
+        self.session_factory = session_factory
+        self.snapshot_path = snapshot_path
+        self.revalidate = revalidate
+        self.refresh_interval = refresh_interval
+        self.report = report
+        self.timings = {}
+        self.refresh_thread = None
+        self._vocabulary = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
+        self._subscribers = []
+        self.version = 0  # incremented whenever the vocabulary is replaced
+
+    @property
+    def paths(self):
+        """All API paths to fetch."""
+        return list(self.quantity_paths.values()) + [BIBLIOGRAPHY_PATH]
+
+    @property
+    def loaded(self):
+        """Whether the vocabulary has been materialized."""
+        return self._vocabulary is not None
+
+    def get(self):
+        """Return vocabulary, loading it if necessary."""
+        vocabulary = self._vocabulary
+        if vocabulary is None:
+            with self._lock:
+                if self._vocabulary is None:
+                    self._vocabulary = self._initial_load()
+                vocabulary = self._vocabulary
+        return vocabulary
+
+    def set(self, vocabulary):
+        """Replace the current vocabulary (atomically) and notify subscribers."""
+        self._vocabulary = vocabulary
+        self.version += 1
+        for callback in list(self._subscribers):
+            callback(vocabulary)
+
+    def subscribe(self, callback):
+        """Register callback to be called with the new vocabulary whenever it is replaced.
+
+        Note: Callbacks are called from the thread replacing the vocabulary (usually the refresh thread).
+        """
+        self._subscribers.append(callback)
+
+    def _initial_load(self):
+        """Load from snapshot if possible, otherwise from the API."""
+        if self.snapshot_path:
+            try:
+                vocabulary = self.load_snapshot()
+            except SnapshotError as exc:
+                self.report(str(exc))
+            else:
+                self._start_refresh_thread(refresh_now=self.revalidate)
+                return vocabulary
+
+        vocabulary = self.load()
+        self._start_refresh_thread(refresh_now=False)
+        self._update_snapshot(vocabulary)
+        return vocabulary
+
+    def _start_refresh_thread(self, refresh_now):
+        """Start background thread refreshing the vocabulary (if needed)."""
+        if not (refresh_now or self.refresh_interval):
+            return
+        self.refresh_thread = threading.Thread(target=self._refresh_loop,
+                                               args=(refresh_now, ),
+                                               name='vocabulary-refresh',
+                                               daemon=True)
+        self.refresh_thread.start()
+
+    def _refresh_loop(self, refresh_now):
+        """Refresh vocabulary periodically until stopped."""
+        if refresh_now:
+            self.refresh()
+        while self.refresh_interval and not self._stop_refresh.wait(self.refresh_interval):
+            self.refresh()
+
+    def stop(self):
+        """Stop background refresh."""
+        self._stop_refresh.set()
+
+    def load(self, cached=None, previous=None):
+        """Fetch all endpoints concurrently and build a new vocabulary.
+
+        Timings per endpoint are stored in self.timings and reported.
+
+        :param cached: dict mapping API path to EndpointData for conditional requests (optional)
+        :param previous: previous Vocabulary, whose options and indexes are reused for unchanged endpoints (optional)
+        :returns: Vocabulary instance, or None if cached was provided and nothing changed
+        """
+        start = time.perf_counter()
+        session = self.session_factory() if self.session_factory else None
+        endpoints, changed, self.timings = fetch_endpoints(self.base_url, self.paths, session=session, cached=cached)
+        for path, elapsed in self.timings.items():
+            self.report(f'Fetched {path} in {elapsed:.2f}s' + ('' if path in changed else ' (not modified)'))
+        self.report(f'Fetched vocabulary from {self.base_url} in {time.perf_counter() - start:.2f}s')
+
+        if cached is not None and not changed:
+            return None
+        return Vocabulary(endpoints, self.quantity_paths, previous=previous)
+
+    def load_snapshot(self):
+        """Build vocabulary from offline snapshot.
+
+        :raises SnapshotError: if snapshot cannot be used
+        """
+        start = time.perf_counter()
+        endpoints = read_snapshot(self.snapshot_path, base_url=self.base_url)
+        try:
+            vocabulary = Vocabulary({path: EndpointData(**endpoints[path]) for path in self.paths}, self.quantity_paths)
+        except (KeyError, TypeError) as exc:
+            raise SnapshotError(f'Vocabulary snapshot {self.snapshot_path} incomplete: {exc}') from exc
+        self.report(f'Loaded vocabulary snapshot {self.snapshot_path} in {time.perf_counter() - start:.3f}s')
+        return vocabulary
+
+    def save_snapshot(self, vocabulary=None):
+        """Write current (or given) vocabulary to the snapshot path."""
+        vocabulary = vocabulary or self.get()
+        write_snapshot(self.snapshot_path, self.base_url, vocabulary.endpoints)
+
+    def _update_snapshot(self, vocabulary, raise_errors=False):
+        """Write vocabulary to the snapshot path (if any), reporting errors unless raise_errors is set."""
+        if not self.snapshot_path:
+            return
+        try:
+            self.save_snapshot(vocabulary)
+        except OSError as exc:
+            if raise_errors:
+                raise
+            self.report(f'Unable to write vocabulary snapshot: {exc}')
+
+    def refresh(self, raise_errors=False):
+        """Revalidate current vocabulary against the API using conditional requests.
+
+        Only changed endpoints are downloaded, and only their options and indexes are rebuilt.
+        The vocabulary (and snapshot) are only replaced if content changed.
+
+        :param raise_errors: raise errors fetching the vocabulary or writing the snapshot, instead of printing them
+        :raises requests.RequestException, ValueError, OSError: if raise_errors is set
+        :returns: True if the vocabulary was updated, False if nothing changed (or on errors, see raise_errors)
+        """
+        from requests import RequestException  # pylint: disable=import-outside-toplevel
+
+        with self._refresh_lock:
+            current = self.get()
+            try:
+                vocabulary = self.load(cached=current.endpoints, previous=current)
+            except (RequestException, ValueError) as exc:
+                if raise_errors:
+                    raise
+                self.report(f'Unable to refresh vocabulary: {exc}')
+                return False
+            if vocabulary is None:
+                return False
+            self.set(vocabulary)
+
+        self._update_snapshot(vocabulary, raise_errors)
+        return True
+
+
+class LazyMapping(collections.abc.Mapping):
+    """Read-only mapping whose content is resolved on every access.
+
+    Allows module-level constants like ``QUANTITIES`` to be imported without triggering the underlying load.
+    """
+    def __init__(self, getter):
+        """Create lazy mapping.
+
+        :param getter: callable returning the actual mapping
+        """
+        self._getter = getter
+
+    def __getitem__(self, key):
+        return self._getter()[key]
+
+    def __iter__(self):
+        return iter(self._getter())
+
+    def __len__(self):
+        return len(self._getter())
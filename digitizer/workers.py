@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Background executor for work that must not block the Bokeh event loop (e.g. writing submissions).
+
+Panel widgets may be updated from background tasks: Panel schedules the changes on the session's event loop.
+"""
+import functools
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .config import BACKGROUND_WORKERS
+
+_pending = {}  # (id of cache, key) -> Future of a value being computed
+_pending_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def get_executor():
+    """Return executor shared by all sessions of the process (created on first use)."""
+    return ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='digitizer-background')
+
+
+def _print_exception(future):
+    """Print traceback of a failed background task (nobody may be waiting for its result)."""
+    if not future.cancelled() and future.exception() is not None:
+        exc = future.exception()
+        print(''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+
+
+def run_in_background(function, *args, **kwargs):
+    """Run function on the background executor.
+
+    :returns: concurrent.futures.Future
+    """
+    future = get_executor().submit(function, *args, **kwargs)
+    future.add_done_callback(_print_exception)
+    return future
+
+
+def get_in_background(cache, key, compute, stage=None):
+    """Return value from cache without blocking; on a miss, compute it on the background executor.
+
+    Concurrent requests for the same key share one computation.
+
+    :param cache: LRUCache
+    :param key: hashable key
+    :param compute: function without arguments returning the value
+    :param stage: label for hit rate statistics
+    :returns: concurrent.futures.Future of the value (already done for cached values)
+    """
+    pending_key = (id(cache), key)
+    with _pending_lock:
+        future = _pending.get(pending_key)
+        if future is not None:
+            return future
+        if key in cache:
+            future = Future()
+            future.set_result(cache.get(key, compute, stage=stage))
+            return future
+        future = _pending[pending_key] = run_in_background(_get_pending, cache, key, compute, stage)
+    return future
+
+
+def _get_pending(cache, key, compute, stage):
+    """Compute value of get_in_background and store it in the cache."""
+    try:
+        return cache.get(key, compute, stage=stage)
+    finally:
+        with _pending_lock:
+            del _pending[(id(cache), key)]
@@ -24,15 +24,20 @@ if __name__ == '__main__':
                 'bokeh~=2.4.1',
                 'traitlets~=5.1.1',
                 'requests~=2.26.0',
-                'requests_cache~=0.8.1',
-                'pandas~=1.3.4',
+                'requests_cache~=1.1',
+                'numpy',
                 'pydenticon~=0.3.1',
+                'Pillow',
                 #crossrefapi
                 #python-dateutil
                 #ase
                 #manage-crystal
             ],
+            entry_points={
+                'console_scripts': ['digitizer-snapshot=digitizer.snapshot:main'],
+            },
             extras_require={
+                'fast-json': ['orjson~=3.8'],
                 'pre-commit': [
                     'pre-commit~=2.15',
                     'pylint~=2.11.1',
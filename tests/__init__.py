@@ -1,6 +1,70 @@
 # -*- coding: utf-8 -*-
 """Test utility variables."""
 import os
+import http.server
+import threading
+import time
 
 THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 TESTS_STATIC_DIR = os.path.join(THIS_DIR, 'static')
+TESTS_API_DIR = os.path.join(TESTS_STATIC_DIR, 'api')
+
+
+class ApiServer:
+    """Local stand-in for the ISDB API, serving the JSON files in tests/static/api.
+
+    Usage::
+
+        with ApiServer(delay=0.1) as server:
+            requests.get(server.base_url + '/gases.json')
+    """
+    def __init__(self, directory=TESTS_API_DIR, delay=0.0):
+        """Create server (not yet started).
+
+        :param directory: directory with JSON files to serve
+        :param delay: artificial latency per request in seconds
+        """
+        self.directory = directory
+        self.delay = delay
+        self.requests = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base URL of the API."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Start serving in a background thread."""
+        server = self
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            """Serve files with artificial latency."""
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=server.directory, **kwargs)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                server.requests.append(self.path)
+                time.sleep(server.delay)
+                super().do_GET()
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Point the digitizer to a local stand-in for the ISDB API during tests."""
+import os
+import shutil
+import tempfile
+
+from . import ApiServer
+
+API_SERVER = ApiServer()
+SNAPSHOT_DIR = tempfile.mkdtemp()
+
+
+def pytest_configure(config):  # pylint: disable=unused-argument
+    """Start API server before digitizer.config is imported."""
+    API_SERVER.start()
+    os.environ['DIGITIZER_API_URL'] = API_SERVER.base_url
+    os.environ['DIGITIZER_HTTP_CACHE'] = 'memory'
+    os.environ['DIGITIZER_VOCABULARY_SNAPSHOT'] = os.path.join(SNAPSHOT_DIR, 'vocabulary.json.gz')
+
+
+def pytest_unconfigure(config):  # pylint: disable=unused-argument
+    """Stop API server."""
+    API_SERVER.stop()
+    shutil.rmtree(SNAPSHOT_DIR)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Test zip archives of precompressed entries and the submission archive."""
+import io
+import os
+import zipfile
+
+from digitizer.archive import compress_entry, compress_entries, get_zip_bytes, write_zip
+from digitizer.submission import Submissions
+from digitizer.workers import get_executor
+from .test_submission import _load_isotherm, SAMPLE_ISOTHERMS
+
+
+def test_write_zip():
+    """Archives can be read by zipfile."""
+    entries = [
+        compress_entry('a/data.json', b'{"a": 1}' * 100),
+        compress_entry('a/figure_ä.png', b'\x89PNG', compress_type=zipfile.ZIP_STORED),
+        compress_entry('empty.txt', b''),
+    ]
+    memfile = io.BytesIO()
+    size = write_zip(memfile, entries)
+    assert size == len(memfile.getvalue())
+    assert get_zip_bytes(entries) == memfile.getvalue()
+
+    with zipfile.ZipFile(memfile) as zhandle:
+        assert zhandle.testzip() is None
+        assert zhandle.namelist() == ['a/data.json', 'a/figure_ä.png', 'empty.txt']
+        assert zhandle.read('a/data.json') == b'{"a": 1}' * 100
+        assert zhandle.getinfo('a/figure_ä.png').compress_type == zipfile.ZIP_STORED
+
+
+def test_submission_zip_cached():
+    """Appended isotherms are compressed in the background, once."""
+    submissions = Submissions()
+    submissions.append(_load_isotherm(SAMPLE_ISOTHERMS[0]))
+    submissions._precompress_future.result(timeout=10)  # pylint: disable=protected-access
+    assert submissions.zip_cache.misses['zip'] == 1
+    first = submissions.get_zip_file().getvalue()
+    assert submissions.zip_cache.hits['zip'] == 1
+
+    submissions.append(_load_isotherm(SAMPLE_ISOTHERMS[1]))
+    submissions._precompress_future.result(timeout=10)  # pylint: disable=protected-access
+    memfile = submissions.get_zip_file()
+    assert submissions.zip_cache.misses['zip'] == 2
+
+    with zipfile.ZipFile(memfile) as zhandle, zipfile.ZipFile(io.BytesIO(first)) as first_zhandle:
+        assert len(zhandle.namelist()) == 2
+        name = first_zhandle.namelist()[0]
+        assert zhandle.read(name) == first_zhandle.read(name)
+
+
+def test_compression_policy():
+    """Figures are stored, JSON is deflated at the given level; parallel compression keeps the order."""
+    json_data = b'{"pressure": 1.0}' * 1000
+    entries = compress_entries([('a.json', lambda: json_data), ('a.PNG', lambda: b'\x89PNG' * 100),
+                                ('b.json', lambda: json_data)],
+                               level=1,
+                               executor=get_executor())
+    assert [entry.arcname for entry in entries] == ['a.json', 'a.PNG', 'b.json']
+    assert [entry.compress_type for entry in entries] == [
+        zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED
+    ]
+    assert entries[1].data == b'\x89PNG' * 100
+    assert len(entries[0].data) < len(json_data) / 10
+
+
+def test_submit(tmp_path, monkeypatch):
+    """Submissions are written in the background."""
+    monkeypatch.setattr('digitizer.submission.SUBMISSION_FOLDER', str(tmp_path))
+    submissions = Submissions()
+    submissions.append(_load_isotherm(SAMPLE_ISOTHERMS[0]))
+
+    future = submissions.on_click_submit(None)
+    assert submissions.btn_submit.disabled
+    future.result(timeout=10)
+
+    assert not submissions.btn_submit.disabled
+    assert submissions.progress.value == 100
+    filename, = os.listdir(tmp_path)
+    assert filename in submissions.status.object
+    with zipfile.ZipFile(tmp_path / filename) as zhandle:
+        assert zhandle.testzip() is None
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Test server-side autocompletion of vocabulary names."""
+from digitizer.autocomplete import get_autocomplete_input
+from digitizer.vocabulary import PrefixIndex
+
+
+def test_prefix_index():
+    """Prefix index returns the first matches in alphabetical order, case-insensitively."""
+    index = PrefixIndex(['Zeolite 5A', 'zeolite 13X', 'ZIF-8', 'Zeolite 5A', 'MOF-5'])
+    assert len(index) == 4
+    assert index.complete('zeo', 10) == ['zeolite 13X', 'Zeolite 5A']
+    assert index.complete('Z', 2) == ['zeolite 13X', 'Zeolite 5A']
+    assert index.complete('x', 10) == []
+
+
+def test_server_mode():
+    """In server mode, only completions for the typed prefix are sent."""
+    widget = get_autocomplete_input('adsorbates', mode='server', max_options=2)
+    assert widget.options == []
+
+    widget.value_input = 'meth'
+    assert widget.options == ['Methane']
+
+    widget.value = 'Methane'
+    widget.value_input = 'et'
+    assert widget.options == ['Ethane', 'Methane']  # current value is kept
+
+
+def test_client_mode():
+    """In client mode, or for small vocabularies, all names are sent."""
+    widget = get_autocomplete_input('adsorbates', mode='client', max_options=2)
+    assert 'Methane' in widget.options
+    widget = get_autocomplete_input('adsorbates', mode='server')
+    assert 'Methane' in widget.options
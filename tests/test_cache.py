@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Test size-bounded LRU cache and caching of the stages of the isotherm check."""
+import types
+import pytest
+
+from digitizer.cache import LRUCache
+
+
+def test_lru_cache():
+    """Values are evicted by total size, least recently used first."""
+    evicted = []
+    cache = LRUCache(max_size=3, sizeof=lambda value: 1, on_evict=lambda key, value: evicted.append(key))
+    for key in 'abc':
+        assert cache.get(key, lambda key=key: key.upper(), stage='letters') == key.upper()
+    assert cache.get('a', lambda: None, stage='letters') == 'A'
+    cache.get('d', lambda: 'D', stage='letters')
+
+    assert 'b' not in cache and evicted == ['b']
+    assert 'a' in cache
+    assert len(cache) == cache.size == 3
+    assert cache.hit_rate('letters') == 1 / 5
+    assert cache.hit_rate('numbers') is None
+
+    cache.put('large', 'value')
+    assert evicted == ['b', 'c']
+    with pytest.raises(ValueError):
+        cache.get('error', lambda: int('x'))
+    assert 'error' not in cache
+    assert 'letters: 1/5 hits' in cache.report()
+
+
+def test_check_uses_stage_cache():
+    """Checking again after editing the comment reuses lookups and parsed data."""
+    from digitizer.forms import IsothermSingleComponentForm  # pylint: disable=import-outside-toplevel
+    from digitizer.parse import prepare_isotherm_data  # pylint: disable=import-outside-toplevel
+
+    form = IsothermSingleComponentForm(tabs=None)
+    form.on_click_populate(None)
+    cache = form.stage_cache
+
+    _, columns = prepare_isotherm_data(form, cache=cache)
+    form.inp_comment.value = 'edited'
+    data, cached_columns = prepare_isotherm_data(form, cache=cache)
+    assert data['custom'] == 'edited'
+    assert cached_columns is columns
+    assert cache.hit_rate('parse') == cache.hit_rate('lookup') == 0.5
+
+    form.inp_isotherm_data.value += '\n100.0,0.4'
+    _, columns = prepare_isotherm_data(form, cache=cache)
+    assert len(columns) == len(cached_columns) + 1
+
+
+def test_check_reports_stage_cache(monkeypatch, capsys):
+    """Hit rates of the stage cache are printed after each check in debug mode."""
+    from digitizer import config  # pylint: disable=import-outside-toplevel
+    from digitizer.forms import IsothermSingleComponentForm  # pylint: disable=import-outside-toplevel
+
+    monkeypatch.setattr(config, 'DEBUG', True)
+    form = IsothermSingleComponentForm(tabs=types.SimpleNamespace(active=0))
+    form.on_click_populate(None)
+    form.on_click_check(None)
+    form.on_click_check(None)
+    assert 'parse: 1/2 hits' in capsys.readouterr().out.splitlines()[-1]
+    assert form.isotherm is not None and form.tabs.active == 2
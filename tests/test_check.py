@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Test isotherm plot of the Check view."""
+import numpy as np
+import pytest
+import bokeh.models as bmd
+from bokeh import events
+from bokeh.document import Document
+from bokeh.document.events import ColumnsPatchedEvent, ColumnsStreamedEvent
+
+from digitizer.check import IsothermPlot, SubmissionsOverlay, update_source
+from digitizer.columns import IsothermColumns
+from digitizer.submission import Isotherm, Submissions
+
+METADATA = {
+    'articleSource': 'Figure 1',
+    'DOI': '10.1000/1',
+    'adsorbent': {
+        'name': 'Zeolite 5A'
+    },
+    'temperature': 298,
+    'pressureUnits': 'bar',
+    'adsorptionUnits': 'mmol/g',
+}
+
+
+def _get_isotherm(n_species, n_points=10):
+    """Synthetic isotherm."""
+    pressure = np.arange(n_points, dtype=float)
+    adsorption = np.column_stack([pressure * (i + 1) for i in range(n_species)])
+    inchikeys = [f'KEY{i}' for i in range(n_species)]
+    columns = IsothermColumns(pressure, inchikeys, np.ones_like(adsorption) / n_species, adsorption)
+    adsorbates = [{'InChIKey': inchikey, 'name': f'Gas {i}'} for i, inchikey in enumerate(inchikeys)]
+    return Isotherm(dict(METADATA, adsorbates=adsorbates), columns=columns)
+
+
+def _get_updates(source):
+    """Return list recording how source is updated ('patch', 'stream' or 'data')."""
+    updates = []
+    doc = Document()
+    doc.add_root(source)
+
+    def on_change(event):
+        hint = getattr(event, 'hint', None)
+        updates.append({ColumnsPatchedEvent: 'patch', ColumnsStreamedEvent: 'stream'}.get(type(hint), event.attr))
+
+    doc.on_change(on_change)
+    return updates
+
+
+def test_update_source():
+    """Changed values are patched, new rows streamed and everything else replaced."""
+    x = np.arange(10, dtype=float)  # pylint: disable=invalid-name
+    source = bmd.ColumnDataSource(data=dict(x=x, y=np.full(10, np.nan)))
+    updates = _get_updates(source)
+
+    update_source(source, dict(x=x, y=np.full(10, np.nan)))
+    assert not updates
+
+    y = np.full(12, np.nan)  # pylint: disable=invalid-name
+    y[3] = 1.0
+    update_source(source, dict(x=np.arange(12, dtype=float), y=y))
+    assert updates == ['patch', 'stream']
+    np.testing.assert_array_equal(source.data['y'], y)
+
+    update_source(source, dict(x=-x, y=x))
+    assert updates == ['patch', 'stream', 'data']
+    np.testing.assert_array_equal(source.data['x'], -x)
+
+
+def test_plot_updated_in_place():
+    """Updating the plot reuses figures and glyphs; species are added or hidden as needed."""
+    plot = IsothermPlot()
+    linear, log = plot.figures['linear'], plot.figures['log']
+
+    plot.update(_get_isotherm(3))
+    assert len(plot.sources) == 3
+    assert [item.label['value'] for item in linear.legend.items] == ['Gas 0', 'Gas 1', 'Gas 2']
+
+    plot.update(_get_isotherm(1))
+    assert plot.figures == {'linear': linear, 'log': log}
+    assert len(plot.sources) == 3
+    assert [item.visible for item in log.legend.items] == [True, False, False]
+    assert not plot.sources[2].data['pressure']
+    assert linear.select_one(bmd.HoverTool).tooltips[0] == ('Pressure [bar]', '@pressure')
+
+    plot.set_scale('log')
+    assert log.visible and not linear.visible
+
+
+def test_plot_downsampled():
+    """Large isotherms are downsampled and refined on zoom."""
+    plot = IsothermPlot(max_points=100)
+    plot.update(_get_isotherm(2, n_points=10000))
+    assert len(plot.sources[1].data['pressure']) <= 104
+    assert plot.sources[1].data['adsorption'][-1] == 2 * 9999
+
+    plot.on_ranges_update(events.RangesUpdate(plot.figures['linear'], x0=100, x1=200, y0=0, y1=1000))
+    pressure = plot.sources[0].data['pressure']
+    assert ((pressure >= 100) & (pressure <= 200)).sum() >= 95
+
+    plot.on_reset(events.Reset(plot.figures['linear']))
+    assert len(plot.sources[0].data['pressure']) <= 104
+
+
+def test_plot_zoom_reset_for_other_isotherm():
+    """The zoom is kept when the isotherm is checked again, but not for another isotherm."""
+    plot = IsothermPlot(max_points=100)
+    plot.update(_get_isotherm(1, n_points=10000))
+    plot.on_ranges_update(events.RangesUpdate(plot.figures['linear'], x0=100, x1=200, y0=0, y1=1000))
+
+    plot.update(_get_isotherm(1, n_points=10000))  # re-check creates a new Isotherm
+    assert plot.viewport == (100, 200, 0, 1000)
+
+    other = _get_isotherm(1, n_points=10000)
+    other.update(articleSource='Figure 2')
+    plot.update(other)
+    assert plot.viewport is None
+    pressure = plot.sources[0].data['pressure']
+    assert len(pressure) <= 104 and pressure[-1] == 9999
+
+
+def test_plot_ranges_reset_for_other_isotherm():
+    """The ranges of both figures are reset to the data bounds for another isotherm, but kept on re-check."""
+    plot = IsothermPlot()
+    plot.update(_get_isotherm(1))
+    assert plot.figures['linear'].x_range.start is None  # not shown yet: follows the data
+
+    for p in plot.figures.values():  # pylint: disable=invalid-name
+        # ranges synchronized from the browser after zooming
+        p.x_range.update(start=2, end=3)
+        p.y_range.update(start=2, end=3)
+    plot.update(_get_isotherm(1))
+    assert plot.figures['log'].x_range.start == 2
+
+    other = _get_isotherm(2, n_points=101)
+    other.update(articleSource='Figure 2')
+    plot.update(other)
+    linear, log = plot.figures['linear'], plot.figures['log']
+    assert (linear.x_range.start, linear.x_range.end) == pytest.approx((-5, 105))
+    assert (linear.y_range.start, linear.y_range.end) == pytest.approx((-10, 210))
+    assert (log.y_range.start, log.y_range.end) == pytest.approx((-10, 210))
+    assert (log.x_range.start, log.x_range.end) == pytest.approx((10**-0.1, 10**2.1))
+
+
+def test_overlay():
+    """Isotherms of the submission stack are streamed to the overlay, hidden, filtered and removed."""
+    submissions = Submissions()
+    overlay = SubmissionsOverlay(submissions)
+    updates = _get_updates(overlay.points)
+    isotherms = [_get_isotherm(n_species) for n_species in [1, 2, 1]]
+    isotherms[2].update(temperature=77)
+    for isotherm in isotherms:
+        submissions.append(isotherm)
+    assert len(overlay.lines.data['xs']) == 4
+    assert len(overlay.points.data['x']) == 40
+    assert updates == ['stream'] * 3
+
+    overlay.inp_visible.value = ['0', '2']
+    assert list(overlay.lines.data['xs'][1]) == []
+    assert np.isnan(overlay.points.data['x'][10:30]).all()
+    overlay.inp_visible.value = ['0', '1', '2']
+    np.testing.assert_array_equal(overlay.points.data['y'][20:30], 2 * np.arange(10))
+
+    overlay.inp_filter.value = '1'
+    assert overlay.point_view.filters[0].group == '1'
+
+    submissions.remove(isotherms[1])
+    assert overlay.inp_filter.value == ''
+    assert len(overlay.points.data['x']) == 40
+    submissions.remove(isotherms[0])
+    assert overlay.points.data['key'] == ['2'] * 10
+    assert overlay.entries['2']['points'] == range(0, 10)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Test columnar representation of isotherm data."""
+import hashlib
+import os
+import glob
+import json
+import numpy as np
+import pytest
+
+from digitizer import columns as columns_module
+from digitizer.columns import IsothermColumns
+from digitizer.parse import parse_isotherm_columns
+from . import TESTS_STATIC_DIR
+
+SAMPLE_ISOTHERMS = glob.glob(os.path.join(TESTS_STATIC_DIR, '*.json'))
+ADSORBATES = [{
+    'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N',
+    'name': 'Methane'
+}, {
+    'InChIKey': 'CURLTUGMZLYLDI-UHFFFAOYSA-N',
+    'name': 'Carbon dioxide'
+}]
+
+
+def _to_float(isotherm_data):
+    """Convert numbers stored as strings in sample files."""
+    for measurement in isotherm_data:
+        for species in measurement['species_data']:
+            species['composition'] = float(species['composition'])
+    return isotherm_data
+
+
+@pytest.mark.parametrize('filename', SAMPLE_ISOTHERMS)
+def test_json_round_trip(filename):
+    """Converting ISDB JSON to columns and back preserves the isotherm data."""
+    with open(filename, 'r', encoding='utf8') as handle:
+        isotherm_data = _to_float(json.load(handle)['isotherm_data'])
+
+    columns = IsothermColumns.from_json(isotherm_data)
+    assert len(columns) == len(isotherm_data)
+    assert columns.to_json() == isotherm_data
+    assert IsothermColumns.from_json(columns.to_json()) == columns
+
+
+def test_from_table():
+    """Columns of the isotherm data field are mapped to species."""
+    columns = parse_isotherm_columns('1 0.2 0.5 0.8 1.5\n2 0.3 0.7 0.7 2.1', ADSORBATES, form_type='multi-component')
+    assert columns.inchikeys == ('VNWKTOKETHGBQD-UHFFFAOYSA-N', 'CURLTUGMZLYLDI-UHFFFAOYSA-N')
+    assert columns.total_adsorption is None
+    np.testing.assert_array_equal(columns.composition, [[0.2, 0.8], [0.3, 0.7]])
+    np.testing.assert_array_equal(columns.adsorption[:, 1], [1.5, 2.1])
+
+    with pytest.raises(ValueError):
+        columns.pressure[0] = 3.0
+
+    columns = parse_isotherm_columns('1 2\n3 4', ADSORBATES[:1])
+    np.testing.assert_array_equal(columns.composition[:, 0], [1.0, 1.0])
+    np.testing.assert_array_equal(columns.total_adsorption, [2.0, 4.0])
+
+
+def test_parsed_columns_not_copied(monkeypatch):
+    """Columns of a read-only table are views of it; hashing them does not depend on the memory layout."""
+    monkeypatch.setattr(columns_module, 'HASH_BLOCK_SIZE', 4)  # hash views in several blocks
+    hashes = []
+    for writeable in [False, True]:
+        table = np.arange(30.0).reshape(6, 5)
+        table.flags.writeable = writeable
+        columns = IsothermColumns.from_table(table, [adsorbate['InChIKey'] for adsorbate in ADSORBATES],
+                                             'multi-component')
+        assert np.shares_memory(columns.adsorption, table) == (not writeable)
+        hasher = hashlib.sha256()
+        columns.update_hash(hasher)
+        hashes.append(hasher.digest())
+    assert hashes[0] == hashes[1]
+
+
+@pytest.mark.parametrize('table,form_type', [([[1, 0.2, 0.5, 0.8, 1.5, 2.0]], 'multi-component'),
+                                             ([[1, 0.2, 0.5, 0.8, 1.5]], 'multi-component'),
+                                             ([[1, 2], [3, 4]], 'single-component')])
+def test_to_table(table, form_type):
+    """Tables of the isotherm data field are restored from columns."""
+    table = np.array(table, dtype=float)
+    columns = IsothermColumns.from_table(table, [adsorbate['InChIKey'] for adsorbate in ADSORBATES], form_type)
+    np.testing.assert_array_equal(columns.to_table(form_type), table)
+
+
+def test_missing_species():
+    """Species missing from some measurements are stored as NaN and omitted on export."""
+    isotherm_data = [
+        {
+            'pressure': 1.0,
+            'species_data': [{
+                'InChIKey': 'A',
+                'composition': 0.5,
+                'adsorption': 1.0
+            }]
+        },
+        {
+            'pressure': 2.0,
+            'species_data': [{
+                'InChIKey': 'B',
+                'composition': 0.5,
+                'adsorption': 2.0
+            }],
+            'total_adsorption': 2.0
+        },
+    ]
+    columns = IsothermColumns.from_json(isotherm_data)
+    assert columns.inchikeys == ('A', 'B')
+    assert np.isnan(columns.adsorption[0, 1])
+    assert columns.to_json() == isotherm_data
+    assert columns.sorted().inchikeys == ('A', 'B')
+
+
+def test_missing_field():
+    """Missing fields of a species are stored as NaN and omitted on export; non-numeric values raise ValueError."""
+    isotherm_data = [
+        {
+            'pressure': 1.0,
+            'species_data': [{
+                'InChIKey': 'A',
+                'adsorption': 1.0
+            }, {
+                'InChIKey': 'B',
+                'composition': 0.5,
+                'adsorption': 2.0
+            }]
+        },
+    ]
+    columns = IsothermColumns.from_json(isotherm_data)
+    assert np.isnan(columns.composition[0, 0])
+    assert columns.to_json() == isotherm_data
+    assert IsothermColumns.from_json(columns.to_json()) == columns
+
+    isotherm_data[0]['species_data'][0]['adsorption'] = 'n/a'
+    with pytest.raises(ValueError, match='Measurement 1'):
+        IsothermColumns.from_json(isotherm_data)
+
+
+def test_isotherm_json_is_lazy():
+    """Isotherm keeps columns and builds JSON on export."""
+    from digitizer.submission import Isotherm  # pylint: disable=import-outside-toplevel
+
+    with open(SAMPLE_ISOTHERMS[0], 'r', encoding='utf8') as handle:
+        isotherm_dict = json.load(handle)
+    isotherm = Isotherm(isotherm_dict)
+    assert 'isotherm_data' not in isotherm.metadata
+    assert isotherm._json is None  # pylint: disable=protected-access
+
+    assert len(isotherm.json['isotherm_data']) == len(isotherm.columns)
+    isotherm.update(associated_content=['figure.png'])
+    assert isotherm.json['associated_content'] == ['figure.png']
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Test level-of-detail downsampling of isotherms."""
+import numpy as np
+
+from digitizer.downsample import lttb, select_points
+
+
+def test_lttb():
+    """LTTB keeps the end points and spikes."""
+    x = np.arange(1000, dtype=float)  # pylint: disable=invalid-name
+    y = np.zeros(1000)  # pylint: disable=invalid-name
+    y[500] = 10.0
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 500 in indices
+    assert np.all(np.diff(indices) > 0)
+    np.testing.assert_array_equal(lttb(x, y, 2000), np.arange(1000))
+
+
+def test_select_points():
+    """Extrema are always kept; the viewport is refined."""
+    pressure = np.concatenate([np.linspace(1e-3, 100, 50000), np.linspace(100, 1e-3, 50000)])
+    adsorption = pressure / (1 + pressure) + 0.01 * np.sin(np.arange(len(pressure)))
+    adsorption[1234] = np.nan
+
+    overview = select_points(pressure, adsorption, 500)
+    assert len(overview) <= 504
+    assert 1234 not in overview
+    for index in [0, len(pressure) - 1, np.nanargmin(adsorption), np.nanargmax(adsorption)]:
+        assert index in overview
+
+    zoomed = select_points(pressure, adsorption, 500, viewport=(10, 20, 0, 1))
+    inside = (pressure[zoomed] >= 10) & (pressure[zoomed] <= 20)
+    assert inside.sum() >= 500
+
+    log = select_points(pressure, adsorption, 500, viewport=(1e-3, 1, 0, 1), x_scale='log')
+    assert (pressure[log] <= 1).sum() >= 450
+    np.testing.assert_array_equal(select_points(pressure[:100], adsorption[:100], 500), np.arange(100))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Test HTTP cache shared by several worker processes."""
+import multiprocessing
+import pytest
+
+from digitizer.http_cache import AtomicFileDict, get_session
+from . import ApiServer
+
+N_WORKERS = 4
+N_REQUESTS = 20
+PATHS = ['/gases.json', '/materials.json', '/biblios.json']
+
+
+def fetch(args):
+    """Fetch endpoints repeatedly using a cached session (run in worker process)."""
+    backend, cache_path, base_url = args
+    session = get_session(backend, cache_path=cache_path, urls_expire_after={'*/biblios.json': 0})
+    n_from_cache = 0
+    for i in range(N_REQUESTS):
+        response = session.get(base_url + PATHS[i % len(PATHS)])
+        response.raise_for_status()
+        assert response.json()
+        n_from_cache += response.from_cache
+    return n_from_cache
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'filesystem'])
+def test_shared_cache(backend, tmp_path):
+    """Worker processes share cached responses without corrupting the cache."""
+    cache_path = str(tmp_path / 'cache')
+    with ApiServer(delay=0.01) as server:
+        with multiprocessing.get_context('spawn').Pool(N_WORKERS) as pool:
+            from_cache = pool.map(fetch, [(backend, cache_path, server.base_url)] * N_WORKERS)
+        requests = list(server.requests)
+
+    # /biblios.json expires immediately, the others are fetched at most once per worker
+    n_biblio = len([path for path in requests if path == '/biblios.json'])
+    assert n_biblio == N_WORKERS * len(range(2, N_REQUESTS, len(PATHS)))
+    assert len(requests) - n_biblio <= N_WORKERS * (len(PATHS) - 1)
+    # expired responses may be revalidated (304 Not Modified) and served from the cache
+    assert sum(from_cache) >= N_WORKERS * N_REQUESTS - len(requests)
+
+
+def test_filesystem_atomic_writes(tmp_path):
+    """Response files are replaced, never truncated while another process may read them."""
+    responses = AtomicFileDict(tmp_path / 'cache', serializer=None)
+    responses['key'] = 'old response'
+    path, = responses.paths()
+    with open(path, 'rb') as handle:
+        responses['key'] = 'new response'
+        assert handle.read() == b'old response'
+    assert responses['key'] == 'new response'
+    assert responses.keys() == ['key']
+
+
+def test_memory_cache():
+    """Memory backend caches within the session."""
+    with ApiServer() as server:
+        session = get_session('memory')
+        assert not session.get(server.base_url + '/gases.json').from_cache
+        assert session.get(server.base_url + '/gases.json').from_cache
+
+    with pytest.raises(ValueError):
+        get_session('redis')
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""Test that importing the digitizer does not load heavy dependencies or perform I/O."""
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['bokeh', 'panel', 'pandas', 'numpy', 'pydenticon', 'requests', 'requests_cache']
+
+SCRIPT = """
+import json, sys
+import digitizer, digitizer.config, digitizer.vocabulary, digitizer.snapshot, digitizer.parse
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_import_is_light():
+    """Heavy dependencies are deferred until first use."""
+    output = subprocess.run([sys.executable, '-c', SCRIPT], check=True, capture_output=True, text=True).stdout
+    modules = set(json.loads(output))
+    assert not modules.intersection(HEAVY_MODULES)
@@ -3,9 +3,12 @@
 import os
 import glob
 import json
+import numpy as np
 import pytest
 
-from digitizer.load_json import load_isotherm_json
+from digitizer import load_json
+from digitizer.load_json import load_isotherm_json, format_table
+from digitizer.parse import read_table
 from digitizer.forms import IsothermSingleComponentForm
 from . import TESTS_STATIC_DIR
 
@@ -22,3 +25,30 @@ def test_load_isotherm_json(filename):
 
     json_dict = json.loads(json_string)
     assert form.inp_source_type.value == json_dict['articleSource']
+
+
+def test_load_isotherm_json_not_numeric():
+    """Non-numeric isotherm data is reported as form error."""
+    with open(SAMPLE_ISOTHERMS[0], 'r', encoding='utf8') as handle:
+        json_dict = json.load(handle)
+    json_dict['isotherm_data'][0]['pressure'] = 'n/a'
+    form = IsothermSingleComponentForm(tabs=None)
+    load_isotherm_json(form=form, json_string=json.dumps(json_dict))
+
+    assert 'not numeric' in form.out_info.text
+    assert form.btn_plot.button_type == 'danger'
+
+
+def test_format_table(monkeypatch):
+    """Values are written as the shortest text of the same float, with or without orjson."""
+    table = np.array([[1e-05, 0.1, 1 / 3], [1e16, 100, -2.0]])
+    text = format_table(table, header='#header\n')
+    assert text.startswith('#header\n') and text.count('\n') == 3
+    np.testing.assert_array_equal(read_table(text)[0], table)
+    assert format_table(table[:0], header='#header\n') == '#header\n'
+    assert format_table(np.array([[1.0, np.nan]])) == '1.0,nan\n'
+
+    monkeypatch.setattr(load_json, 'get_orjson', lambda: None)
+    assert format_table(table) == '1e-05,0.1,0.3333333333333333\n1e+16,100.0,-2.0\n'
+    table[1, 1] = np.nan
+    np.testing.assert_array_equal(read_table(format_table(table))[0], table)
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 """Test parsing the data field of the isotherm input form."""
+import io
 import os
 import glob
 import json
 import pytest
 
-from digitizer.parse import parse_isotherm_data
+from digitizer import ValidationError
+from digitizer.parse import format_errors, parse_isotherm_data, parse_isotherm_file, read_table_file
 from . import TESTS_STATIC_DIR
 
 ISOTHERM_DATA_FILES = glob.glob(os.path.join(TESTS_STATIC_DIR, 'data_parsing', 'isotherm_data_*.dat'))
@@ -24,3 +26,84 @@ def test_parse_isotherm_data(filename):
 
         parsed = parse_isotherm_data(data, ADSORBATES_DICT, form_type='single-component')
         assert parsed == ISOTHERM_DATA_DICT
+
+
+def test_parse_multi_component():
+    """Test multi-component data with and without total adsorption."""
+    adsorbates = ADSORBATES_DICT + [{'InChIKey': 'CURLTUGMZLYLDI-UHFFFAOYSA-N', 'name': 'Carbon dioxide'}]
+
+    parsed = parse_isotherm_data('1.0, 0.2, 0.5, 0.8, 1.5  # first\n\n2.0; 0.3; 0.7; 0.7; 2.1\n',
+                                 adsorbates,
+                                 form_type='multi-component')
+    assert [m['pressure'] for m in parsed] == [1.0, 2.0]
+    assert parsed[1]['species_data'][1] == {
+        'InChIKey': adsorbates[1]['InChIKey'],
+        'composition': 0.7,
+        'adsorption': 2.1
+    }
+    assert 'total_adsorption' not in parsed[0]
+
+    parsed = parse_isotherm_data('1.0 0.2 0.5 0.8 1.5 2.0', adsorbates, form_type='multi-component')
+    assert parsed[0]['total_adsorption'] == 2.0
+
+
+@pytest.mark.parametrize('data,message', [
+    ('1.0 0.2 0.5\n' + '2.0 0.3 0.7 0.7 2.1\n' * 3, 'Line 1: Expected 5 or 6 columns, found 3$'),
+    ('1.0 0.2 0.5 0.8 1.5 2.0\n' + '2.0 0.3 0.7 0.7 2.1\n' * 3,
+     'Line 1: Expected 5 columns as in other rows, found 6$'),
+])
+def test_parse_multi_component_invalid(data, message):
+    """Test that rows are checked against all allowed numbers of columns, even if the first row is invalid."""
+    adsorbates = ADSORBATES_DICT + [{'InChIKey': 'CURLTUGMZLYLDI-UHFFFAOYSA-N', 'name': 'Carbon dioxide'}]
+    with pytest.raises(ValidationError, match=message):
+        parse_isotherm_data(data, adsorbates, form_type='multi-component')
+    with pytest.raises(ValidationError, match=message):
+        parse_isotherm_file(io.StringIO(data), adsorbates, form_type='multi-component')
+
+
+@pytest.mark.parametrize('data,message', [
+    ('1.0 2.0\n3.0 4.0 5.0', 'Line 2: Expected 2 columns, found 3'),
+    ('1.0 2.0 3.0\n3.0 4.0 5.0\n5.0 6.0', 'Lines 1, 2: Expected 2 columns, found 3'),
+    ('# comment\n1.0 2.0\n3.0 four', 'Line 3: Could not convert "four"'),
+    ('# comment only', 'No pressure points'),
+])
+def test_parse_isotherm_data_invalid(data, message):
+    """Test that invalid data is reported with line numbers."""
+    with pytest.raises(ValidationError, match=message):
+        parse_isotherm_data(data, ADSORBATES_DICT, form_type='single-component')
+
+
+@pytest.mark.parametrize('filename', ISOTHERM_DATA_FILES)
+def test_parse_isotherm_file(filename):
+    """Test that data files are parsed in chunks."""
+    with open(filename, 'r', encoding='utf8') as handle:
+        columns = parse_isotherm_file(handle, ADSORBATES_DICT, form_type='single-component')
+    assert columns.to_json() == ISOTHERM_DATA_DICT
+
+    with open(filename, 'r', encoding='utf8') as handle:
+        table, line_numbers = read_table_file(handle, chunk_lines=2)
+    assert table.tolist() == [[m['pressure'], m['total_adsorption']] for m in ISOTHERM_DATA_DICT]
+    assert line_numbers.tolist() == list(range(1, len(ISOTHERM_DATA_DICT) + 1))
+
+
+def test_parse_isotherm_file_errors():
+    """Test that all invalid lines of a file are reported."""
+    handle = io.StringIO('1.0 2.0\n3.0 x\n\n5.0 6.0 7.0\n' + '1.0 2.0\n' * 10 + 'nan, 3.0,\n')
+    errors = []
+    table, line_numbers = read_table_file(handle, n_columns=2, errors=errors, chunk_lines=3)
+    assert [line for line, _ in errors] == [2, 4]
+    assert len(table) == 12
+    assert line_numbers[-1] == 15
+
+    handle.seek(0)
+    with pytest.raises(ValidationError, match='Line 2: Could not convert "x" to a number\nLine 4: Expected 2'):
+        parse_isotherm_file(handle, ADSORBATES_DICT)
+
+
+def test_format_errors():
+    """Lines with the same error are grouped."""
+    errors = [(line, 'Negative pressure') for line in range(1, 13)] + [(5, 'Could not convert "x" to a number')]
+    assert format_errors(errors, max_lines=3).splitlines() == [
+        'Lines 1, 2, 3 and 9 more: Negative pressure',
+        'Line 5: Could not convert "x" to a number',
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Test JSON serialization."""
+import json
+
+from digitizer import serialize
+from .test_columns import SAMPLE_ISOTHERMS
+
+
+def test_dump_json(monkeypatch):
+    """The pretty form does not depend on orjson; the compact form holds the same data."""
+    with open(SAMPLE_ISOTHERMS[0], 'r', encoding='utf8') as handle:
+        data = json.load(handle)
+    data['comment'] = 'line 1\n  indented line 2'
+    pretty = serialize.dump_json(data)
+    compact = serialize.dump_json(data, pretty=False)
+    assert pretty == json.dumps(data, ensure_ascii=False, sort_keys=True, indent=4)
+    assert json.loads(compact) == data
+
+    monkeypatch.setattr(serialize, 'get_orjson', lambda: None)
+    assert serialize.dump_json(data) == pretty
+    assert serialize.dump_json(data, pretty=False) == json.dumps(data,
+                                                                 ensure_ascii=False,
+                                                                 sort_keys=True,
+                                                                 separators=(',', ':'))
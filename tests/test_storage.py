@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Test crash-safe file storage."""
+import os
+import pytest
+
+from digitizer.storage import write_atomic, BlobStore
+
+
+def test_write_atomic(tmp_path):
+    """Files appear complete or not at all, with the usual permissions; no temporary files are left behind."""
+    path = tmp_path / 'submission.zip'
+    write_atomic(str(path), lambda handle: handle.write(b'complete'))
+    assert path.read_bytes() == b'complete'
+    (tmp_path / 'reference').write_bytes(b'')
+    assert path.stat().st_mode == (tmp_path / 'reference').stat().st_mode
+    (tmp_path / 'reference').unlink()
+
+    def fail(handle):
+        handle.write(b'trunc')
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        write_atomic(str(path), fail)
+    with pytest.raises(OSError):
+        write_atomic(str(tmp_path / 'other.zip'), fail)
+    assert path.read_bytes() == b'complete'
+    assert os.listdir(tmp_path) == ['submission.zip']
+
+
+def test_blob_store(tmp_path):
+    """Identical blobs are stored once; blobs evicted from memory are written to disk and read from there."""
+    store = BlobStore(str(tmp_path), memory_budget=10, spill_size=8)
+    digest = store.put(b'figure 1')
+    assert store.put(bytearray(b'figure 1')) == digest
+    assert not os.path.exists(store.path(digest))
+    assert store.get(digest) == b'figure 1'
+
+    other = store.put(b'figure 2')
+    assert digest not in store.cache
+    assert os.path.exists(store.path(digest)) and not os.path.exists(store.path(other))
+    assert store.get(digest) == b'figure 1'
+    assert store.get(other) == b'figure 2'
+    assert store.cache.hit_rate('blob') == 1 / 3
+
+    large = store.put(b'large figure')
+    assert large not in store.cache
+    assert store.get(large) == b'large figure'
+
+
+def test_blob_store_cleanup(tmp_path, monkeypatch):
+    """Blob files that were not used for max_age are deleted."""
+    monkeypatch.setattr('digitizer.storage.run_in_background', lambda function: None)
+    store = BlobStore(str(tmp_path), memory_budget=10, spill_size=0, max_age=3600)
+    digest, other = store.put(b'figure 1'), store.put(b'figure 2')
+    os.utime(store.path(digest), (0, 0))
+    assert store.cleanup() == 1
+    assert not os.path.exists(store.path(digest))
+    assert store.get(other) == b'figure 2'
+
+
+def test_figure_image_handle():
+    """Figure images with the same content share one blob."""
+    from digitizer.parse import FigureImage  # pylint: disable=import-outside-toplevel
+
+    figure, copy = FigureImage(b'\x89PNG' * 10, 'a.png'), FigureImage(b'\x89PNG' * 10, 'b.png')
+    assert figure.digest == copy.digest
+    assert 'data' not in vars(figure)
+    assert copy.data == b'\x89PNG' * 10
+    assert FigureImage().data is None
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Test submission stack."""
+import json
+import time
+
+from digitizer.parse import FigureImage
+from digitizer.submission import Isotherm, Submissions, get_identicon, precompute_identicons
+from .test_columns import SAMPLE_ISOTHERMS
+
+
+def _load_isotherm(filename=SAMPLE_ISOTHERMS[0]):
+    """Load sample isotherm."""
+    with open(filename, 'r', encoding='utf8') as handle:
+        return Isotherm(json.load(handle))
+
+
+def test_digest():
+    """Digest depends on content only and is updated on modification."""
+    isotherm, copy = _load_isotherm(), _load_isotherm()
+    assert isotherm.digest == copy.digest
+    assert len(isotherm.digest) == 64
+    assert isotherm == copy and hash(isotherm) == hash(copy)
+
+    copy.update(temperature=77)
+    assert isotherm.digest != copy.digest
+    copy.update(temperature=isotherm.metadata['temperature'])
+    assert isotherm.digest == copy.digest
+
+
+def test_submissions_dedupe():
+    """Isotherms with the same content are added once; modified isotherms are re-indexed."""
+    submissions = Submissions()
+    isotherms = [_load_isotherm(filename) for filename in SAMPLE_ISOTHERMS[:2]]
+    for isotherm in isotherms:
+        submissions.append(isotherm)
+    submissions.append(_load_isotherm(SAMPLE_ISOTHERMS[0]))
+    assert submissions.data == isotherms[::-1]
+    assert _load_isotherm() in submissions
+
+    isotherms[0].update(custom='modified')
+    assert _load_isotherm() not in submissions
+    assert isotherms[0] in submissions
+
+    submissions.remove(isotherms[0])
+    assert list(submissions) == [isotherms[1]]
+
+
+def test_zip_files_keep_digest():
+    """Setting the associated content of isotherms with figure keeps their digest and cached files."""
+    submissions = Submissions()
+    isotherm = _load_isotherm()
+    isotherm.figure_image = FigureImage(b'\x89PNG' * 10, 'figure.png')
+    digest = isotherm.digest
+    submissions.append(isotherm)
+
+    keys = [file[0] for file in submissions.get_zip_files()]
+    assert isotherm.metadata['associated_content'] == [keys[0][1]]
+    assert isotherm.digest == digest and isotherm in submissions
+    assert [file[0] for file in submissions.get_zip_files()] == keys
+    assert '"associated_content"' in isotherm.json_str
+
+
+def test_identicon_cache():
+    """Identicons are rendered once per digest, in the background; rows are created when shown in the stack."""
+    isotherms = [_load_isotherm(filename) for filename in SAMPLE_ISOTHERMS[:3]]
+    for isotherm in isotherms:
+        isotherm.update(custom='identicon cache test')  # digests not rendered by other tests
+    assert isotherms[0].btn_load is None
+
+    futures = precompute_identicons(isotherm.digest for isotherm in isotherms)
+    submissions = Submissions()
+    submissions.extend(isotherms)
+    assert futures[0].result() is get_identicon(isotherms[0].digest)
+    assert futures[1].result().image != futures[2].result().image
+
+    deadline = time.time() + 5
+    while isotherms[2].identicon_pane.object is None and time.time() < deadline:
+        time.sleep(0.01)  # done callbacks may run after the result is set
+    assert isotherms[2].identicon_pane.object is futures[2].result()
+
+
+def test_json_str_cache():
+    """Serializations are cached until the isotherm is modified; both forms hold the same data."""
+    isotherm = _load_isotherm()
+    pretty = isotherm.json_str
+    assert isotherm.json_str is pretty
+    assert pretty == json.dumps(isotherm.json, ensure_ascii=False, sort_keys=True, indent=4)
+    assert json.loads(isotherm.get_json_str(pretty=False)) == json.loads(pretty)
+    assert len(isotherm.get_json_str(pretty=False)) < len(pretty)
+
+    isotherm.update(temperature=77)
+    assert json.loads(isotherm.json_str)['temperature'] == 77
+    assert json.loads(isotherm.get_json_str(pretty=False))['temperature'] == 77
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Test downscaled previews of figure images."""
+import io
+import time
+from PIL import Image
+
+from digitizer import thumbnail
+from digitizer.parse import FigureImage
+
+
+def _get_image(width, height, image_format='PNG'):
+    """Return image file content."""
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(output, format=image_format)
+    return output.getvalue()
+
+
+def test_make_thumbnail():
+    """Images are downscaled to fit, keeping the aspect ratio; small PNG images are kept as is."""
+    preview = Image.open(io.BytesIO(thumbnail.make_thumbnail(_get_image(4000, 3000, 'JPEG'), 400)))
+    assert preview.format == 'PNG'
+    assert preview.size == (400, 300)
+
+    preview = Image.open(io.BytesIO(thumbnail.make_thumbnail(_get_image(4000, 3000), 35, 35)))
+    assert preview.size == (35, 26)
+
+    small = _get_image(300, 200)
+    assert thumbnail.make_thumbnail(small, 400) == small
+
+
+def test_request_thumbnail():
+    """Previews are rendered once per content and size; cached previews are returned without waiting."""
+    data = _get_image(1200, 900)
+    figure, copy = FigureImage(data, 'a.png'), FigureImage(data, 'b.png')
+    future = figure.request_thumbnail()
+    assert future.result().image == copy.request_thumbnail().result().image
+    assert copy.request_thumbnail().done()
+    assert figure.request_thumbnail(thumbnail.PREVIEW_WIDTH, 200).result().image != future.result().image
+    assert figure.data == data  # the original is kept for the submission
+
+    assert FigureImage(b'not an image', 'broken.png').request_thumbnail().result() is None
+
+
+def test_check_shows_thumbnail():
+    """The check tab shows the preview of the current figure only."""
+    from digitizer.check import IsothermCheckView  # pylint: disable=import-outside-toplevel
+
+    view = IsothermCheckView()
+    first, second = FigureImage(_get_image(2000, 1000), 'a.png'), FigureImage(_get_image(1000, 1000), 'b.png')
+    view.show_figure(first)
+    view.show_figure(second)
+    first.request_thumbnail().result()
+    second.request_thumbnail().result()
+    deadline = time.time() + 5
+    while view.figure_pane.object is None and time.time() < deadline:
+        time.sleep(0.01)  # done callbacks may run after the result is set
+    assert Image.open(io.BytesIO(view.figure_pane.object.image)).size == (400, 400)
+
+    view.show_figure(None)
+    assert view.figure_pane.object is None
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Test consistency checks of parsed isotherm data."""
+import numpy as np
+import pytest
+
+from digitizer import ValidationError
+from digitizer.columns import IsothermColumns
+from digitizer.parse import parse_isotherm_columns
+from digitizer.validate import validate_columns
+
+ADSORBATES = [{
+    'InChIKey': 'VNWKTOKETHGBQD-UHFFFAOYSA-N',
+    'name': 'Methane'
+}, {
+    'InChIKey': 'CURLTUGMZLYLDI-UHFFFAOYSA-N',
+    'name': 'Carbon dioxide'
+}]
+
+MULTI_COMPONENT_DATA = """#pressure,composition1,adsorption1,composition2,adsorption2,total_adsorption
+1.0, 0.5, 1.0, 0.5, 1.0, 2.0
+2.0, 0.5, 1.0, 0.6, 1.0, 2.0
+-3.0, 0.5, 1.0, 0.5, 1.0, 2.0
+4.0, 0.5, nan, 0.5, 1.0, 2.0
+5.0, 0.5, 1.0, 0.5, 1.0, 3.0
+6.0, 0.5, 1.0, 0.5, 1.0
+7.0, 0.5, 1.0, 0.5, 1.0, 2.0, 8.0
+8.0, 0.5, 1.0, 0.5, 1.0, x
+"""
+
+
+def test_report_all_errors():
+    """All problems are reported at once, with line numbers."""
+    with pytest.raises(ValidationError) as exc:
+        parse_isotherm_columns(MULTI_COMPONENT_DATA, ADSORBATES, 'multi-component', composition_type='Mole Fraction')
+    assert str(exc.value).splitlines() == [
+        'Line 3: Compositions do not sum to 1 (tolerance 0.01)',
+        'Line 4: Negative pressure',
+        'Line 5: Missing or infinite value (NaN or inf)',
+        'Line 6: Total adsorption differs from sum of adsorption of species (tolerance 2%)',
+        'Line 7: Expected 6 columns as in other rows, found 5',
+        'Line 8: Expected 5 or 6 columns, found 7',
+        'Line 9: Could not convert "x" to a number',
+    ]
+
+
+def test_composition_type():
+    """Compositions need to sum to one only for fractions."""
+    data = '1.0 0.5 1.0 0.6 1.0'
+    parse_isotherm_columns(data, ADSORBATES, 'multi-component', composition_type='Concentration (specify units)')
+    with pytest.raises(ValidationError, match='Line 1: Compositions do not sum to 1'):
+        parse_isotherm_columns(data, ADSORBATES, 'multi-component', composition_type='Mole Fraction')
+
+
+def test_total_adsorption_single_species():
+    """Total adsorption is checked against the adsorption of a single species, too."""
+    columns = IsothermColumns([1.0, 2.0], ADSORBATES[:1], [1.0, 1.0], [1.0, 2.0], [1.0, 3.0])
+    assert validate_columns(columns, [1, 2]) == [
+        (2, 'Total adsorption differs from sum of adsorption of species (tolerance 2%)')
+    ]
+
+
+def test_validate_large_input():
+    """Every offending line of a large input is reported."""
+    size = 1000000
+    pressure = np.linspace(-1, 1, size)
+    columns = IsothermColumns(pressure, ADSORBATES[:1], np.ones(size), np.ones(size), np.ones(size))
+    errors = validate_columns(columns, np.arange(size) + 1)
+    assert len(errors) == size // 2
+    assert errors[0] == (1, 'Negative pressure')
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Test loading controlled vocabularies from the ISDB API."""
+import gzip
+import json
+import os
+import shutil
+import time
+import pytest
+
+from digitizer import config, snapshot
+from digitizer.forms import IsothermSingleComponentForm, IsothermMultiComponentForm
+from digitizer.autocomplete import get_select_input
+from digitizer.vocabulary import VocabularyLoader, Vocabulary, EndpointData, BIBLIOGRAPHY_PATH, normalize_doi
+from . import ApiServer, TESTS_API_DIR
+
+DELAY = 0.2  # seconds per request
+
+
+def test_lazy_loading():
+    """Vocabulary is only fetched on first access."""
+    with ApiServer() as server:
+        loader = VocabularyLoader(server.base_url, config.QUANTITY_API_MAPPING)
+        assert not loader.loaded
+        assert not server.requests
+
+        vocabulary = loader.get()
+        assert loader.loaded
+        assert loader.get() is vocabulary
+        assert len(server.requests) == len(config.QUANTITY_API_MAPPING) + 1
+
+
+def test_concurrent_loading():
+    """Endpoints are fetched concurrently, costing about one round trip."""
+    with ApiServer(delay=DELAY) as server:
+        loader = VocabularyLoader(server.base_url, config.QUANTITY_API_MAPPING)
+        start = time.perf_counter()
+        vocabulary = loader.get()
+        elapsed = time.perf_counter() - start
+
+    n_endpoints = len(config.QUANTITY_API_MAPPING) + 1
+    assert elapsed < n_endpoints * DELAY / 2
+    assert set(loader.timings) == set(config.QUANTITY_API_MAPPING.values()) | {BIBLIOGRAPHY_PATH}
+    assert all(timing >= DELAY for timing in loader.timings.values())
+
+    assert 'Methane' in vocabulary.quantities['adsorbates']['names']
+    assert 'CH4' in vocabulary.quantities['adsorbates']['names']
+    assert 'Not specified' in vocabulary.quantities['isotherm_type']['names']
+    assert '10.1021/la034766z' in vocabulary.dois
+
+
+def test_config_quantities():
+    """Module-level QUANTITIES resolve against the configured API."""
+    assert 'Zeolite 5A' in config.QUANTITIES['adsorbents']['names']
+    assert '10.1021/la034766z' in config.DOIs
+
+
+def test_snapshot(tmp_path):
+    """Vocabulary snapshot is used offline and revalidated against the API."""
+    api_dir = tmp_path / 'api'
+    shutil.copytree(TESTS_API_DIR, api_dir)
+    snapshot_path = str(tmp_path / 'vocabulary.json.gz')
+
+    with ApiServer(directory=str(api_dir)) as server:
+        base_url = server.base_url
+        assert snapshot.main(['build', '--output', snapshot_path, '--base-url', base_url]) == 0
+
+        # unchanged content is not swapped in
+        loader = VocabularyLoader(base_url, config.QUANTITY_API_MAPPING, snapshot_path=snapshot_path, revalidate=False)
+        vocabulary = loader.get()
+        assert not server.requests[len(loader.paths):]
+        assert not loader.refresh()
+        assert loader.get() is vocabulary
+        assert snapshot.main(['refresh', '--output', snapshot_path, '--base-url', base_url]) == 0
+
+        # changed content is swapped in
+        gases = json.loads((api_dir / 'gases.json').read_text())
+        gases.append({'InChIKey': 'UFHFLCQGNIYNRP-UHFFFAOYSA-N', 'name': 'Hydrogen', 'synonyms': ['H2']})
+        (api_dir / 'gases.json').write_text(json.dumps(gases))
+        os.utime(api_dir / 'gases.json', (time.time() + 10, time.time() + 10))
+        assert loader.refresh()
+        assert 'Hydrogen' in loader.get().quantities['adsorbates']['names']
+        assert 'Hydrogen' in snapshot.read_snapshot(snapshot_path)['/gases.json']['data'][-1]['name']
+
+    # snapshot works without API, but cannot be refreshed
+    messages = []
+    loader = VocabularyLoader(base_url,
+                              config.QUANTITY_API_MAPPING,
+                              snapshot_path=snapshot_path,
+                              revalidate=False,
+                              report=messages.append)
+    assert 'Hydrogen' in loader.get().quantities['adsorbates']['names']
+    assert messages[0].startswith('Loaded vocabulary snapshot')
+    assert not loader.refresh()
+    assert messages[-1].startswith('Unable to refresh vocabulary')
+    assert snapshot.main(['refresh', '--output', snapshot_path, '--base-url', base_url]) == 1
+    assert snapshot.main(['build', '--output', str(tmp_path / 'other.json.gz'), '--base-url', base_url]) == 1
+    assert sorted(os.listdir(tmp_path)) == ['api', 'vocabulary.json.gz']
+
+    # snapshots from a different API and other JSON files are rejected
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read_snapshot(snapshot_path, base_url='http://example.com')
+    with gzip.open(snapshot_path, 'wt', encoding='utf8') as handle:
+        json.dump([], handle)
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read_snapshot(snapshot_path)
+
+
+def test_find_by_name_and_key():
+    """Lookups by name, synonym and key use the vocabulary indexes."""
+    assert config.find_by_name('Methane', 'adsorbates')['InChIKey'] == 'VNWKTOKETHGBQD-UHFFFAOYSA-N'
+    assert config.find_by_name('CH4', 'adsorbates')['name'] == 'Methane'
+    assert config.find_by_name('silicalite-1', 'adsorbents')['name'] == 'Silicalite MFI'
+    assert config.find_by_key('XKRFYHLGVUSROY-UHFFFAOYSA-N', 'InChIKey', 'adsorbates')['name'] == 'Argon'
+    assert config.find_by_key('NIST-MATDB-035dc75dddd00241bd76627f78cbef2d', 'hashkey',
+                              'adsorbents')['name'] == 'Zeolite 5A'
+
+    with pytest.raises(ValueError):
+        config.find_by_name('Unobtainium', 'adsorbents')
+    with pytest.raises(ValueError):
+        config.find_by_key('NIST-MATDB-unknown', 'hashkey', 'adsorbents')
+
+
+def test_shared_options():
+    """Option lists are shared by all widgets and read-only."""
+    options = config.QUANTITIES['pressure_units']['select_options']
+    assert options[0] == 'Select'
+    assert IsothermSingleComponentForm(tabs=None).inp_pressure_units.options is options
+    assert IsothermMultiComponentForm(tabs=None).inp_pressure_units.options is options
+    with pytest.raises(TypeError):
+        options.append('Torr')
+
+
+def test_background_refresh(tmp_path):
+    """Changes are picked up periodically; indexes of unchanged endpoints are reused."""
+    api_dir = tmp_path / 'api'
+    shutil.copytree(TESTS_API_DIR, api_dir)
+
+    with ApiServer(directory=str(api_dir)) as server:
+        loader = VocabularyLoader(server.base_url, config.QUANTITY_API_MAPPING, refresh_interval=0.05)
+        updates = []
+        loader.subscribe(updates.append)
+        vocabulary = loader.get()
+
+        biblio = json.loads((api_dir / 'biblios.json').read_text())
+        biblio.append({'DOI': '10.1021/JACS.9B01891'})
+        (api_dir / 'biblios.json').write_text(json.dumps(biblio))
+        os.utime(api_dir / 'biblios.json', (time.time() + 10, time.time() + 10))
+
+        for _ in range(100):
+            if updates:
+                break
+            time.sleep(0.05)
+        loader.stop()
+
+    assert loader.get() is updates[0]
+    assert '10.1021/jacs.9b01891' in loader.get().dois
+    assert loader.get().indexes['adsorbents'] is vocabulary.indexes['adsorbents']
+
+
+def test_normalize_doi():
+    """DOIs are compared case-insensitively and without resolver prefixes."""
+    assert normalize_doi(' https://doi.org/10.1021/LA034766z ') == '10.1021/la034766z'
+    assert normalize_doi('doi:10.1021/la034766z') == '10.1021/la034766z'
+    assert normalize_doi('10.1021/La034766Z') in config.DOIs
+
+
+def test_options_follow_vocabulary():
+    """Options of live widgets are updated when the vocabulary is replaced."""
+    widget = get_select_input('isotherm_type')
+    vocabulary = config.VOCABULARY.get()
+    endpoints = dict(vocabulary.endpoints)
+    endpoints['/isotherm-type-lookup.json'] = EndpointData(data=[{'name': 'Net'}], etag=None, last_modified=None)
+    try:
+        config.VOCABULARY.set(Vocabulary(endpoints, config.QUANTITY_API_MAPPING, previous=vocabulary))
+        assert widget.options == ['Select', 'Net', 'Not specified']
+    finally:
+        config.VOCABULARY.set(vocabulary)
+    assert widget.options is vocabulary.quantities['isotherm_type']['select_options']